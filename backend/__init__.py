@@ -3,7 +3,9 @@ from .backend import (
     backend_dbf,
     backend_qbf,
     backend_sample_labeling,
+    backend_active_learning,
     backend_label_propagation,
+    backend_incremental_propagation,
     backend_pull_errors,
     get_available_strategies,
 )
@@ -12,7 +14,9 @@ __all__ = [
     'backend_dbf',
     'backend_qbf', 
     'backend_sample_labeling',
+    'backend_active_learning',
     'backend_label_propagation',
+    'backend_incremental_propagation',
     'backend_pull_errors',
     'get_available_strategies',
 ]
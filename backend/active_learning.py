@@ -0,0 +1,171 @@
+"""
+Active-learning batch loop for labeling.
+
+An ActiveLearner holds the candidate cells, their feature matrix and one
+incrementally trained classifier per cell fold. Cells are served in small
+batches; after each batch of labels only the touched folds are updated with
+``partial_fit`` and rescored, and the next batch is chosen from the updated
+error probabilities. Features are stored grouped by fold so rescoring a fold
+is a single matrix-vector product over a contiguous slice.
+
+Run ``python -m backend.active_learning`` for a per-batch latency benchmark.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from .sampling import STRATEGY_ALIASES, cell_feature_matrix, error_probabilities, least_confidence, top_k
+
+# Score based strategies usable in the loop; set based ones (core-set, diversity)
+# do not depend on model scores and fall back to uncertainty sampling. The
+# margin and entropy names are aliases (see backend.sampling).
+SCORE_FUNCTIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "Uncertainty Sampling": least_confidence,
+}
+
+
+class ActiveLearner:
+    """Serve candidate cells in batches and refine scores as labels arrive.
+
+    Args:
+        cells: Candidate cell dicts (table/row/col/val/cell_fold/strategies).
+        strategy: Name from SCORE_FUNCTIONS used to rank unlabeled cells.
+        batch_size: Default number of cells per batch.
+        seed: Seed for tie-breaking and model initialisation.
+        features: Optional precomputed feature matrix aligned with `cells`.
+    """
+
+    def __init__(
+        self,
+        cells: Sequence[Dict[str, Any]],
+        strategy: str = "Uncertainty Sampling",
+        batch_size: int = 10,
+        seed: Optional[int] = None,
+        features: Optional[np.ndarray] = None,
+    ) -> None:
+        self.cells = list(cells)
+        strategy = STRATEGY_ALIASES.get(strategy, strategy)
+        self.strategy = strategy if strategy in SCORE_FUNCTIONS else "Uncertainty Sampling"
+        self.batch_size = int(batch_size)
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+
+        feats = cell_feature_matrix(self.cells) if features is None else np.asarray(features, dtype=np.float32)
+        fold_names = [str(c.get("cell_fold", "")) for c in self.cells]
+        self.fold_names = sorted(set(fold_names))
+        fold_index = {name: i for i, name in enumerate(self.fold_names)}
+        fold_ids = np.fromiter((fold_index[f] for f in fold_names), dtype=np.int32, count=len(fold_names))
+
+        # Reorder rows so every fold is a contiguous slice [start, stop)
+        self._order = np.argsort(fold_ids, kind="stable")
+        self._position = np.empty_like(self._order)
+        self._position[self._order] = np.arange(self._order.shape[0])
+        self.features = np.ascontiguousarray(feats[self._order])
+        sorted_ids = fold_ids[self._order]
+        bounds = np.searchsorted(sorted_ids, np.arange(len(self.fold_names) + 1))
+        self._slices = [slice(int(bounds[i]), int(bounds[i + 1])) for i in range(len(self.fold_names))]
+        self._fold_of_row = sorted_ids
+
+        self.p_error = error_probabilities(self.features)[:, 1].copy()
+        self.served = np.zeros(len(self.cells), dtype=bool)
+        self.labeled = np.zeros(len(self.cells), dtype=bool)
+        self.models: Dict[int, SGDClassifier] = {}
+        self.last_batch_seconds = 0.0
+        self.last_update_seconds = 0.0
+
+    @property
+    def n_served(self) -> int:
+        return int(self.served.sum())
+
+    def mark_served(self, ids: Sequence[int]) -> None:
+        """Exclude already shown cells (e.g. when rebuilding a learner after a reload)."""
+        if len(ids):
+            self.served[self._position[np.asarray(list(ids), dtype=np.int64)]] = True
+
+    def next_batch(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the next `k` most informative cells not yet served or labeled.
+
+        Each returned dict is the candidate cell plus an ``id`` (its candidate
+        index, stable for the learner's lifetime) and the current ``p_error``.
+        """
+        t0 = time.perf_counter()
+        k = self.batch_size if k is None else int(k)
+        proba = np.stack([1.0 - self.p_error, self.p_error], axis=1)
+        scores = SCORE_FUNCTIONS[self.strategy](proba).astype(np.float64)
+        # Labels can also arrive for cells not served by this learner (e.g. replayed after a reload)
+        done = self.served | self.labeled
+        scores[done] = -np.inf
+        k = min(k, int((~done).sum()))
+        rows = top_k(scores, k, self._rng) if k > 0 else np.empty(0, dtype=np.int64)
+        self.served[rows] = True
+        batch = []
+        for r in rows:
+            idx = int(self._order[r])
+            batch.append({**self.cells[idx], "id": idx, "p_error": float(self.p_error[r])})
+        self.last_batch_seconds = time.perf_counter() - t0
+        return batch
+
+    def update(self, labels: Mapping[int, bool]) -> None:
+        """Fold new labels into the per-fold models and rescore touched folds.
+
+        Args:
+            labels: Mapping of candidate index (the ``id`` from next_batch) to
+                ``True`` if the cell was labeled an error, ``False`` if correct.
+        """
+        t0 = time.perf_counter()
+        if not labels:
+            return
+        idx = np.fromiter((int(i) for i in labels), dtype=np.int64, count=len(labels))
+        y = np.fromiter((1 if labels[i] else 0 for i in labels), dtype=np.int32, count=len(labels))
+        rows = self._position[idx]
+        self.labeled[rows] = True
+        folds = self._fold_of_row[rows]
+
+        for fold in np.unique(folds):
+            mask = folds == fold
+            model = self.models.get(int(fold))
+            if model is None:
+                model = SGDClassifier(loss="log_loss", alpha=1e-3, random_state=self.seed)
+                self.models[int(fold)] = model
+            model.partial_fit(self.features[rows[mask]], y[mask], classes=np.array([0, 1]))
+            sl = self._slices[int(fold)]
+            margin = self.features[sl] @ model.coef_[0].astype(np.float32) + np.float32(model.intercept_[0])
+            self.p_error[sl] = 1.0 / (1.0 + np.exp(-margin))
+        # Labeled cells are certain
+        self.p_error[rows] = y.astype(np.float32)
+        self.last_update_seconds = time.perf_counter() - t0
+
+
+def _benchmark(n_cells: int, n_folds: int, batch_size: int, rounds: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    features = (rng.random((n_cells, 8), dtype=np.float32) < 0.3).astype(np.float32)
+    cells = [{"cell_fold": f"fold-{i % n_folds}"} for i in range(n_cells)]
+    t0 = time.perf_counter()
+    learner = ActiveLearner(cells, batch_size=batch_size, seed=seed, features=features)
+    print(f"init: {time.perf_counter() - t0:.3f}s for {n_cells:,} cells in {n_folds} folds")
+    for r in range(rounds):
+        batch = learner.next_batch()
+        labels = {c["id"]: bool(features[c["id"]].sum() >= 3) for c in batch}
+        learner.update(labels)
+        total = learner.last_batch_seconds + learner.last_update_seconds
+        print(
+            f"round {r + 1}: select {learner.last_batch_seconds:.3f}s "
+            f"update {learner.last_update_seconds:.3f}s total {total:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark active-learning batch latency")
+    parser.add_argument("--cells", type=float, default=2e6)
+    parser.add_argument("--folds", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    _benchmark(int(args.cells), args.folds, args.batch_size, args.rounds, args.seed)
@@ -6,18 +6,28 @@ via ensure_api_started().
 """
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import threading
 import time
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 import socket
 import http.client
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from .sample_source import backend_sample_labeling
 from . import sessions as S
+from .events import get_session_events, publish
+from .ingest import get_ingest_queue, shutdown_ingest_queue
+from .retention import retention_metrics, start_retention_worker, stop_retention_worker
 
 
 def _api_host() -> str:
@@ -60,6 +70,8 @@ def _check_health(host: str, port: int, timeout: float = 0.4) -> bool:
 
 class CreateSessionBody(BaseModel):
     min_budget: int
+    # Used to size the speculative sample pool; topped up as more players join
+    expected_players: Optional[int] = None
 
 
 class CreatePlayerBody(BaseModel):
@@ -82,9 +94,30 @@ app.add_middleware(
 )
 
 
+def _ingest_enabled() -> bool:
+    """Labels go through the group-commit queue unless MP_INGEST_QUEUE=0."""
+    return os.environ.get("MP_INGEST_QUEUE", "1").strip().lower() not in ("0", "false", "off")
+
+
 @app.on_event("startup")
 def _on_startup() -> None:
     S.init_db()
+    if _ingest_enabled():
+        # Replays labels journaled but not committed before a restart
+        get_ingest_queue()
+    start_retention_worker()
+
+
+@app.on_event("shutdown")
+def _on_shutdown() -> None:
+    stop_retention_worker()
+    shutdown_ingest_queue()
+
+
+def _flush_labels() -> None:
+    """Make queued labels visible to reads that depend on committed state."""
+    if _ingest_enabled():
+        get_ingest_queue().flush()
 
 
 @app.get("/api/health")
@@ -97,10 +130,107 @@ def health_alias() -> Dict[str, Any]:
     return {"status": "ok"}
 
 
+@app.get("/api/metrics")
+def metrics() -> Dict[str, Any]:
+    """Label ingestion queue depth, commit latency, SQLite lock waits, the last retention pass and event subscribers."""
+    ingest = {"enabled": True, **get_ingest_queue().metrics()} if _ingest_enabled() else {"enabled": False}
+    return {
+        "ingest": ingest,
+        "sqlite": S.lock_stats(),
+        "retention": retention_metrics(),
+        "events": get_session_events().metrics(),
+    }
+
+
+def _default_expected_players() -> int:
+    try:
+        return max(1, int(os.environ.get("MP_EXPECTED_PLAYERS", "4")))
+    except Exception:
+        return 4
+
+
+# One lock per session so creation, joins and start never build the same pool
+# twice. Entries count their holders and waiters and are dropped when the last
+# one leaves, so finished and deleted sessions leave nothing behind.
+_POOL_LOCKS: Dict[str, Tuple[threading.Lock, int]] = {}
+_POOL_LOCKS_GUARD = threading.Lock()
+
+
+@contextmanager
+def _pool_lock(session_id: str) -> Iterator[None]:
+    with _POOL_LOCKS_GUARD:
+        lock, users = _POOL_LOCKS.get(session_id, (None, 0))
+        lock = lock or threading.Lock()
+        _POOL_LOCKS[session_id] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _POOL_LOCKS_GUARD:
+            users = _POOL_LOCKS[session_id][1] - 1
+            if users:
+                _POOL_LOCKS[session_id] = (lock, users)
+            else:
+                del _POOL_LOCKS[session_id]
+
+
+def _ensure_pool(session_id: str, target: int) -> int:
+    """Grow the session pool to at least `target` samples; returns the pool size.
+
+    Only the missing part is appended: cells already in the pool are skipped
+    so top-ups never hand out the same cell twice.
+    """
+    with _pool_lock(session_id):
+        pool = S.get_session_pool(session_id)
+        have = len(pool)
+        if have >= target:
+            return have
+        seen = {(p["table"], str(p["row"]), p["col"]) for p in pool}
+        # Asking for `target` cells yields at least target - have unseen ones
+        items = backend_sample_labeling(target)
+        fresh: List[Dict[str, Any]] = []
+        for it in items:
+            key = (it.get("table"), str(it.get("row", 0)), it.get("col"))
+            if key in seen:
+                continue
+            seen.add(key)
+            fresh.append(
+                {
+                    "sample_id": str(have + len(fresh)),
+                    "dataset": it.get("selected_dataset") or it.get("dataset") or "Demo",
+                    "table": it.get("table"),
+                    "row": int(it.get("row", 0)),
+                    "col": it.get("col"),
+                    "val": it.get("val"),
+                }
+            )
+            if have + len(fresh) >= target:
+                break
+        return S.append_session_pool(session_id, fresh) if fresh else have
+
+
+def _prebuild_pool(session_id: str, target: int) -> None:
+    """Build or top up the pool off the request path; failures are retried at start."""
+
+    def _worker() -> None:
+        try:
+            _ensure_pool(session_id, target)
+        except Exception:
+            pass
+
+    threading.Thread(target=_worker, name=f"mp-pool-{session_id}", daemon=True).start()
+
+
+def _pool_target(sess: Any, n_players: int) -> int:
+    return int(sess["min_budget"]) * max(int(n_players), int(sess["expected_players"] or 1))
+
+
 @app.post("/api/sessions")
 def api_create_session(body: CreateSessionBody) -> Dict[str, Any]:
-    sess = S.create_session(min_budget=int(body.min_budget))
+    expected = int(body.expected_players or _default_expected_players())
+    sess = S.create_session(min_budget=int(body.min_budget), expected_players=expected)
     sid = sess["session_id"]
+    _prebuild_pool(sid, int(body.min_budget) * expected)
     base_url = os.environ.get("BASE_URL", "http://localhost:8501")
     join_url = f"{base_url}/?session_id={sid}"
     return {"session_id": sid, "join_url": join_url}
@@ -112,6 +242,11 @@ def api_create_player(session_id: str, body: CreatePlayerBody) -> Dict[str, Any]
         player = S.create_player(session_id=session_id, role=body.role)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    publish(session_id, "player_joined")
+    sess = S.get_session(session_id)
+    if sess and sess["status"] in ("lobby", "active"):
+        # Mid-session joins grow the pool so the newcomer adds work, not just competition
+        _prebuild_pool(session_id, _pool_target(sess, len(S.list_players(session_id))))
     return player
 
 
@@ -120,6 +255,7 @@ def api_mark_player_done(session_id: str, player_id: str) -> Dict[str, Any]:
     """Mark a player as done even if they haven't labeled all assignments."""
     try:
         S.set_player_done(session_id, player_id)
+        publish(session_id, "player_done")
         return {"ok": True}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -141,10 +277,12 @@ def api_get_session(session_id: str) -> Dict[str, Any]:
 
 @app.post("/api/sessions/{session_id}/start")
 def api_start(session_id: str) -> Dict[str, Any]:
-    """Transition session to preparing and build pool+assignments in background.
+    """Activate the session once the pre-built pool is large enough.
 
-    Players can poll /sessions/{sid} and /players/{pid}/next-batch; they'll
-    receive items once status becomes 'active'.
+    The pool is normally ready (built at creation and topped up on joins), so
+    start only flips the status; players then lease items via next-batch. If it is still short, the session goes
+    to 'preparing' while a background worker finishes it; players poll
+    /sessions/{sid} and /players/{pid}/next-batch until status is 'active'.
     """
     sess = S.get_session(session_id)
     if not sess:
@@ -162,23 +300,17 @@ def api_start(session_id: str) -> Dict[str, Any]:
     min_budget = int(sess["min_budget"])
     total_needed = min_budget * len(players)
 
+    if len(S.get_session_pool(session_id)) >= total_needed:
+        try:
+            S.start_session(session_id)
+            publish(session_id, "status")
+            return {"ok": True, "status": "active"}
+        except ValueError:
+            pass
+
     def _worker() -> None:
         try:
-            pool = S.get_session_pool(session_id)
-            if len(pool) < total_needed:
-                items = backend_sample_labeling(total_needed)
-                samples = [
-                    {
-                        "sample_id": str(it.get("id")),
-                        "dataset": it.get("selected_dataset") or it.get("dataset") or "Demo",
-                        "table": it.get("table"),
-                        "row": int(it.get("row", 0)),
-                        "col": it.get("col"),
-                        "val": it.get("val"),
-                    }
-                    for it in items
-                ]
-                S.save_session_pool(session_id, samples)
+            _ensure_pool(session_id, total_needed)
             S.start_session(session_id)
         except Exception:
             # On failure, reset back to lobby so host can retry
@@ -186,28 +318,108 @@ def api_start(session_id: str) -> Dict[str, Any]:
                 S.set_status(session_id, "lobby")
             except Exception:
                 pass
+        publish(session_id, "status")
 
     # Flip to preparing and spawn background worker
     S.set_status(session_id, "preparing")
+    publish(session_id, "status")
     t = threading.Thread(target=_worker, name=f"mp-prepare-{session_id}", daemon=True)
     t.start()
     return {"ok": True, "status": "preparing"}
 
 
 @app.get("/api/sessions/{session_id}/players/{player_id}/next-batch")
-def api_next_batch(session_id: str, player_id: str) -> Dict[str, Any]:
-    items = S.get_player_batch(session_id, player_id)
+def api_next_batch(session_id: str, player_id: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Lease the player's next items (see sessions.get_player_batch)."""
+    _flush_labels()
+    items = S.get_player_batch(session_id, player_id, limit=limit)
     if items is None:
         raise HTTPException(status_code=404, detail="not found")
     last_index = S.count_player_labels(session_id, player_id)
+    if items:
+        publish(session_id, "progress")
     return {"items": items, "last_index": int(last_index)}
 
 
+# Responses to recent label posts by Idempotency-Key, so a client retrying a
+# batch whose response it lost gets the same answer instead of re-applying it.
+# A key being applied maps to an Event that is set once its response is known.
+_IDEMPOTENT: "OrderedDict[tuple, Union[Dict[str, Any], threading.Event]]" = OrderedDict()
+_IDEMPOTENT_LOCK = threading.Lock()
+_IDEMPOTENT_WAIT_S = 30.0
+
+
+def _idempotency_capacity() -> int:
+    try:
+        return max(0, int(os.environ.get("MP_IDEMPOTENCY_KEYS", "10000")))
+    except ValueError:
+        return 10000
+
+
+def _reserve_idempotency_key(key: tuple) -> Optional[Dict[str, Any]]:
+    """Claim `key` for this request; returns the stored response if it was already applied."""
+    while True:
+        with _IDEMPOTENT_LOCK:
+            entry = _IDEMPOTENT.get(key)
+            if entry is None:
+                _IDEMPOTENT[key] = threading.Event()
+                return None
+            if not isinstance(entry, threading.Event):
+                return entry
+        # A retry racing the original request: wait for its outcome. If it
+        # failed the key is released and this request claims it.
+        if not entry.wait(_IDEMPOTENT_WAIT_S):
+            raise HTTPException(status_code=409, detail="a request with this Idempotency-Key is in progress")
+
+
+def _release_idempotency_key(key: tuple, result: Optional[Dict[str, Any]]) -> None:
+    """Store the response for `key` (or forget the key if the request failed) and wake waiters."""
+    capacity = _idempotency_capacity()
+    with _IDEMPOTENT_LOCK:
+        marker = _IDEMPOTENT.pop(key, None)
+        if result is not None:
+            _IDEMPOTENT[key] = result
+            while len(_IDEMPOTENT) > capacity:
+                _IDEMPOTENT.popitem(last=False)
+    if isinstance(marker, threading.Event):
+        marker.set()
+
+
 @app.post("/api/sessions/{session_id}/players/{player_id}/labels")
-def api_labels(session_id: str, player_id: str, body: List[LabelsBodyItem]) -> Dict[str, Any]:
-    items = [i.dict() for i in body]
-    saved = S.upsert_labels(session_id, player_id, items)
-    return {"saved": saved}
+def api_labels(
+    session_id: str,
+    player_id: str,
+    body: List[LabelsBodyItem],
+    idempotency_key: Optional[str] = Header(None),
+) -> Dict[str, Any]:
+    """Save a batch of labels.
+
+    With an ``Idempotency-Key`` header, a repeated request with the same key
+    returns the first response without applying the batch again; otherwise a
+    late retry could overwrite a label the player changed in the meantime.
+    The last ``MP_IDEMPOTENCY_KEYS`` (default 10000) keys are remembered.
+    The key is reserved before the batch is applied, so a retry arriving while
+    the original is still running waits for it instead of applying it twice.
+    """
+    key = (session_id, player_id, idempotency_key) if idempotency_key else None
+    if key is not None:
+        stored = _reserve_idempotency_key(key)
+        if stored is not None:
+            return {**stored, "replayed": True}
+    result: Optional[Dict[str, Any]] = None
+    try:
+        items = [i.dict() for i in body]
+        if _ingest_enabled():
+            # Acknowledged once journaled; committed with other players' labels
+            saved = get_ingest_queue().submit(session_id, player_id, items)
+        else:
+            saved = S.upsert_labels(session_id, player_id, items)
+        result = {"saved": saved}
+    finally:
+        if key is not None:
+            _release_idempotency_key(key, result)
+    publish(session_id, "progress")
+    return result
 
 
 @app.get("/api/sessions/{session_id}/progress")
@@ -215,9 +427,77 @@ def api_progress(session_id: str) -> Dict[str, Any]:
     return S.progress(session_id)
 
 
+def _events_setting(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _session_snapshot(session_id: str) -> Optional[Dict[str, Any]]:
+    """What subscribers render: status, players and progress (None if the session is gone)."""
+    _flush_labels()
+    try:
+        return S.progress(session_id)
+    except ValueError:
+        return None
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@app.get("/api/sessions/{session_id}/events")
+async def api_session_events(session_id: str, request: Request) -> StreamingResponse:
+    """Server-sent events for one session.
+
+    Sends a ``session`` event with the progress snapshot (status, players and
+    label counts) on connect and whenever it changes, so lobby, labeling and
+    progress pages no longer poll. Changes arriving within
+    ``MP_EVENTS_MIN_INTERVAL_S`` (default 0.5) are coalesced into one event; a
+    comment line is sent every ``MP_EVENTS_HEARTBEAT_S`` (default 15) to keep
+    proxies from closing an idle stream. The stream ends after the session
+    completes.
+    """
+    if await run_in_threadpool(S.get_session, session_id) is None:
+        raise HTTPException(status_code=404, detail="session not found")
+    bus = get_session_events()
+    min_interval = _events_setting("MP_EVENTS_MIN_INTERVAL_S", 0.5)
+    heartbeat = _events_setting("MP_EVENTS_HEARTBEAT_S", 15)
+
+    async def _stream():
+        yield "retry: 2000\n\n"
+        last: Optional[Dict[str, Any]] = None
+        while not await request.is_disconnected():
+            version = bus.version(session_id)
+            snapshot = await run_in_threadpool(_session_snapshot, session_id)
+            if snapshot is None:
+                yield _sse("gone", {"session_id": session_id}, version)
+                return
+            if snapshot != last:
+                last = snapshot
+                kind = bus.last_kind(session_id)
+                yield _sse("session", {"session_id": session_id, "version": version, "kind": kind, **snapshot}, version)
+            if snapshot["status"] == "completed":
+                return
+            if await bus.wait_async(session_id, version, heartbeat) == version:
+                yield ": keep-alive\n\n"
+                continue
+            # Coalesce bursts (every saved label publishes)
+            await asyncio.sleep(min_interval)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/sessions/{session_id}/next")
 def api_next(session_id: str) -> Dict[str, Any]:
     # If all labelers are done, export merged labels atomically
+    _flush_labels()
     meta = S.progress(session_id)
     exported = False
     if meta.get("all_done"):
@@ -227,20 +507,62 @@ def api_next(session_id: str) -> Dict[str, Any]:
         except Exception:
             exported = False
     S.complete_session(session_id)
+    publish(session_id, "status")
     return {"ok": True, "exported": exported}
 
 
-def _export_session_labels(session_id: str) -> str:
-    """Write merged labels to pipelines/ as JSON via atomic replace."""
-    labels = S.merged_labels(session_id)
-    root = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pipelines")
+def _export_format() -> str:
+    """MP_EXPORT_FORMAT=parquet writes Parquet; anything else NDJSON."""
+    return "parquet" if os.environ.get("MP_EXPORT_FORMAT", "ndjson").strip().lower() == "parquet" else "ndjson"
+
+
+def _export_session_labels(session_id: str, chunk_size: int = S.WRITE_CHUNK) -> str:
+    """Stream merged labels to pipelines/ (one record per sample) via atomic replace.
+
+    Rows are written `chunk_size` at a time, so large sessions export in
+    constant memory. MP_EXPORT_DIR overrides the target folder.
+    """
+    fmt = _export_format()
+    root = os.environ.get("MP_EXPORT_DIR") or os.path.join(os.path.dirname(os.path.dirname(__file__)), "pipelines")
     os.makedirs(root, exist_ok=True)
-    out_path = os.path.join(root, f"multiplayer_labels_{session_id}.json")
+    out_path = os.path.join(root, f"multiplayer_labels_{session_id}.{fmt}")
     tmp_path = out_path + ".tmp"
-    payload = {"session_id": session_id, "labels": labels}
-    with open(tmp_path, "w", encoding="utf-8") as f:
+    labels = S.iter_merged_labels(session_id, chunk_size)
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema(
+            [
+                ("session_id", pa.string()),
+                ("sample_id", pa.string()),
+                ("dataset", pa.string()),
+                ("table", pa.string()),
+                ("row", pa.int64()),
+                ("col", pa.string()),
+                ("val", pa.string()),
+                ("label_value", pa.string()),
+            ]
+        )
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            while True:
+                chunk = list(islice(labels, chunk_size))
+                if not chunk:
+                    break
+                for rec in chunk:
+                    rec["session_id"] = session_id
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+    else:
         import json as _json
-        _json.dump(payload, f, indent=2, ensure_ascii=False)
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            while True:
+                chunk = list(islice(labels, chunk_size))
+                if not chunk:
+                    break
+                f.writelines(
+                    _json.dumps({"session_id": session_id, **rec}, ensure_ascii=False) + "\n" for rec in chunk
+                )
     os.replace(tmp_path, out_path)
     return out_path
 
@@ -0,0 +1,209 @@
+"""
+Asynchronous, buffered JSONL audit logs with size/time rotation.
+
+Callers enqueue records and return immediately; a single background thread
+per log file batches records, appends them in one write, and rotates the file
+once it grows past ``max_bytes`` or gets older than ``max_age``. Rotated files
+are gzip-compressed and only the newest ``backup_count`` archives are kept.
+
+Verbosity for the sampling log is read from ``SAMPLING_AUDIT_LEVEL``:
+``off`` (nothing), ``summary`` (one record per sampling call with counts,
+strategies, seed and the selected candidate indices; default) or ``items``
+(one record per sampled cell).
+"""
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+LEVEL_OFF = "off"
+LEVEL_SUMMARY = "summary"
+LEVEL_ITEMS = "items"
+
+
+def audit_level() -> str:
+    level = os.environ.get("SAMPLING_AUDIT_LEVEL", LEVEL_SUMMARY).strip().lower()
+    return level if level in (LEVEL_OFF, LEVEL_SUMMARY, LEVEL_ITEMS) else LEVEL_SUMMARY
+
+
+class AuditLog:
+    """Background writer for one JSONL file.
+
+    Args:
+        path: Target ``.jsonl`` file; parent folders are created on first write.
+        max_bytes: Rotate once the active file reaches this size.
+        max_age: Rotate once the active file is older than this many seconds.
+        backup_count: Number of compressed archives to keep.
+        flush_interval: Upper bound in seconds between batched writes.
+        batch_size: Write as soon as this many records are pending.
+        max_queue: Records beyond this many pending are dropped (and counted)
+            rather than blocking the caller.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_age: float = 24 * 3600,
+        backup_count: int = 5,
+        flush_interval: float = 1.0,
+        batch_size: int = 1000,
+        max_queue: int = 100_000,
+    ) -> None:
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.max_age = float(max_age)
+        self.backup_count = int(backup_count)
+        self.flush_interval = float(flush_interval)
+        self.batch_size = int(batch_size)
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._flushed = threading.Condition()
+        self._written = 0
+        self._enqueued = 0
+        self._opened_at: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name=f"audit-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    # ----------------------------
+    # Producer side
+    # ----------------------------
+    def write(self, record: Dict[str, Any]) -> None:
+        """Enqueue one record without blocking."""
+        # Counted under the lock: Streamlit script threads write concurrently
+        with self._flushed:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return
+            self._enqueued += 1
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything enqueued so far is on disk (or timeout)."""
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            # Dropped records were never enqueued, so they do not count here
+            target = self._enqueued
+            while self._written < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # ----------------------------
+    # Writer thread
+    # ----------------------------
+    def _run(self) -> None:
+        while True:
+            batch: List[Dict[str, Any]] = []
+            stop = False
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+                    deadline = time.monotonic() + self.flush_interval
+                    while len(batch) < self.batch_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        item = self._queue.get(timeout=remaining)
+                        if item is None:
+                            stop = True
+                            break
+                        batch.append(item)
+            except queue.Empty:
+                pass
+
+            if batch:
+                self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self._maybe_rotate()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            payload = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(payload)
+            if self._opened_at is None:
+                self._opened_at = time.time()
+        except Exception:
+            # Best-effort logging; never surface I/O errors to callers
+            pass
+        finally:
+            with self._flushed:
+                self._written += len(batch)
+                self._flushed.notify_all()
+
+    def _maybe_rotate(self) -> None:
+        if not os.path.exists(self.path):
+            self._opened_at = None
+            return
+        if self._opened_at is None:
+            self._opened_at = os.path.getmtime(self.path)
+        too_big = os.path.getsize(self.path) >= self.max_bytes
+        too_old = time.time() - self._opened_at >= self.max_age
+        if not (too_big or too_old):
+            return
+
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        rotated = f"{self.path}.{stamp}"
+        os.replace(self.path, rotated)
+        self._opened_at = None
+        with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        self._prune_archives()
+
+    def _prune_archives(self) -> None:
+        folder = os.path.dirname(self.path) or "."
+        prefix = os.path.basename(self.path) + "."
+        archives = sorted(f for f in os.listdir(folder) if f.startswith(prefix) and f.endswith(".gz"))
+        for name in archives[: max(0, len(archives) - self.backup_count)]:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+_LOGS: Dict[str, AuditLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def get_audit_log(path: str, **kwargs: Any) -> AuditLog:
+    """Return the process-wide AuditLog for `path`, creating it on first use."""
+    path = os.path.abspath(path)
+    with _LOGS_LOCK:
+        log = _LOGS.get(path)
+        if log is None:
+            log = AuditLog(path, **kwargs)
+            _LOGS[path] = log
+        return log
+
+
+@atexit.register
+def _flush_all() -> None:
+    for log in list(_LOGS.values()):
+        log.flush(timeout=2.0)
@@ -1,12 +1,18 @@
-import json
 import os
 import random
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import logging
 
+import numpy as np
 import streamlit as st
+from .active_learning import SCORE_FUNCTIONS, ActiveLearner
+from .audit_log import LEVEL_ITEMS, LEVEL_OFF, audit_level, get_audit_log
 from .domain_folding import load_from_cache, matelda_domain_folding, save_to_cache
+from .pipeline_store import get_pipeline_store, load_config
+from .propagation import IncrementalPropagator, propagate_labels
+from .results_store import error_facets, query_errors, run_arrays_from_config
+from .sampling import SAMPLING_STRATEGIES, cell_feature_matrix, select_cells
 
 # Module logger for sampling/backend messages
 logger = logging.getLogger("sampling")
@@ -15,22 +21,12 @@ if not logger.handlers:
     _formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
     _handler.setFormatter(_formatter)
     logger.addHandler(_handler)
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get("SAMPLING_LOG_LEVEL", "INFO").upper())
 
 
 def get_available_strategies() -> List[str]:
-    """Return a mock list of available error detection strategies.
-
-    This is a placeholder and should be replaced with a real discovery
-    mechanism once strategies are implemented.
-    """
-    return [
-        "Uncertainty Sampling",
-        "Diversity Sampling",
-        "Core-Set Selection",
-        "Margin Confidence",
-        "Entropy Ranking",
-    ]
+    """Return the names of the sampling strategies implemented in backend.sampling."""
+    return list(SAMPLING_STRATEGIES)
 
 
 def backend_dbf(dataset: str, labeling_budget: int) -> dict:
@@ -221,54 +217,14 @@ def backend_qbf(
     return cell_folds
 
 
-def backend_sample_labeling(
+def _collect_candidate_cells(
     selected_dataset: str,
     labeling_budget: int,
     cell_folds: Dict[str, Dict[str, List[Dict[str, Any]]]],
     domain_folds: Dict[str, List[str]],
+    rng: random.Random,
 ) -> List[Dict[str, Any]]:
-    """
-    Backend function that samples cells for labeling.
-    This is a dummy implementation that will be replaced with actual logic in the future.
-
-    Args:
-        selected_dataset (str): Name of the dataset to process
-        labeling_budget (int): Number of cells to sample for labeling
-        cell_folds (Dict[str, Dict[str, List[Dict[str, Any]]]]): Cell folds from quality-based folding
-        domain_folds (Dict[str, List[str]]): Domain folds mapping
-
-    Returns:
-        List[Dict[str, Any]]: List of sampled cells in the format:
-        [
-            {
-                "id": 1,
-                "name": "Domain Fold 1 / Cell Fold 1 - Table1",
-                "table": "Table1",
-                "row": 42,
-                "col": "name",
-                "val": "Example",
-                "domain_fold": "Domain Fold 1",
-                "cell_fold": "Domain Fold 1 / Cell Fold 1",
-                "cell_fold_label": "correct"|"false"|"neutral",  # Label from bulk annotation
-                "strategies": {
-                    "strategy01": true,
-                    "strategy02": false,
-                    ...
-                }
-            },
-            ...
-        ]
-    """
-    # Log invocation similar to pages/Labeling.py style
-    try:
-        logger.info(
-            "Sampling cells via backend_sample_labeling (dataset=%s, budget=%s)",
-            selected_dataset,
-            labeling_budget,
-        )
-    except Exception:
-        pass
-
+    """Flatten cell folds into candidate cells, padding with random table cells up to the budget."""
     # Get the actual tables from the dataset directory
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.dirname(current_dir)  # Go up one level since we're in backend/ folder
@@ -277,23 +233,21 @@ def backend_sample_labeling(
     def generate_strategies():
         """Helper function to generate exactly 8 strategies"""
         return {
-            f"strategy{i:02d}": random.choice([True, False])
+            f"strategy{i:02d}": rng.choice([True, False])
             for i in range(1, 9)  # Generate strategies 01-08
         }
 
     # Load cell fold labels from configurations.json
-    config_path = os.path.join(
+    pipeline_dir = os.path.join(
         root_dir,
         "pipelines",
         os.path.basename(os.path.dirname(datasets_path)),
-        "configurations.json",
     )
     cell_fold_labels = {}
-    if os.path.exists(config_path):
+    store = get_pipeline_store(pipeline_dir)
+    if store.exists():
         try:
-            with open(config_path, "r") as f:
-                config = json.load(f)
-                cell_fold_labels = config.get("cell_fold_labels", {})
+            cell_fold_labels = store.get("cell_fold_labels", {})
         except Exception as e:
             print(f"Error loading cell fold labels: {e}")
 
@@ -307,9 +261,9 @@ def backend_sample_labeling(
             for cell in cells:
                 # If cell has strategies, ensure it has exactly 8
                 existing_strategies = cell.get("strategies", {})
-                strategies = {
+                cell_strategies = {
                     f"strategy{i:02d}": existing_strategies.get(
-                        f"strategy{i:02d}", random.choice([True, False])
+                        f"strategy{i:02d}", rng.choice([True, False])
                     )
                     for i in range(1, 9)
                 }
@@ -322,7 +276,7 @@ def backend_sample_labeling(
                     "domain_fold": domain_fold,
                     "cell_fold": cell_fold_name,
                     "cell_fold_label": cell_fold_label,  # Include the cell fold label
-                    "strategies": strategies,
+                    "strategies": cell_strategies,
                 }
                 all_cells.append(cell_info)
 
@@ -346,7 +300,7 @@ def backend_sample_labeling(
 
         # Generate additional random cells
         while len(all_cells) < labeling_budget:
-            table = random.choice(all_tables)
+            table = rng.choice(all_tables)
             try:
                 # Read the CSV file
                 table_path = os.path.join(datasets_path, table, "clean.csv")
@@ -354,8 +308,8 @@ def backend_sample_labeling(
                     header = f.readline().strip().split(",")
                     lines = f.readlines()
                     if lines:
-                        row = random.randint(0, len(lines) - 1)
-                        col = random.choice(header)
+                        row = rng.randint(0, len(lines) - 1)
+                        col = rng.choice(header)
                         values = lines[row].strip().split(",")
                         col_idx = header.index(col)
                         if col_idx < len(values):
@@ -384,56 +338,151 @@ def backend_sample_labeling(
                 print(f"Error processing table {table}: {e}")
                 continue
 
-    # Randomly sample labeling_budget cells
-    sampled_cells = random.sample(all_cells, min(labeling_budget, len(all_cells)))
+    return all_cells
 
-    # Format the output
-    results: List[Dict[str, Any]] = [
-        {
-            "id": i,
-            "name": f"{cell['domain_fold']} – {cell['table']}",
-            "table": cell["table"],
-            "row": cell["row"],
-            "col": cell["col"],
-            "val": cell["val"],
-            "domain_fold": cell["domain_fold"],
-            "cell_fold": cell["cell_fold"],
-            "cell_fold_label": cell["cell_fold_label"],
-            "strategies": cell["strategies"],
-        }
-        for i, cell in enumerate(sampled_cells)
-    ]
 
-    # Append sampling log for observability (JSONL)
-    try:
-        # logs/sampling/<dataset>.jsonl under project root
-        logs_root = os.path.join(root_dir, "logs", "sampling")
-        os.makedirs(logs_root, exist_ok=True)
-        log_path = os.path.join(logs_root, f"{selected_dataset}.jsonl")
-        ts = datetime.utcnow().isoformat(timespec="seconds") + "Z"
-        with open(log_path, "a", encoding="utf-8") as f:
-            for item in results:
-                record = {
-                    "ts": ts,
-                    "dataset": selected_dataset,
-                    "budget": int(labeling_budget),
-                    "item": item,
+def _format_sampled_cell(i: int, cell: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": i,
+        "name": f"{cell['domain_fold']} – {cell['table']}",
+        "table": cell["table"],
+        "row": cell["row"],
+        "col": cell["col"],
+        "val": cell["val"],
+        "domain_fold": cell["domain_fold"],
+        "cell_fold": cell["cell_fold"],
+        "cell_fold_label": cell["cell_fold_label"],
+        "strategies": cell["strategies"],
+    }
+
+
+def backend_sample_labeling(
+    selected_dataset: str,
+    labeling_budget: int,
+    cell_folds: Dict[str, Dict[str, List[Dict[str, Any]]]],
+    domain_folds: Dict[str, List[str]],
+    strategies: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+    learner: Optional[ActiveLearner] = None,
+    labels: Optional[Dict[int, bool]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Backend function that samples cells for labeling.
+
+    Candidate cells are turned into a feature matrix and handed to the
+    selected strategies from backend.sampling; without strategies the
+    sample is drawn uniformly at random.
+
+    Args:
+        selected_dataset (str): Name of the dataset to process
+        labeling_budget (int): Number of cells to sample for labeling
+        cell_folds (Dict[str, Dict[str, List[Dict[str, Any]]]]): Cell folds from quality-based folding
+        domain_folds (Dict[str, List[str]]): Domain folds mapping
+        strategies (Optional[List[str]]): Sampling strategies (see get_available_strategies);
+            the budget is split evenly across them
+        seed (Optional[int]): Seed for all random choices; the same inputs and seed
+            reproduce the same sample
+        learner (Optional[ActiveLearner]): Active-learning mode (see backend_active_learning).
+            The learner is first updated with `labels`, then the next batch of at most
+            learner.batch_size cells is returned, never exceeding labeling_budget in total.
+        labels (Optional[Dict[int, bool]]): New labels for learner mode, keyed by the
+            cell "id" of earlier batches; True marks an error
+
+    Returns:
+        List[Dict[str, Any]]: List of sampled cells in the format:
+        [
+            {
+                "id": 1,
+                "name": "Domain Fold 1 / Cell Fold 1 - Table1",
+                "table": "Table1",
+                "row": 42,
+                "col": "name",
+                "val": "Example",
+                "domain_fold": "Domain Fold 1",
+                "cell_fold": "Domain Fold 1 / Cell Fold 1",
+                "cell_fold_label": "correct"|"false"|"neutral",  # Label from bulk annotation
+                "strategies": {
+                    "strategy01": true,
+                    "strategy02": false,
+                    ...
                 }
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
-    except Exception:
-        # Best-effort logging; ignore failures
-        pass
+            },
+            ...
+        ]
+    """
+    if learner is not None:
+        learner.update(labels or {})
+        batch = learner.next_batch(max(0, min(learner.batch_size, int(labeling_budget) - learner.n_served)))
+        return [_format_sampled_cell(cell["id"], cell) for cell in batch]
 
-    # Also emit structured logs of all sampled cells to console
+    # Log invocation similar to pages/Labeling.py style
     try:
         logger.info(
-            "Sampling summary (dataset=%s, budget=%s, sampled=%s)",
+            "Sampling cells via backend_sample_labeling (dataset=%s, budget=%s)",
             selected_dataset,
             labeling_budget,
-            len(results),
         )
+    except Exception:
+        pass
+
+    rng = random.Random(seed)
+
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    all_cells = _collect_candidate_cells(selected_dataset, labeling_budget, cell_folds, domain_folds, rng)
+
+    # Select labeling_budget cells with the requested strategies (uniform random if none)
+    if strategies and all_cells:
+        picked = [
+            int(i)
+            for i in select_cells(
+                strategies,
+                cell_feature_matrix(all_cells),
+                labeling_budget,
+                np.random.default_rng(seed),
+            )
+        ]
+    else:
+        picked = rng.sample(range(len(all_cells)), min(labeling_budget, len(all_cells)))
+    sampled_cells = [all_cells[i] for i in picked]
+
+    # Format the output
+    results: List[Dict[str, Any]] = [_format_sampled_cell(i, cell) for i, cell in enumerate(sampled_cells)]
+
+    # Sampling audit trail: enqueued to a background writer (logs/sampling/<dataset>.jsonl)
+    level = audit_level()
+    if level != LEVEL_OFF:
+        audit = get_audit_log(os.path.join(root_dir, "logs", "sampling", f"{selected_dataset}.jsonl"))
+        ts = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+        if level == LEVEL_ITEMS:
+            audit.write_many(
+                {"ts": ts, "dataset": selected_dataset, "budget": int(labeling_budget), "item": item}
+                for item in results
+            )
+        else:
+            audit.write(
+                {
+                    "ts": ts,
+                    "dataset": selected_dataset,
+                    "budget": int(labeling_budget),
+                    "strategies": list(strategies or []),
+                    "seed": seed,
+                    "candidates": len(all_cells),
+                    "sampled": len(results),
+                    # Candidate indices; the seed and inputs reproduce the cells themselves
+                    "selected": picked,
+                }
+            )
+
+    logger.info(
+        "Sampling summary (dataset=%s, budget=%s, sampled=%s)",
+        selected_dataset,
+        labeling_budget,
+        len(results),
+    )
+    # Per-cell console lines only when debugging; large budgets would flood the log
+    if logger.isEnabledFor(logging.DEBUG):
         for it in results:
-            logger.info(
+            logger.debug(
                 "Sampled id=%s table=%s row=%s col=%s val=%s domain_fold=%s cell_fold=%s",
                 it.get("id"),
                 it.get("table"),
@@ -443,18 +492,54 @@ def backend_sample_labeling(
                 it.get("domain_fold"),
                 it.get("cell_fold"),
             )
-    except Exception:
-        pass
 
     return results
 
 
+def backend_active_learning(
+    selected_dataset: str,
+    labeling_budget: int,
+    cell_folds: Dict[str, Dict[str, List[Dict[str, Any]]]],
+    domain_folds: Dict[str, List[str]],
+    strategies: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+    batch_size: int = 10,
+) -> ActiveLearner:
+    """
+    Create an active-learning session over the candidates backend_sample_labeling draws from.
+
+    Pass the returned learner to backend_sample_labeling(..., learner=..., labels=...) to
+    get one batch at a time; labels from each batch update the per-cell-fold models
+    before the next batch is chosen.
+
+    Args:
+        selected_dataset (str): Name of the dataset to process
+        labeling_budget (int): Total number of cells to serve across all batches
+        cell_folds (Dict[str, Dict[str, List[Dict[str, Any]]]]): Cell folds from quality-based folding
+        domain_folds (Dict[str, List[str]]): Domain folds mapping
+        strategies (Optional[List[str]]): The first score based strategy is used for ranking
+            (Uncertainty Sampling if none applies)
+        seed (Optional[int]): Seed for candidate padding, tie-breaking and model initialisation
+        batch_size (int): Cells served per batch
+
+    Returns:
+        ActiveLearner: Learner holding the candidates and per-fold models
+    """
+    rng = random.Random(seed)
+    all_cells = _collect_candidate_cells(selected_dataset, labeling_budget, cell_folds, domain_folds, rng)
+    strategy = next((s for s in (strategies or []) if s in SCORE_FUNCTIONS), "Uncertainty Sampling")
+    return ActiveLearner(all_cells, strategy=strategy, batch_size=batch_size, seed=seed)
+
+
 def backend_label_propagation(
-    selected_dataset: str, labeled_cells: List[Dict[str, Any]]
+    selected_dataset: str,
+    labeled_cells: List[Dict[str, Any]],
+    propagator: Optional[IncrementalPropagator] = None,
 ) -> Dict[str, Any]:
     """
     Backend function that propagates errors based on labeled cells.
-    This is a dummy implementation that will be replaced with actual logic in the future.
+    Labels are spread over a sparse k-NN graph of cell value features built
+    per cell fold (see backend.propagation); each table is read once.
 
     Args:
         selected_dataset (str): Name of the dataset to process
@@ -470,6 +555,9 @@ def backend_label_propagation(
                 "cell_fold": str,
                 "cell_fold_label": str  # "correct", "false", or "neutral"
             }
+        propagator (IncrementalPropagator, optional): Live propagator (see
+            backend_incremental_propagation). When given, only the labels that
+            differ from its current state are propagated.
 
     Returns:
         Dict[str, Any]: Dictionary containing propagated errors and their sources:
@@ -502,74 +590,52 @@ def backend_label_propagation(
     root_dir = os.path.dirname(current_dir)  # Go up one level since we're in backend/ folder
     datasets_path = os.path.join(root_dir, "datasets", selected_dataset)
 
-    # Initialize results structure
-    labeled_cells_with_propagation = []
+    if propagator is not None:
+        propagator.sync(labeled_cells, limit=0)
+        return {"labeled_cells": propagator.labeled_cells()}
 
-    # For each labeled cell, generate some random propagated cells
-    for labeled_cell in labeled_cells:
-        table = labeled_cell["table"]
-        try:
-            # Read the CSV file
-            table_path = os.path.join(datasets_path, table, "clean.csv")
-            with open(table_path, "r") as f:
-                header = f.readline().strip().split(",")
-                lines = f.readlines()
-
-                # Generate 2-4 random propagated cells for this labeled cell
-                num_propagated = random.randint(2, 4)
-                propagated_cells = []
-
-                for _ in range(num_propagated):
-                    if lines:
-                        row = random.randint(0, len(lines) - 1)
-                        col = random.choice(header)
-                        values = lines[row].strip().split(",")
-                        col_idx = header.index(col)
-                        if col_idx < len(values):
-                            val = values[col_idx]
-                            propagated = {
-                                "table": table,
-                                "row": row,
-                                "col": col,
-                                "val": val,
-                                "confidence": round(
-                                    random.uniform(0.6, 0.95), 2
-                                ),  # Random confidence score
-                                "reason": random.choice(
-                                    [
-                                        "Similar value pattern",
-                                        "Same column characteristics",
-                                        "Domain similarity",
-                                        "Statistical correlation",
-                                    ]
-                                ),
-                            }
-                            propagated_cells.append(propagated)
+    labeled_cells_with_propagation = propagate_labels(datasets_path, labeled_cells)
+    return {"labeled_cells": labeled_cells_with_propagation}
 
-                labeled_cells_with_propagation.append(
-                    {
-                        **labeled_cell,  # Include all original labeled cell info
-                        "propagated_cells": propagated_cells,
-                    }
-                )
 
-        except Exception as e:
-            print(f"Error processing table {table}: {e}")
-            continue
+def backend_incremental_propagation(selected_dataset: str) -> IncrementalPropagator:
+    """
+    Create a propagator that absorbs labels one delta at a time.
 
-    return {"labeled_cells": labeled_cells_with_propagation}
+    Call ``update([...labeled cells...])`` after each swipe to get the cells
+    whose error confidence changed, and ``labeled_cells()`` for results in
+    the backend_label_propagation shape.
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    root_dir = os.path.dirname(current_dir)
+    return IncrementalPropagator(os.path.join(root_dir, "datasets", selected_dataset))
 
 
-def backend_pull_errors(selected_dataset: str) -> Dict[str, Any]:
+def backend_pull_errors(
+    selected_dataset: str,
+    tables: Optional[List[str]] = None,
+    cols: Optional[List[str]] = None,
+    sources: Optional[List[str]] = None,
+    min_confidence: float = 0.0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Backend function that retrieves all detected errors from the configurations.json file.
-    This is a dummy implementation that will be replaced with actual logic in the future.
+    Backend function that retrieves detected errors of the latest propagation run.
+
+    Errors are read from the run's indexed results file (see
+    backend.results_store), filtered, and returned most confident first.
 
     Args:
         selected_dataset (str): Name of the dataset to process
+        tables, cols, sources (List[str], optional): Only return errors in
+            these tables / columns / with these sources.
+        min_confidence (float): Only return errors at or above this confidence.
+        limit (int, optional): Page size; ``None`` returns every match.
+        cursor (str, optional): ``next_cursor`` of the previous page.
 
     Returns:
-        Dict[str, Any]: Dictionary containing all detected errors and metrics:
+        Dict[str, Any]: Dictionary containing the page of errors and metrics:
         {
             "propagated_errors": {
                 "table1": [
@@ -590,57 +656,63 @@ def backend_pull_errors(selected_dataset: str) -> Dict[str, Any]:
                 "recall": float,
                 "f1": float,
                 "fold_label_influence": float  # measure of how cell fold labels influenced the results
-            }
+            },
+            "total": int,  # number of errors matching the filters
+            "next_cursor": str or None,  # pass back to get the next page
+            "facets": {"tables": {table: count}, "cols": [...], "sources": [...]}
         }
     """
-    # Get the actual tables from the dataset directory
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    root_dir = os.path.dirname(current_dir)  # Go up one level since we're in backend/ folder
+    empty = {
+        "propagated_errors": {},
+        "metrics": {
+            "precision": 0.0,
+            "recall": 0.0,
+            "f1": 0.0,
+            "fold_label_influence": 0.0,
+        },
+        "total": 0,
+        "next_cursor": None,
+        "facets": {"tables": {}, "cols": [], "sources": []},
+    }
 
     # Get the pipeline path from session state
     if "pipeline_path" not in st.session_state:
         print("No pipeline path in session state")
-        return {
-            "propagated_errors": {},
-            "metrics": {
-                "precision": 0.0,
-                "recall": 0.0,
-                "f1": 0.0,
-                "fold_label_influence": 0.0,
-            },
-        }
-
-    config_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
+        return empty
 
     try:
-        with open(config_path, "r") as f:
-            config = json.load(f)
-
-        # Get the propagated errors from the config
-        propagated_errors = config.get("propagated_errors", {})
+        config = load_config(st.session_state.pipeline_path)
 
         # Get the metrics from the latest result
         results = config.get("results", [])
-        if results:
-            metrics = results[-1].get("metrics", {})
-        else:
-            metrics = {
-                "precision": 0.0,
-                "recall": 0.0,
-                "f1": 0.0,
-                "fold_label_influence": 0.0,
-            }
+        metrics = results[-1].get("metrics", {}) if results else empty["metrics"]
+
+        # Errors of the latest run (results store or legacy config)
+        arrays = run_arrays_from_config(st.session_state.pipeline_path, config)
+        if arrays is None:
+            return {**empty, "metrics": metrics}
+
+        page = query_errors(
+            arrays,
+            tables=tables,
+            cols=cols,
+            sources=sources,
+            min_confidence=min_confidence,
+            limit=arrays["row"].shape[0] if limit is None else limit,
+            cursor=cursor,
+        )
+        propagated_errors: Dict[str, List[Dict[str, Any]]] = {}
+        for error in page["errors"]:
+            propagated_errors.setdefault(error.pop("table"), []).append(error)
 
-        return {"propagated_errors": propagated_errors, "metrics": metrics}
+        return {
+            "propagated_errors": propagated_errors,
+            "metrics": metrics,
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "facets": error_facets(arrays),
+        }
 
     except Exception as e:
         print(f"Error loading configuration: {e}")
-        return {
-            "propagated_errors": {},
-            "metrics": {
-                "precision": 0.0,
-                "recall": 0.0,
-                "f1": 0.0,
-                "fold_label_influence": 0.0,
-            },
-        }
+        return empty
@@ -0,0 +1,100 @@
+"""
+In-process change notifications for multiplayer sessions.
+
+API handlers call ``publish(session_id, kind)`` after they change a session
+(a player joined or finished, the status changed, labels were saved). Each
+publish bumps a per-session version number and wakes that session's
+subscribers: threads blocked in ``wait()`` and asyncio tasks (the SSE
+endpoint) blocked in ``wait_async()``. Subscribers then read the current
+state themselves, so a burst of publishes costs each of them one read.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+_AsyncWaiter = Tuple[asyncio.AbstractEventLoop, asyncio.Event]
+
+
+class SessionEvents:
+    """Per-session version counters with blocking and asyncio waiters."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._versions: Dict[str, int] = {}
+        self._last_kind: Dict[str, str] = {}
+        self._waiters: Dict[str, Set[_AsyncWaiter]] = {}
+        self.published = 0
+
+    def version(self, session_id: str) -> int:
+        with self._cond:
+            return self._versions.get(session_id, 0)
+
+    def last_kind(self, session_id: str) -> Optional[str]:
+        with self._cond:
+            return self._last_kind.get(session_id)
+
+    def publish(self, session_id: str, kind: str) -> int:
+        """Record a change of `session_id`; returns the new version."""
+        with self._cond:
+            version = self._versions.get(session_id, 0) + 1
+            self._versions[session_id] = version
+            self._last_kind[session_id] = kind
+            self.published += 1
+            waiters = list(self._waiters.get(session_id, ()))
+            self._cond.notify_all()
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed; its waiter is gone
+                pass
+        return version
+
+    def wait(self, session_id: str, since: int, timeout: float) -> int:
+        """Block until the version differs from `since` or `timeout` passes; returns the version."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._versions.get(session_id, 0) != since, timeout)
+            return self._versions.get(session_id, 0)
+
+    async def wait_async(self, session_id: str, since: int, timeout: float) -> int:
+        """Asyncio counterpart of wait(); does not hold a thread while waiting."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._cond:
+            if self._versions.get(session_id, 0) != since:
+                return self._versions.get(session_id, 0)
+            self._waiters.setdefault(session_id, set()).add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                waiters = self._waiters.get(session_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[session_id]
+        return self.version(session_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "published": self.published,
+                "sessions": len(self._versions),
+                "subscribers": sum(len(w) for w in self._waiters.values()),
+            }
+
+
+_EVENTS = SessionEvents()
+
+
+def get_session_events() -> SessionEvents:
+    """Return the process-wide event bus."""
+    return _EVENTS
+
+
+def publish(session_id: str, kind: str) -> int:
+    return _EVENTS.publish(session_id, kind)
@@ -0,0 +1,21 @@
+"""
+Stable content fingerprints for pipeline stage outputs.
+
+A fingerprint is computed once when a stage (domain folding, quality-based
+folding, ...) produces or edits its output and is stored next to it. Caches
+further down the pipeline key on the short digest instead of re-hashing the
+nested fold structures on every Streamlit rerun.
+"""
+import hashlib
+import json
+from typing import Any
+
+
+def content_fingerprint(obj: Any) -> str:
+    """Return a SHA1 hex digest of `obj`'s canonical JSON form.
+
+    Keys are sorted so logically equal dicts map to the same fingerprint
+    regardless of insertion order; non-JSON values fall back to ``str``.
+    """
+    payload = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,380 @@
+"""
+Group-commit ingestion of multiplayer labels.
+
+``POST /labels`` hands its batch to a LabelIngestQueue instead of opening its
+own SQLite write transaction. A single writer thread collects whatever has
+arrived within ``max_delay`` seconds (or ``max_batch`` labels), appends it to
+a journal file with one fsync, acknowledges all waiting requests, and then
+commits the whole group to SQLite in one transaction. Concurrent submissions
+therefore share both the fsync and the SQLite write lock.
+
+The journal makes acknowledged labels durable before they reach SQLite: it is
+replayed on startup (label upserts are idempotent). The writer journals and
+commits one group at a time, so after a commit everything journaled is in
+SQLite; the journal is truncated then if the queue has drained or it has
+grown past ``journal_max_bytes``. Readers that need committed state call
+``flush()``.
+
+A group whose commit keeps failing is retried with backoff a limited number
+of times, then appended to a dead-letter file (``<journal>.dead``) so the
+queue behind it keeps moving. Dead letters are retried on every start, before
+the journal; a journal that cannot be replayed is moved to the dead-letter
+file instead of keeping the API from starting. To retry them without a
+restart (e.g. once a full disk or a locked database is fixed), run::
+
+    python -m backend.ingest replay-dead
+
+Settings: ``MP_INGEST_MAX_BATCH`` (labels, default 500),
+``MP_INGEST_MAX_DELAY_MS`` (default 5), ``MP_INGEST_COMMIT_ATTEMPTS``
+(default 8) and ``MP_INGEST_JOURNAL_BYTES`` (default 4 MiB).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .pipeline_store import _FileLock
+
+LabelBatch = Tuple[str, str, List[Dict[str, Any]]]
+
+logger = logging.getLogger("ingest")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class _Pending:
+    __slots__ = ("batch", "acked", "error")
+
+    def __init__(self, batch: LabelBatch) -> None:
+        self.batch = batch
+        self.acked = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class LabelIngestQueue:
+    """Journal-then-group-commit writer for label batches.
+
+    Args:
+        commit: Callable applying a list of (session_id, player_id, labels)
+            batches in one transaction (sessions.upsert_label_batches).
+        journal_path: Append-only JSONL journal used for durability and replay.
+        max_batch: Commit as soon as this many labels are pending.
+        max_delay: Seconds to wait for more submissions after the first one.
+        commit_attempts: Commit tries per group before it is dead-lettered.
+        dead_letter_path: JSONL file receiving groups that could not be
+            committed; defaults to ``journal_path + ".dead"``.
+        journal_max_bytes: Truncate the (fully committed) journal once it is
+            this large even while submissions keep arriving.
+        latency_window: Number of recent commits kept for latency percentiles.
+    """
+
+    def __init__(
+        self,
+        commit: Callable[[List[LabelBatch]], Any],
+        journal_path: str,
+        max_batch: int = 500,
+        max_delay: float = 0.005,
+        commit_attempts: int = 8,
+        dead_letter_path: Optional[str] = None,
+        journal_max_bytes: int = 4 * 1024 * 1024,
+        latency_window: int = 1000,
+    ) -> None:
+        self.commit = commit
+        self.journal_path = journal_path
+        self.dead_letter_path = dead_letter_path or journal_path + ".dead"
+        self.max_batch = int(max_batch)
+        self.max_delay = float(max_delay)
+        self.commit_attempts = max(1, int(commit_attempts))
+        self.journal_max_bytes = int(journal_max_bytes)
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._committed = threading.Condition()
+        self._enqueued = 0
+        self._done = 0
+        self._journal = None
+        self._commit_ms: Deque[float] = deque(maxlen=latency_window)
+        self._ack_ms: Deque[float] = deque(maxlen=latency_window)
+        self.labels_committed = 0
+        self.groups_committed = 0
+        self.commit_errors = 0
+        self.dead_lettered = 0
+        # Set when acknowledged labels are only in the journal (neither in SQLite
+        # nor in the dead-letter file); the journal is then kept for the next start
+        self._journal_pinned = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ----------------------------
+    # Lifecycle
+    # ----------------------------
+    def start(self) -> "LabelIngestQueue":
+        """Replay dead letters and the journal (if any) and start the writer thread."""
+        if self._thread is not None:
+            return self
+        self.replay_dead_letters()
+        replayed = self._read_batches(self.journal_path)
+        if replayed:
+            try:
+                self.commit(replayed)
+            except Exception as e:
+                logger.error("Journal replay failed, moving %d batches to %s: %s", len(replayed), self.dead_letter_path, e)
+                self._journal_pinned = not self._dead_letter(replayed)
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self._journal = open(self.journal_path, "a" if self._journal_pinned else "w", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="mp-ingest", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def replay_dead_letters(self) -> int:
+        """Commit the dead-letter file and remove it; returns the batches applied.
+
+        On failure the file is left as it is and 0 is returned.
+        """
+        # Locked so a running API cannot append between the read and the removal
+        with _FileLock(self.dead_letter_path + ".lock"):
+            batches = self._read_batches(self.dead_letter_path)
+            if not batches:
+                return 0
+            try:
+                self.commit(batches)
+            except Exception as e:
+                logger.error("Replaying %d dead-lettered batches from %s failed: %s", len(batches), self.dead_letter_path, e)
+                return 0
+            try:
+                os.remove(self.dead_letter_path)
+            except OSError:
+                pass
+        logger.info("Replayed %d dead-lettered batches from %s", len(batches), self.dead_letter_path)
+        return len(batches)
+
+    # ----------------------------
+    # Producer side
+    # ----------------------------
+    def submit(self, session_id: str, player_id: str, labels: List[Dict[str, Any]], timeout: float = 10.0) -> int:
+        """Queue labels and block until they are journaled; returns the number accepted."""
+        pending = _Pending((session_id, player_id, list(labels)))
+        t0 = time.perf_counter()
+        with self._committed:
+            self._enqueued += 1
+        self._queue.put(pending)
+        if not pending.acked.wait(timeout):
+            raise TimeoutError("label ingestion timed out")
+        if pending.error is not None:
+            raise pending.error
+        self._ack_ms.append((time.perf_counter() - t0) * 1000)
+        return len(labels)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything submitted so far is committed to SQLite (or timeout)."""
+        deadline = time.monotonic() + timeout
+        with self._committed:
+            target = self._enqueued
+            while self._done < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._committed.wait(remaining)
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        def pct(values: Deque[float], q: float) -> Optional[float]:
+            if not values:
+                return None
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "in_flight": self._enqueued - self._done,
+            "labels_committed": self.labels_committed,
+            "groups_committed": self.groups_committed,
+            "commit_errors": self.commit_errors,
+            "dead_lettered": self.dead_lettered,
+            "commit_ms_p50": pct(self._commit_ms, 0.5),
+            "commit_ms_p95": pct(self._commit_ms, 0.95),
+            "ack_ms_p50": pct(self._ack_ms, 0.5),
+            "ack_ms_p95": pct(self._ack_ms, 0.95),
+        }
+
+    # ----------------------------
+    # Writer thread
+    # ----------------------------
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            group = [item]
+            n_labels = len(item.batch[2])
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while n_labels < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                group.append(item)
+                n_labels += len(item.batch[2])
+
+            self._process(group)
+            if stop:
+                return
+
+    def _process(self, group: List[_Pending]) -> None:
+        try:
+            self._append_journal([p.batch for p in group])
+        except Exception as e:
+            for p in group:
+                p.error = e
+                p.acked.set()
+            self._mark_done(len(group))
+            return
+        for p in group:
+            p.acked.set()
+
+        batches = [p.batch for p in group]
+        delay = 0.01
+        for attempt in range(1, self.commit_attempts + 1):
+            t0 = time.perf_counter()
+            try:
+                self.commit(batches)
+            except Exception as e:
+                self.commit_errors += 1
+                if attempt == self.commit_attempts:
+                    # Labels are acknowledged; park them rather than lose them or stall the queue
+                    logger.error(
+                        "Label group commit failed %d times, moving %d batches to %s: %s",
+                        attempt,
+                        len(batches),
+                        self.dead_letter_path,
+                        e,
+                    )
+                    if not self._dead_letter(batches):
+                        self._journal_pinned = True
+                    break
+                logger.warning("Label group commit failed (attempt %d/%d), retrying: %s", attempt, self.commit_attempts, e)
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+            else:
+                self._commit_ms.append((time.perf_counter() - t0) * 1000)
+                self.groups_committed += 1
+                self.labels_committed += sum(len(b[2]) for b in batches)
+                break
+        # Groups are journaled and committed one at a time, so the whole journal
+        # is now in SQLite (or the dead-letter file)
+        if not self._journal_pinned and (self._queue.empty() or self._journal.tell() >= self.journal_max_bytes):
+            self._journal.seek(0)
+            self._journal.truncate()
+        self._mark_done(len(group))
+
+    def _mark_done(self, n: int) -> None:
+        with self._committed:
+            self._done += n
+            self._committed.notify_all()
+
+    def _append_journal(self, batches: List[LabelBatch]) -> None:
+        self._journal.write("".join(json.dumps(b, ensure_ascii=False) + "\n" for b in batches))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _dead_letter(self, batches: List[LabelBatch]) -> bool:
+        """Append batches to the dead-letter file; False if it could not be written."""
+        try:
+            with _FileLock(self.dead_letter_path + ".lock"), open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(b, ensure_ascii=False) + "\n" for b in batches))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            # The journal still holds them; it is kept and replayed on the next start
+            logger.error("Could not write dead-letter file %s: %s", self.dead_letter_path, e)
+            return False
+        self.dead_lettered += len(batches)
+        return True
+
+    @staticmethod
+    def _read_batches(path: str) -> List[LabelBatch]:
+        batches: List[LabelBatch] = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        sid, pid, labels = json.loads(line)
+                    except ValueError:
+                        # A torn final line was never acknowledged
+                        continue
+                    batches.append((sid, pid, labels))
+        except OSError:
+            pass
+        return batches
+
+
+_QUEUE: Optional[LabelIngestQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_ingest_queue() -> LabelIngestQueue:
+    """Return the process-wide label queue for sessions.DB_PATH, starting it on first use."""
+    global _QUEUE
+    from . import sessions as S
+
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = LabelIngestQueue(
+                S.upsert_label_batches,
+                S.DB_PATH + ".labels-journal",
+                max_batch=int(_env_number("MP_INGEST_MAX_BATCH", 500)),
+                max_delay=_env_number("MP_INGEST_MAX_DELAY_MS", 5) / 1000.0,
+                commit_attempts=int(_env_number("MP_INGEST_COMMIT_ATTEMPTS", 8)),
+                journal_max_bytes=int(_env_number("MP_INGEST_JOURNAL_BYTES", 4 * 1024 * 1024)),
+            ).start()
+        return _QUEUE
+
+
+def shutdown_ingest_queue(timeout: float = 5.0) -> None:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is not None:
+            _QUEUE.close(timeout)
+            _QUEUE = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from . import sessions as S
+
+    parser = argparse.ArgumentParser(description="Multiplayer label ingestion maintenance")
+    parser.add_argument("command", choices=["replay-dead"], help="replay-dead: commit and remove <journal>.dead")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    S.init_db()
+    ingest = LabelIngestQueue(S.upsert_label_batches, S.DB_PATH + ".labels-journal")
+    applied = ingest.replay_dead_letters()
+    print(json.dumps({"replayed_batches": applied, "dead_letter_file": ingest.dead_letter_path}))
+    raise SystemExit(0 if applied or not os.path.exists(ingest.dead_letter_path) else 1)
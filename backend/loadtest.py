@@ -0,0 +1,307 @@
+"""
+Load test for the multiplayer API.
+
+Simulates a full session: the host creates it, N players join, the host
+starts it, every participant leases cells with ``next-batch`` and posts labels
+at a given swipe rate (Poisson arrivals), the host polls progress, and
+finally the session is finished and exported. At the end it prints latency
+percentiles per endpoint, throughput, error rates and the SQLite lock waits
+and ingest stats reported by ``/api/metrics``.
+
+Without ``--url`` a server is started in a subprocess
+(``python -m backend.loadtest serve``). It uses a throwaway database and
+export folder, and a synthetic cell sampler, so the run measures the API and
+SQLite rather than dataset sampling.
+
+    python -m backend.loadtest --players 200 --swipe-rate 2
+    python -m backend.loadtest --url http://127.0.0.1:8000/api --players 50
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ----------------------------
+# Server side
+# ----------------------------
+def _synthetic_sample(total_samples: int, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+    """Stand-in for backend_sample_labeling: the first `total_samples` cells of a fake dataset."""
+    return [
+        {"table": f"table_{i // 1000}", "row": i % 1000, "col": "value", "val": str(i), "selected_dataset": "loadtest"}
+        for i in range(int(total_samples))
+    ]
+
+
+def serve(host: str, port: int) -> None:
+    import uvicorn
+
+    from . import api
+
+    api.backend_sample_labeling = _synthetic_sample
+    uvicorn.run(api.app, host=host, port=port, log_level="warning")
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def _start_server(host: str, workdir: str, timeout: float = 120.0) -> "tuple[subprocess.Popen, str]":
+    port = _free_port(host)
+    env = dict(
+        os.environ,
+        MULTI_DB_PATH=os.path.join(workdir, "loadtest.sqlite3"),
+        MP_EXPORT_DIR=workdir,
+        MP_RETENTION="0",
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "backend.loadtest", "serve", "--host", host, "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+    )
+    base = f"http://{host}:{port}/api"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"load test server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base}/health", timeout=0.5).status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("load test server did not become healthy")
+
+
+# ----------------------------
+# Client side
+# ----------------------------
+class LoadStats:
+    """Latencies (ms) and failures per endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        # (endpoint, HTTP status or exception name) -> count
+        self.error_kinds: Dict[tuple, int] = defaultdict(int)
+        self.labels_posted = 0
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs: Any) -> Optional[Any]:
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self._failed(name, t0, type(e).__name__)
+            return None
+        if resp.status_code >= 400:
+            self._failed(name, t0, str(resp.status_code))
+            return None
+        self.latencies[name].append((time.perf_counter() - t0) * 1000)
+        return resp.json()
+
+    def _failed(self, name: str, t0: float, kind: str) -> None:
+        self.latencies[name].append((time.perf_counter() - t0) * 1000)
+        self.errors[name] += 1
+        self.error_kinds[(name, kind)] += 1
+
+    def report(self, elapsed: float) -> str:
+        def pct(values: List[float], q: float) -> float:
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+        lines = [f"{'endpoint':<28}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        total = errors = 0
+        for name, values in sorted(self.latencies.items()):
+            total += len(values)
+            errors += self.errors[name]
+            lines.append(
+                f"{name:<28}{len(values):>8}{self.errors[name]:>8}"
+                f"{pct(values, 0.5):>10.1f}{pct(values, 0.95):>10.1f}{pct(values, 0.99):>10.1f}"
+            )
+        lines.append("")
+        lines.append(
+            f"{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, "
+            f"{self.labels_posted / elapsed:.1f} labels/s, error rate {100.0 * errors / max(total, 1):.2f}%"
+        )
+        if self.error_kinds:
+            lines.append(
+                "Errors: " + ", ".join(f"{name} {kind} x{n}" for (name, kind), n in sorted(self.error_kinds.items()))
+            )
+        return "\n".join(lines)
+
+
+async def _labeler(
+    client: httpx.AsyncClient,
+    stats: LoadStats,
+    sid: str,
+    pid: str,
+    swipe_rate: float,
+    labels_per_post: int,
+    batches: int,
+) -> None:
+    labeled = 0
+    for _ in range(batches):
+        data = await stats.call(client, "GET next-batch", "GET", f"/sessions/{sid}/players/{pid}/next-batch")
+        items = (data or {}).get("items") or []
+        if not items:
+            break
+        pending: List[Dict[str, Any]] = []
+        for item in items:
+            await asyncio.sleep(random.expovariate(swipe_rate))
+            pending.append(
+                {"item_id": item["sample_id"], "label_value": random.choice(("correct", "error")), "order_index": labeled}
+            )
+            labeled += 1
+            if len(pending) >= labels_per_post or item is items[-1]:
+                if await stats.call(client, "POST labels", "POST", f"/sessions/{sid}/players/{pid}/labels", json=pending):
+                    stats.labels_posted += len(pending)
+                pending = []
+    await stats.call(client, "POST done", "POST", f"/sessions/{sid}/players/{pid}/done")
+
+
+async def _watch_progress(client: httpx.AsyncClient, stats: LoadStats, sid: str, interval: float) -> None:
+    # What the host's progress page does while players label
+    while True:
+        await stats.call(client, "GET progress", "GET", f"/sessions/{sid}/progress")
+        await asyncio.sleep(interval)
+
+
+async def run_load(
+    base: str,
+    players: int,
+    min_budget: int,
+    swipe_rate: float,
+    labels_per_post: int = 1,
+    batches: int = 1,
+    progress_interval: float = 1.0,
+) -> Dict[str, Any]:
+    """Run one simulated session against `base` (``http://host:port/api``); returns the results."""
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=players + 10, max_keepalive_connections=players + 10)
+    async with httpx.AsyncClient(base_url=base, timeout=60.0, limits=limits) as client:
+        before = await stats.call(client, "GET metrics", "GET", "/metrics") or {}
+        sess = await stats.call(
+            client, "POST sessions", "POST", "/sessions", json={"min_budget": min_budget, "expected_players": players + 1}
+        )
+        if not sess:
+            raise RuntimeError("could not create a session")
+        sid = sess["session_id"]
+        host = await stats.call(client, "POST players", "POST", f"/sessions/{sid}/players", json={"role": "host"})
+        joined = await asyncio.gather(
+            *(
+                stats.call(client, "POST players", "POST", f"/sessions/{sid}/players", json={"role": "player"})
+                for _ in range(players)
+            )
+        )
+        pids = [p["player_id"] for p in [host, *joined] if p]
+
+        for _ in range(240):
+            started = await stats.call(client, "POST start", "POST", f"/sessions/{sid}/start")
+            if started and started.get("status") == "active":
+                break
+            await asyncio.sleep(0.5)
+        else:
+            raise RuntimeError("session did not become active")
+
+        t0 = time.perf_counter()
+        watcher = asyncio.create_task(_watch_progress(client, stats, sid, progress_interval))
+        await asyncio.gather(
+            *(_labeler(client, stats, sid, pid, swipe_rate, labels_per_post, batches) for pid in pids)
+        )
+        watcher.cancel()
+        await stats.call(client, "POST next (export)", "POST", f"/sessions/{sid}/next")
+        elapsed = time.perf_counter() - t0
+        after = await stats.call(client, "GET metrics", "GET", "/metrics") or {}
+
+    # Counters are process-wide: report what this run added
+    sqlite_before, sqlite_after = before.get("sqlite", {}), after.get("sqlite", {})
+    sqlite = {k: round(v - sqlite_before.get(k, 0), 3) for k, v in sqlite_after.items()}
+    sqlite["max_lock_wait_ms"] = sqlite_after.get("max_lock_wait_ms")
+    return {
+        "session_id": sid,
+        "players": len(pids),
+        "elapsed": elapsed,
+        "stats": stats,
+        "sqlite": sqlite,
+        "ingest": after.get("ingest", {}),
+    }
+
+
+def _print_results(result: Dict[str, Any]) -> None:
+    print(f"session {result['session_id']}, {result['players']} participants")
+    print(result["stats"].report(result["elapsed"]))
+    sq = result["sqlite"]
+    if sq:
+        print(
+            f"SQLite: {sq.get('write_txns', 0):.0f} write transactions, {sq.get('lock_waits', 0):.0f} lock waits "
+            f"(>= 1 ms) totalling {sq.get('lock_wait_ms', 0):.1f} ms, max {sq.get('max_lock_wait_ms') or 0:.1f} ms, "
+            f"{sq.get('lock_timeouts', 0):.0f} timeouts"
+        )
+    ingest = result["ingest"]
+    if ingest.get("enabled"):
+        print(
+            f"Ingest: {ingest.get('groups_committed')} group commits, commit p95 {ingest.get('commit_ms_p95')} ms, "
+            f"ack p95 {ingest.get('ack_ms_p95')} ms"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test the multiplayer API with simulated labelers")
+    parser.add_argument("command", nargs="?", choices=["run", "serve"], default="run")
+    parser.add_argument("--url", default=None, help="API base URL (e.g. http://127.0.0.1:8000/api); default: start one")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port for `serve`")
+    parser.add_argument("--players", type=int, default=100, help="Players joining besides the host")
+    parser.add_argument("--min-budget", type=int, default=20, help="Cells leased per next-batch call")
+    parser.add_argument("--swipe-rate", type=float, default=2.0, help="Labels per second per player")
+    parser.add_argument("--labels-per-post", type=int, default=1, help="Labels sent per POST /labels")
+    parser.add_argument("--batches", type=int, default=1, help="next-batch rounds per player")
+    parser.add_argument("--progress-interval", type=float, default=1.0, help="Seconds between host progress polls")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.host, args.port or _free_port(args.host))
+        raise SystemExit(0)
+
+    proc = workdir = None
+    base = args.url
+    if base is None:
+        workdir = tempfile.mkdtemp(prefix="mp-loadtest-")
+        proc, base = _start_server(args.host, workdir)
+    try:
+        result = asyncio.run(
+            run_load(
+                base.rstrip("/"),
+                players=args.players,
+                min_budget=args.min_budget,
+                swipe_rate=args.swipe_rate,
+                labels_per_post=args.labels_per_post,
+                batches=args.batches,
+                progress_interval=args.progress_interval,
+            )
+        )
+        _print_results(result)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
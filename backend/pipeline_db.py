@@ -0,0 +1,430 @@
+"""
+SQLite storage for pipeline configurations.
+
+Alternative to the JSON-file PipelineStore, selected with
+``PIPELINE_BACKEND=sqlite``. Each pipeline folder gets a ``pipeline.sqlite3``
+with normalized tables for domain folds, cell folds and their members, fold
+labels and results; every other top-level key is kept as a JSON value in
+``config``. Updates are diffed against the stored state so that e.g. labeling
+one cell fold or moving one cell rewrites only the affected rows.
+
+Existing pipelines are imported with::
+
+    python -m backend.pipeline_db migrate [--pipelines DIR] [--force]
+"""
+from __future__ import annotations
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .pipeline_store import CONFIG_FILE, _json_default
+
+DB_FILE = "pipeline.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT              -- JSON; NULL when the key lives in its own table
+);
+
+CREATE TABLE IF NOT EXISTS domain_folds (
+    fold TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS domain_fold_tables (
+    fold TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    table_name TEXT NOT NULL,
+    PRIMARY KEY (fold, position)
+);
+CREATE INDEX IF NOT EXISTS idx_domain_fold_tables_table ON domain_fold_tables(table_name);
+
+-- Domains of cell_folds, so a domain without cell folds survives a round-trip
+CREATE TABLE IF NOT EXISTS cell_fold_domains (
+    domain_fold TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cell_folds (
+    domain_fold TEXT NOT NULL,
+    cell_fold TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (domain_fold, cell_fold)
+);
+
+CREATE TABLE IF NOT EXISTS cell_fold_members (
+    domain_fold TEXT NOT NULL,
+    cell_fold TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    table_name TEXT,
+    row_idx INTEGER,
+    col TEXT,
+    payload TEXT NOT NULL,  -- the full cell dict (val, strategies, ...)
+    PRIMARY KEY (domain_fold, cell_fold, position)
+);
+CREATE INDEX IF NOT EXISTS idx_cell_fold_members_cell ON cell_fold_members(table_name, row_idx, col);
+
+CREATE TABLE IF NOT EXISTS fold_labels (
+    cell_fold TEXT PRIMARY KEY,
+    label TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    position INTEGER PRIMARY KEY,
+    run_id TEXT,
+    time TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+@contextmanager
+def _immediate(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _cell_key(cell: Dict[str, Any]) -> tuple:
+    row = cell.get("row")
+    try:
+        row = int(row)
+    except (TypeError, ValueError):
+        row = None
+    return cell.get("table"), row, cell.get("col")
+
+
+class SQLitePipelineStore:
+    """PipelineStore interface on top of a per-pipeline SQLite database.
+
+    Writes are committed immediately (``flush`` is a no-op). Assembled values
+    are cached per key and dropped when another connection commits, detected
+    through ``PRAGMA data_version``.
+
+    Args:
+        pipeline_path: Pipeline folder; the database is ``pipeline.sqlite3`` inside it.
+    """
+
+    def __init__(self, pipeline_path: str) -> None:
+        self.pipeline_path = pipeline_path
+        self.path = os.path.join(pipeline_path, DB_FILE)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._keys: Optional[List[str]] = None
+        self._cache: Dict[str, Any] = {}
+        self._readers: Dict[str, Callable[[sqlite3.Connection], Any]] = {
+            "domain_folds": self._read_domain_folds,
+            "cell_folds": self._read_cell_folds,
+            "cell_fold_labels": self._read_fold_labels,
+            "results": self._read_results,
+        }
+        self._writers: Dict[str, Callable[[sqlite3.Connection, Any, Any], None]] = {
+            "domain_folds": self._write_domain_folds,
+            "cell_folds": self._write_cell_folds,
+            "cell_fold_labels": self._write_fold_labels,
+            "results": self._write_results,
+        }
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def exists(self) -> bool:
+        with self._lock:
+            return bool(self._stored_keys())
+
+    def load(self) -> Dict[str, Any]:
+        """Return the whole config as a new dict; nested values are shared with the cache."""
+        with self._lock:
+            return {key: self._value(key) for key in self._stored_keys()}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return one key; the value is shared with the cache, copy it before mutating."""
+        with self._lock:
+            if key not in self._stored_keys():
+                return default
+            return self._value(key)
+
+    # ----------------------------
+    # Writes
+    # ----------------------------
+    def update(self, changes: Optional[Dict[str, Any]] = None, remove: Iterable[str] = (), **kwargs: Any) -> None:
+        """Set and/or remove top-level keys in one transaction."""
+        changes = {**(changes or {}), **kwargs}
+        remove = [key for key in remove if key not in changes]
+        with self._lock:
+            conn = self._connection(create=True)
+            try:
+                self._apply(conn, changes, remove)
+            except Exception:
+                # The cache may hold values that were rolled back
+                self._cache.clear()
+                self._keys = None
+                raise
+            self.version += 1
+
+    def replace(self, config: Dict[str, Any]) -> None:
+        """Replace the whole config; unchanged folds and rows are left untouched."""
+        with self._lock:
+            stale = [key for key in self._stored_keys() if key not in config]
+            self.update(config, remove=stale)
+
+    def flush(self) -> None:
+        """Writes are committed immediately; kept for interface parity."""
+
+    def set_fold_label(self, cell_fold: str, label: Optional[str]) -> None:
+        """Label (or unlabel with None) a single cell fold."""
+        labels = dict(self.get("cell_fold_labels", {}) or {})
+        if label is None:
+            labels.pop(cell_fold, None)
+        else:
+            labels[cell_fold] = label
+        self.update(cell_fold_labels=labels)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cache.clear()
+            self._keys = None
+
+    # ----------------------------
+    # Internals
+    # ----------------------------
+    def _connection(self, create: bool = False) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            os.makedirs(self.pipeline_path, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _apply(self, conn: sqlite3.Connection, changes: Dict[str, Any], remove: List[str]) -> None:
+        with _immediate(conn):
+            # Diff against the state inside the write lock, not a possibly stale cache
+            keys = self._stored_keys()
+            for key, value in changes.items():
+                value = copy.deepcopy(value)
+                writer = self._writers.get(key)
+                if writer is None:
+                    conn.execute(
+                        "INSERT INTO config(key, value) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                        (key, _dumps(value)),
+                    )
+                else:
+                    old = self._value(key) if key in keys else None
+                    writer(conn, old, value)
+                    conn.execute("INSERT OR IGNORE INTO config(key, value) VALUES (?, NULL)", (key,))
+                self._cache[key] = value
+                if key not in keys:
+                    keys.append(key)
+            for key in remove:
+                if key not in keys:
+                    continue
+                writer = self._writers.get(key)
+                if writer is not None:
+                    writer(conn, self._value(key), None)
+                conn.execute("DELETE FROM config WHERE key = ?", (key,))
+                self._cache.pop(key, None)
+                keys.remove(key)
+
+    def _sync(self, conn: sqlite3.Connection) -> None:
+        # data_version changes when another connection commits
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._cache.clear()
+            self._keys = None
+            self.version += 1
+
+    def _stored_keys(self) -> List[str]:
+        conn = self._connection()
+        if conn is None:
+            return []
+        self._sync(conn)
+        if self._keys is None:
+            self._keys = [r[0] for r in conn.execute("SELECT key FROM config ORDER BY rowid")]
+        return self._keys
+
+    def _value(self, key: str) -> Any:
+        if key not in self._cache:
+            conn = self._connection()
+            reader = self._readers.get(key)
+            if reader is not None:
+                self._cache[key] = reader(conn)
+            else:
+                row = conn.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+                self._cache[key] = json.loads(row[0]) if row and row[0] is not None else None
+        return self._cache[key]
+
+    # Domain folds: {fold: [table, ...]}
+    def _read_domain_folds(self, conn: sqlite3.Connection) -> Dict[str, List[str]]:
+        folds: Dict[str, List[str]] = {
+            r[0]: [] for r in conn.execute("SELECT fold FROM domain_folds ORDER BY position")
+        }
+        for fold, table in conn.execute("SELECT fold, table_name FROM domain_fold_tables ORDER BY fold, position"):
+            folds.setdefault(fold, []).append(table)
+        return folds
+
+    def _write_domain_folds(self, conn: sqlite3.Connection, old: Any, new: Any) -> None:
+        old, new = old or {}, new or {}
+        for fold in set(old) - set(new):
+            conn.execute("DELETE FROM domain_folds WHERE fold = ?", (fold,))
+            conn.execute("DELETE FROM domain_fold_tables WHERE fold = ?", (fold,))
+        old_pos = {fold: i for i, fold in enumerate(old)}
+        for i, (fold, tables) in enumerate(new.items()):
+            if old_pos.get(fold) != i:
+                conn.execute(
+                    "INSERT INTO domain_folds(fold, position) VALUES (?, ?) "
+                    "ON CONFLICT(fold) DO UPDATE SET position = excluded.position",
+                    (fold, i),
+                )
+            if old.get(fold) != tables:
+                conn.execute("DELETE FROM domain_fold_tables WHERE fold = ?", (fold,))
+                conn.executemany(
+                    "INSERT INTO domain_fold_tables(fold, position, table_name) VALUES (?, ?, ?)",
+                    [(fold, j, t) for j, t in enumerate(tables or [])],
+                )
+
+    # Cell folds: {domain_fold: {cell_fold: [cell, ...]}}
+    def _read_cell_folds(self, conn: sqlite3.Connection) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        folds: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
+            r[0]: {} for r in conn.execute("SELECT domain_fold FROM cell_fold_domains ORDER BY position")
+        }
+        for domain, fold in conn.execute("SELECT domain_fold, cell_fold FROM cell_folds ORDER BY position"):
+            folds.setdefault(domain, {})[fold] = []
+        for domain, fold, payload in conn.execute(
+            "SELECT domain_fold, cell_fold, payload FROM cell_fold_members ORDER BY domain_fold, cell_fold, position"
+        ):
+            folds.setdefault(domain, {}).setdefault(fold, []).append(json.loads(payload))
+        return folds
+
+    def _write_cell_folds(self, conn: sqlite3.Connection, old: Any, new: Any) -> None:
+        def flat(folds: Any) -> Dict[tuple, Any]:
+            return {(d, f): cells for d, inner in (folds or {}).items() for f, cells in (inner or {}).items()}
+
+        # Few domains: rewrite their rows rather than diffing
+        conn.execute("DELETE FROM cell_fold_domains")
+        conn.executemany(
+            "INSERT INTO cell_fold_domains(domain_fold, position) VALUES (?, ?)",
+            [(domain, i) for i, domain in enumerate(new or {})],
+        )
+        old_flat, new_flat = flat(old), flat(new)
+        for domain, fold in set(old_flat) - set(new_flat):
+            conn.execute("DELETE FROM cell_folds WHERE domain_fold = ? AND cell_fold = ?", (domain, fold))
+            conn.execute("DELETE FROM cell_fold_members WHERE domain_fold = ? AND cell_fold = ?", (domain, fold))
+        old_pos = {key: i for i, key in enumerate(old_flat)}
+        for i, ((domain, fold), cells) in enumerate(new_flat.items()):
+            if old_pos.get((domain, fold)) != i:
+                conn.execute(
+                    "INSERT INTO cell_folds(domain_fold, cell_fold, position) VALUES (?, ?, ?) "
+                    "ON CONFLICT(domain_fold, cell_fold) DO UPDATE SET position = excluded.position",
+                    (domain, fold, i),
+                )
+            if old_flat.get((domain, fold)) != cells:
+                conn.execute("DELETE FROM cell_fold_members WHERE domain_fold = ? AND cell_fold = ?", (domain, fold))
+                conn.executemany(
+                    "INSERT INTO cell_fold_members(domain_fold, cell_fold, position, table_name, row_idx, col, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(domain, fold, j, *_cell_key(c), _dumps(c)) for j, c in enumerate(cells or [])],
+                )
+
+    # Fold labels: {cell_fold: label}
+    def _read_fold_labels(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        return {fold: label for fold, label in conn.execute("SELECT cell_fold, label FROM fold_labels ORDER BY rowid")}
+
+    def _write_fold_labels(self, conn: sqlite3.Connection, old: Any, new: Any) -> None:
+        old, new = old or {}, new or {}
+        conn.executemany("DELETE FROM fold_labels WHERE cell_fold = ?", [(f,) for f in set(old) - set(new)])
+        conn.executemany(
+            "INSERT INTO fold_labels(cell_fold, label) VALUES (?, ?) "
+            "ON CONFLICT(cell_fold) DO UPDATE SET label = excluded.label",
+            [(f, label) for f, label in new.items() if old.get(f) != label],
+        )
+
+    # Results: [{"Time", "run_id", "metrics", ...}, ...]
+    def _read_results(self, conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+        return [json.loads(r[0]) for r in conn.execute("SELECT payload FROM results ORDER BY position")]
+
+    def _write_results(self, conn: sqlite3.Connection, old: Any, new: Any) -> None:
+        old, new = old or [], new or []
+        conn.execute("DELETE FROM results WHERE position >= ?", (len(new),))
+        conn.executemany(
+            "INSERT INTO results(position, run_id, time, payload) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(position) DO UPDATE SET run_id = excluded.run_id, time = excluded.time, "
+            "payload = excluded.payload",
+            [
+                (i, res.get("run_id"), res.get("Time"), _dumps(res))
+                for i, res in enumerate(new)
+                if i >= len(old) or old[i] != res
+            ],
+        )
+
+
+def migrate_pipeline(pipeline_path: str, force: bool = False) -> bool:
+    """Import ``configurations.json`` of one pipeline into its SQLite database.
+
+    Returns True if the pipeline was imported, False if it has no JSON config
+    or already has a database (unless `force`).
+    """
+    json_path = os.path.join(pipeline_path, CONFIG_FILE)
+    if not os.path.exists(json_path):
+        return False
+    store = SQLitePipelineStore(pipeline_path)
+    try:
+        if store.exists() and not force:
+            return False
+        with open(json_path, "r") as f:
+            config = json.load(f)
+        store.replace(config if isinstance(config, dict) else {})
+        return True
+    finally:
+        store.close()
+
+
+def migrate_all(pipelines_dir: str, force: bool = False) -> List[str]:
+    """Migrate every pipeline folder under `pipelines_dir`; returns the imported names."""
+    imported = []
+    for name in sorted(os.listdir(pipelines_dir)):
+        path = os.path.join(pipelines_dir, name)
+        if os.path.isdir(path) and migrate_pipeline(path, force=force):
+            imported.append(name)
+    return imported
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline SQLite storage tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import configurations.json files into pipeline.sqlite3")
+    migrate.add_argument(
+        "--pipelines",
+        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pipelines"),
+    )
+    migrate.add_argument("--force", action="store_true", help="Re-import pipelines that already have a database")
+    args = parser.parse_args()
+    names = migrate_all(args.pipelines, force=args.force)
+    print(f"Migrated {len(names)} pipeline(s)" + (": " + ", ".join(names) if names else ""))
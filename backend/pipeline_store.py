@@ -0,0 +1,244 @@
+"""
+Cached access to a pipeline's ``configurations.json``.
+
+A PipelineStore keeps the parsed config in memory and only re-reads the file
+when its mtime or size changes. Updates are applied to the in-memory copy
+immediately and written back after a short debounce, so a burst of edits
+(e.g. bulk annotations) becomes one write. Writes go to a temp file that
+replaces the config with ``os.replace`` while holding an exclusive lock on
+``configurations.json.lock``; if another process changed the file in the
+meantime, only the keys changed here are applied on top of its content.
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+CONFIG_FILE = "configurations.json"
+DEFAULT_DEBOUNCE = 0.25
+PIPELINE_BACKEND = os.environ.get("PIPELINE_BACKEND", "json").lower()
+_MISSING = object()
+
+
+def _json_default(obj: Any) -> Any:
+    # Folding results may carry numpy scalars/arrays or pandas NA values
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "item"):
+        return obj.item()
+    return None
+
+
+class _FileLock:
+    """Exclusive advisory lock on a sidecar file (no-op where fcntl is unavailable)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh = None
+
+    def __enter__(self) -> "_FileLock":
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fh = open(self.path, "a")
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._fh is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+
+
+class PipelineStore:
+    """In-memory view of one pipeline's configuration with coalesced writes.
+
+    Args:
+        pipeline_path: Pipeline folder containing ``configurations.json``.
+        debounce: Seconds to wait after the last change before writing.
+    """
+
+    def __init__(self, pipeline_path: str, debounce: float = DEFAULT_DEBOUNCE) -> None:
+        self.pipeline_path = pipeline_path
+        self.path = os.path.join(pipeline_path, CONFIG_FILE)
+        self.debounce = float(debounce)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._dirty: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._replace_all = False
+        self._timer: Optional[threading.Timer] = None
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def exists(self) -> bool:
+        with self._lock:
+            return self._pending() or os.path.exists(self.path)
+
+    def load(self) -> Dict[str, Any]:
+        """Return the whole config (empty dict if there is none).
+
+        Only the top-level dict is copied, so callers may set keys on it; nested
+        values are shared with the cache, copy them before mutating.
+        """
+        with self._lock:
+            return dict(self._current())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return one key without copying the rest of the config.
+
+        The value is shared with the cache; copy it before mutating.
+        """
+        with self._lock:
+            return self._current().get(key, default)
+
+    # ----------------------------
+    # Writes
+    # ----------------------------
+    def update(self, changes: Optional[Dict[str, Any]] = None, remove: Iterable[str] = (), **kwargs: Any) -> None:
+        """Set and/or remove top-level keys; the file is written after the debounce."""
+        changes = {**(changes or {}), **kwargs}
+        with self._lock:
+            data = self._current()
+            for key, value in changes.items():
+                data[key] = value
+                self._dirty.add(key)
+                self._removed.discard(key)
+            for key in remove:
+                if data.pop(key, _MISSING) is not _MISSING:
+                    self._removed.add(key)
+                    self._dirty.discard(key)
+            self._changed()
+
+    def replace(self, config: Dict[str, Any]) -> None:
+        """Replace the whole config (what ``save_pipeline_config`` does)."""
+        with self._lock:
+            self._current()
+            self._data = copy.deepcopy(config)
+            self._replace_all = True
+            self._changed()
+
+    def flush(self) -> None:
+        """Write pending changes now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending():
+                return
+            with _FileLock(self.path + ".lock"):
+                data = self._data or {}
+                if not self._replace_all and self._stat_on_disk() not in (None, self._stat):
+                    # Someone else wrote the file: apply only our keys on top of theirs
+                    merged = self._read()
+                    for key in self._dirty:
+                        merged[key] = data[key]
+                    for key in self._removed:
+                        merged.pop(key, None)
+                    data = merged
+                os.makedirs(self.pipeline_path, exist_ok=True)
+                tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(data, f, indent=2, default=_json_default)
+                os.replace(tmp, self.path)
+                self._data = data
+                self._stat = self._stat_on_disk()
+            self._dirty.clear()
+            self._removed.clear()
+            self._replace_all = False
+
+    # ----------------------------
+    # Internals
+    # ----------------------------
+    def _pending(self) -> bool:
+        return bool(self._replace_all or self._dirty or self._removed)
+
+    def _stat_on_disk(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _current(self) -> Dict[str, Any]:
+        # Unwritten local changes win over the file until they are flushed
+        if self._data is not None and self._pending():
+            return self._data
+        stat = self._stat_on_disk()
+        if self._data is None or stat != self._stat:
+            self._data = self._read()
+            self._stat = stat
+            self.version += 1
+        return self._data
+
+    def _changed(self) -> None:
+        self.version += 1
+        if self.debounce <= 0:
+            self.flush()
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.debounce, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+_STORES: Dict[str, PipelineStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_pipeline_store(pipeline_path: str) -> PipelineStore:
+    """Return the process-wide store for `pipeline_path`.
+
+    ``PIPELINE_BACKEND=sqlite`` selects the SQLite store (see backend.pipeline_db);
+    the default keeps ``configurations.json``.
+    """
+    key = os.path.abspath(pipeline_path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            if PIPELINE_BACKEND == "sqlite":
+                from .pipeline_db import SQLitePipelineStore
+
+                store = SQLitePipelineStore(key)
+            else:
+                store = PipelineStore(key)
+            _STORES[key] = store
+        return store
+
+
+def load_config(pipeline_path: str) -> Dict[str, Any]:
+    return get_pipeline_store(pipeline_path).load()
+
+
+def config_exists(pipeline_path: str) -> bool:
+    return get_pipeline_store(pipeline_path).exists()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for store in list(_STORES.values()):
+        try:
+            store.flush()
+        except Exception:
+            pass
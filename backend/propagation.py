@@ -0,0 +1,661 @@
+"""
+Graph-based semi-supervised label propagation.
+
+Cells are embedded with cheap, vectorized value features computed per column
+(length, character class ratios, numeric z-score, value and pattern
+frequency). Within each cell fold identical feature vectors are collapsed,
+a sparse approximate k-NN graph is built with blockwise brute-force search,
+symmetrized and normalized, and labels are spread
+with the iteration F <- alpha * S F + (1 - alpha) * Y using sparse
+matrix-vector products. Memory is O(n * k) for the graph plus O(n) per label
+class, so a fold with 10^7 cells fits on a single CPU box.
+
+Run ``python -m backend.propagation`` for a time/memory benchmark.
+"""
+from __future__ import annotations
+
+import os
+import resource
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+N_VALUE_FEATURES = 11
+DEFAULT_K = 10
+DEFAULT_ALPHA = 0.9
+QUERY_BLOCK = 128
+
+
+# ----------------------------
+# Features
+# ----------------------------
+def column_features(values: pd.Series) -> np.ndarray:
+    """Return an (n, N_VALUE_FEATURES) float32 matrix describing each value of one column.
+
+    Features are standardized within the column so that columns with very
+    different value lengths or ranges end up on a comparable scale.
+    """
+    s = values.astype(str).fillna("")
+    n = len(s)
+    if n == 0:
+        return np.zeros((0, N_VALUE_FEATURES), dtype=np.float32)
+
+    length = s.str.len().to_numpy(dtype=np.float32)
+    safe_len = np.maximum(length, 1.0)
+    digits = s.str.count(r"[0-9]").to_numpy(dtype=np.float32)
+    alpha = s.str.count(r"[A-Za-z]").to_numpy(dtype=np.float32)
+    upper = s.str.count(r"[A-Z]").to_numpy(dtype=np.float32)
+    space = s.str.count(r"\s").to_numpy(dtype=np.float32)
+    punct = np.maximum(length - digits - alpha - space, 0.0)
+    empty = (s.str.strip() == "").to_numpy(dtype=np.float32)
+
+    numeric = pd.to_numeric(s, errors="coerce")
+    is_num = numeric.notna().to_numpy(dtype=np.float32)
+    z = np.zeros(n, dtype=np.float32)
+    if is_num.any():
+        num = numeric.to_numpy(dtype=np.float64)
+        mu, sd = np.nanmean(num), np.nanstd(num)
+        z = np.nan_to_num((num - mu) / (sd if sd > 0 else 1.0)).clip(-5, 5).astype(np.float32)
+
+    value_freq = s.map(s.value_counts()).to_numpy(dtype=np.float32) / n
+    pattern = s.str.replace(r"[0-9]", "9", regex=True).str.replace(r"[A-Za-z]", "a", regex=True)
+    pattern_freq = pattern.map(pattern.value_counts()).to_numpy(dtype=np.float32) / n
+
+    feats = np.stack(
+        [
+            np.log1p(length),
+            digits / safe_len,
+            alpha / safe_len,
+            upper / safe_len,
+            space / safe_len,
+            punct / safe_len,
+            empty,
+            is_num,
+            z,
+            np.log(value_freq),
+            np.log(pattern_freq),
+        ],
+        axis=1,
+    )
+    mu = feats.mean(axis=0)
+    sd = feats.std(axis=0)
+    sd[sd == 0] = 1.0
+    return ((feats - mu) / sd).astype(np.float32)
+
+
+# ----------------------------
+# Graph and spreading
+# ----------------------------
+def knn_graph(features: np.ndarray, k: int = DEFAULT_K, block_size: int = QUERY_BLOCK) -> sp.csr_matrix:
+    """Symmetric, normalized approximate k-NN affinity matrix S = D^-1/2 W D^-1/2.
+
+    Rows are sorted along their principal direction and each block of
+    `block_size` rows is compared by brute force against itself and its two
+    neighbouring blocks, so the work is O(n * block_size * d) instead of
+    O(n^2 * d) and the distance buffer never exceeds block_size x 3*block_size.
+    Edge weights are Gaussian in the distance, scaled by the distance to each
+    endpoint's k-th neighbour so outliers stay connected.
+    """
+    n = features.shape[0]
+    if n < 2:
+        return sp.csr_matrix((n, n), dtype=np.float32)
+    k = min(int(k), n - 1)
+    block = max(int(block_size), 2 * k)
+
+    sample = features[:: max(1, n // 100_000)]
+    _, _, vt = np.linalg.svd(sample - sample.mean(axis=0), full_matrices=False)
+    order = np.argsort(features @ vt[0], kind="stable")
+    x = np.ascontiguousarray(features[order])
+    sq = (x ** 2).sum(axis=1)
+
+    dist = np.empty((n, k), dtype=np.float32)
+    nbrs = np.empty((n, k), dtype=np.int64)
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        lo, hi = max(0, start - block), min(n, stop + block)
+        d = sq[start:stop, None] + sq[None, lo:hi] - 2.0 * (x[start:stop] @ x[lo:hi].T)
+        own = np.arange(stop - start)
+        d[own, own + start - lo] = np.inf
+        part = np.argpartition(d, k - 1, axis=1)[:, :k]
+        dist[order[start:stop]] = np.sqrt(np.maximum(np.take_along_axis(d, part, axis=1), 0.0))
+        nbrs[order[start:stop]] = order[lo + part]
+
+    # Local scaling: each node's bandwidth is the distance to its k-th neighbour
+    sigma = np.maximum(dist.max(axis=1), 1e-6)
+    weights = np.exp(-(dist ** 2) / (sigma[:, None] * sigma[nbrs])).ravel()
+    rows = np.repeat(np.arange(n, dtype=np.int64), k)
+    w = sp.csr_matrix((weights, (rows, nbrs.ravel())), shape=(n, n), dtype=np.float32)
+    w = w.maximum(w.T).tocsr()
+
+    deg = np.asarray(w.sum(axis=1)).ravel()
+    inv_sqrt = np.zeros_like(deg)
+    nz = deg > 0
+    inv_sqrt[nz] = 1.0 / np.sqrt(deg[nz])
+    d_inv = sp.diags(inv_sqrt.astype(np.float32))
+    return (d_inv @ w @ d_inv).tocsr()
+
+
+def label_spreading(
+    graph: sp.csr_matrix,
+    seed_idx: Sequence[int],
+    seed_is_error: Sequence[bool],
+    alpha: float = DEFAULT_ALPHA,
+    max_iter: int = 30,
+    tol: float = 1e-4,
+    seed_weight: Optional[Sequence[float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Spread seed labels over the graph.
+
+    A node may appear as both an error and a correct seed; `seed_weight`
+    (default 1 per entry) then gives each class its share of the node's labels.
+
+    Returns:
+        Tuple of (p_error, mass): the share of error mass per cell and the
+        total label mass that reached it (0 for cells unreachable from seeds).
+    """
+    n = graph.shape[0]
+    y = np.zeros((n, 2), dtype=np.float32)
+    idx = np.asarray(seed_idx, dtype=np.int64)
+    err = np.asarray(seed_is_error, dtype=bool)
+    w = np.ones(idx.shape[0], dtype=np.float32) if seed_weight is None else np.asarray(seed_weight, dtype=np.float32)
+    y[idx[err], 0] = w[err]
+    y[idx[~err], 1] = w[~err]
+
+    f = y.copy()
+    base = (1.0 - alpha) * y
+    for _ in range(max_iter):
+        nxt = alpha * (graph @ f) + base
+        delta = float(np.abs(nxt - f).max()) if n else 0.0
+        f = nxt
+        if delta < tol:
+            break
+    mass = f.sum(axis=1)
+    p_error = np.divide(f[:, 0], mass, out=np.zeros(n, dtype=np.float32), where=mass > 0)
+    return p_error, mass
+
+
+def _nearest_seed(features: np.ndarray, seeds: np.ndarray, block_size: int = 65536) -> np.ndarray:
+    """Index into `seeds` of the closest seed for every row of `features`."""
+    out = np.empty(features.shape[0], dtype=np.int64)
+    seed_sq = (seeds ** 2).sum(axis=1)
+    for start in range(0, features.shape[0], block_size):
+        block = features[start:start + block_size]
+        d = seed_sq[None, :] - 2.0 * block @ seeds.T
+        out[start:start + block_size] = d.argmin(axis=1)
+    return out
+
+
+# ----------------------------
+# Dataset-level propagation
+# ----------------------------
+class _TableCache:
+    """Loads each table's clean.csv once and featurizes each column once."""
+
+    def __init__(self, datasets_path: str) -> None:
+        self.datasets_path = datasets_path
+        self._frames: Dict[str, Optional[pd.DataFrame]] = {}
+        self._features: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def frame(self, table: str) -> Optional[pd.DataFrame]:
+        if table not in self._frames:
+            path = os.path.join(self.datasets_path, table, "clean.csv")
+            try:
+                self._frames[table] = pd.read_csv(path, dtype=str, keep_default_na=False)
+            except Exception as e:
+                print(f"Error processing table {table}: {e}")
+                self._frames[table] = None
+        return self._frames[table]
+
+    def features(self, table: str, col: str) -> Optional[np.ndarray]:
+        key = (table, col)
+        if key not in self._features:
+            df = self.frame(table)
+            if df is None or col not in df.columns:
+                return None
+            self._features[key] = column_features(df[col])
+        return self._features[key]
+
+    def value(self, table: str, row: int, col: str) -> Any:
+        df = self.frame(table)
+        return df.iat[row, df.columns.get_loc(col)]
+
+
+CellKey = Tuple[str, int, str]
+
+
+def _fold_key(cell: Dict[str, Any]) -> str:
+    return cell.get("cell_fold") or cell.get("domain_fold") or str(cell.get("table"))
+
+
+def _cell_key(cell: Dict[str, Any]) -> CellKey:
+    return (str(cell.get("table")), int(cell.get("row", 0)), str(cell.get("col", "")))
+
+
+class _Fold:
+    """Graph and label state for one fold.
+
+    A fold covers every cell of the (table, column) pairs its labeled cells
+    come from. Cells with identical features share one graph node; ``f``
+    holds the spread [error, correct] mass per node and ``residual`` the
+    mass not yet pushed by incremental updates.
+    """
+
+    def __init__(self, name: str, columns: Iterable[Tuple[str, str]], cache: _TableCache, k: int) -> None:
+        self.name = name
+        self.columns: List[Tuple[str, str]] = []
+        self.offsets: Dict[Tuple[str, str], int] = {}
+        blocks, column_of_row, rows = [], [], []
+        total = 0
+        for table, col in sorted(set(columns)):
+            feats = cache.features(table, col)
+            if feats is None:
+                continue
+            self.offsets[(table, col)] = total
+            column_of_row.append(np.full(feats.shape[0], len(self.columns), dtype=np.int32))
+            rows.append(np.arange(feats.shape[0], dtype=np.int32))
+            self.columns.append((table, col))
+            blocks.append(feats)
+            total += feats.shape[0]
+        self.n_cells = total
+        if not blocks:
+            blocks = [np.zeros((0, N_VALUE_FEATURES), dtype=np.float32)]
+        self.features = np.vstack(blocks)
+        self.column_of_row = np.concatenate(column_of_row) if column_of_row else np.zeros(0, dtype=np.int32)
+        self.row_in_table = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+
+        unique, inverse = np.unique(self.features, axis=0, return_inverse=True)
+        self.inverse = inverse.ravel()
+        self.graph = knn_graph(unique, k=k)
+        n_nodes = unique.shape[0]
+        self.counts = np.zeros((n_nodes, 2), dtype=np.int32)
+        self.f = np.zeros((n_nodes, 2), dtype=np.float32)
+        self.residual = np.zeros((n_nodes, 2), dtype=np.float32)
+        self.labels: Dict[int, bool] = {}
+        self._cells_by_node: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def position(self, key: CellKey) -> Optional[int]:
+        table, row, col = key
+        base = self.offsets.get((table, col))
+        if base is None:
+            return None
+        stop = self.offsets_end(table, col)
+        return base + row if base + row < stop else None
+
+    def offsets_end(self, table: str, col: str) -> int:
+        idx = self.columns.index((table, col))
+        return self.offsets[self.columns[idx + 1]] if idx + 1 < len(self.columns) else self.n_cells
+
+    def cell_at(self, pos: int) -> Tuple[str, int, str]:
+        table, col = self.columns[int(self.column_of_row[pos])]
+        return table, int(self.row_in_table[pos]), col
+
+    def cells_of(self, nodes: np.ndarray) -> np.ndarray:
+        """Cell positions belonging to the given nodes."""
+        if self._cells_by_node is None:
+            order = np.argsort(self.inverse, kind="stable")
+            bounds = np.searchsorted(self.inverse[order], np.arange(self.counts.shape[0] + 1))
+            self._cells_by_node = (order, bounds)
+        order, bounds = self._cells_by_node
+        starts, lengths = bounds[nodes], bounds[nodes + 1] - bounds[nodes]
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        shift = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return order[shift + np.arange(total)]
+
+    def p_error(self, nodes: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        f = self.f if nodes is None else self.f[nodes]
+        mass = f.sum(axis=1)
+        p = np.divide(f[:, 0], mass, out=np.zeros(f.shape[0], dtype=np.float32), where=mass > 0)
+        # Unpushed negative residual can leave a class slightly below zero
+        return np.clip(p, 0.0, 1.0, out=p), mass
+
+    def reportable_mass(self, min_mass_ratio: float) -> float:
+        """Smallest node mass reported: `min_mass_ratio` of the strongest node."""
+        return min_mass_ratio * float(self.f.sum(axis=1).max()) if self.f.shape[0] else 0.0
+
+    def set_labels(self, labels: Dict[int, Optional[bool]]) -> None:
+        """Apply label changes (cell position -> is_error, or None to remove) to node counts."""
+        for pos, is_error in labels.items():
+            node = int(self.inverse[pos])
+            old = self.labels.pop(pos, None)
+            if old is not None:
+                self.counts[node, 0 if old else 1] -= 1
+            if is_error is not None:
+                self.labels[pos] = bool(is_error)
+                self.counts[node, 0 if is_error else 1] += 1
+
+    def seed_rows(self, nodes: np.ndarray) -> np.ndarray:
+        """[error, correct] seed rows of `nodes`: each node's label proportions.
+
+        A value labeled both ways splits its unit of mass between the classes
+        instead of seeding a full unit of each, so conflicting labels lower
+        the error share rather than pinning it at 0.5.
+        """
+        counts = self.counts[nodes].astype(np.float32)
+        total = counts.sum(axis=1, keepdims=True)
+        return np.divide(counts, total, out=np.zeros_like(counts), where=total > 0)
+
+    def spread(self, alpha: float) -> None:
+        """Recompute ``f`` from all labels with batch label spreading."""
+        seeds = np.flatnonzero(self.counts.sum(axis=1) > 0)
+        self.residual[:] = 0.0
+        if seeds.shape[0] == 0:
+            self.f[:] = 0.0
+            return
+        y = self.seed_rows(seeds)
+        is_err, is_ok = y[:, 0] > 0, y[:, 1] > 0
+        idx = np.concatenate([seeds[is_err], seeds[is_ok]])
+        flags = np.concatenate([np.ones(int(is_err.sum()), bool), np.zeros(int(is_ok.sum()), bool)])
+        weight = np.concatenate([y[is_err, 0], y[is_ok, 1]])
+        p, mass = label_spreading(self.graph, idx, flags, alpha=alpha, seed_weight=weight)
+        self.f[:, 0] = p * mass
+        self.f[:, 1] = mass - self.f[:, 0]
+
+    def push(
+        self, nodes: np.ndarray, y_old: np.ndarray, alpha: float, eps: float, max_rounds: int = 500
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Push-based residual update after the seed rows of `nodes` changed.
+
+        Maintains F = P + sum_t (alpha S)^t R: the seed delta enters the
+        residual, and every node whose residual exceeds `eps` moves it into
+        ``f`` and forwards ``alpha * S`` of it to its neighbours. Only the
+        neighbourhoods the delta actually reaches are visited.
+
+        Returns:
+            Tuple of (nodes whose ``f`` was modified, their ``f`` rows before
+            the update).
+        """
+        y_new = self.seed_rows(nodes)
+        self.residual[nodes] += (1.0 - alpha) * (y_new - y_old)
+        touched, f_before = [], []
+        active = nodes[np.abs(self.residual[nodes]).max(axis=1) > eps]
+        indptr, indices, data = self.graph.indptr, self.graph.indices, self.graph.data
+        for _ in range(max_rounds):
+            if active.shape[0] == 0:
+                break
+            r = self.residual[active].copy()
+            self.residual[active] = 0.0
+            touched.append(active)
+            f_before.append(self.f[active].copy())
+            self.f[active] += r
+            starts, stops = indptr[active], indptr[active + 1]
+            lengths = stops - starts
+            total = int(lengths.sum())
+            if total == 0:
+                break
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            edge = np.repeat(starts - offsets, lengths) + np.arange(total)
+            src = np.repeat(np.arange(active.shape[0]), lengths)
+            targets, inv = np.unique(indices[edge], return_inverse=True)
+            acc = np.zeros((targets.shape[0], 2), dtype=np.float32)
+            np.add.at(acc, inv, (alpha * data[edge])[:, None] * r[src])
+            self.residual[targets] += acc
+            active = targets[np.abs(self.residual[targets]).max(axis=1) > eps]
+        if not touched:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 2), dtype=np.float32)
+        # A node pushed in several rounds keeps its state from the first one
+        all_nodes, first = np.unique(np.concatenate(touched), return_index=True)
+        return all_nodes, np.concatenate(f_before)[first]
+
+
+class IncrementalPropagator:
+    """Label propagation state that can absorb label deltas.
+
+    The first label in a fold builds the fold's graph and spreads all of its
+    labels at once; later labels for that fold only push the change through
+    the affected neighbourhoods (personalized-PageRank style residual
+    updates), so a single swipe costs roughly the size of the region it
+    influences rather than a full pass over the lake.
+
+    Args:
+        datasets_path: Folder containing ``<table>/clean.csv``.
+        k: Neighbours per node in the k-NN graph.
+        alpha: Propagation strength (probability of following an edge).
+        eps: Residual below which a node is not pushed further, relative to
+            the smallest reported node mass (see ``min_mass_ratio``), so the
+            error left on any reported cell stays small against its mass.
+        threshold: Error share above which an unlabeled cell counts as error.
+        min_mass_ratio: Minimum share of a fold's strongest mass a cell must
+            receive to be reported.
+        max_per_label: Propagated cells kept per labeled cell in results.
+    """
+
+    def __init__(
+        self,
+        datasets_path: str,
+        k: int = DEFAULT_K,
+        alpha: float = DEFAULT_ALPHA,
+        eps: float = 1e-4,
+        threshold: float = 0.5,
+        min_mass_ratio: float = 0.01,
+        max_per_label: int = 25,
+    ) -> None:
+        self.datasets_path = datasets_path
+        self.k = k
+        self.alpha = alpha
+        self.eps = eps
+        self.threshold = threshold
+        self.min_mass_ratio = min_mass_ratio
+        self.max_per_label = max_per_label
+        self._cache = _TableCache(datasets_path)
+        self._folds: Dict[str, _Fold] = {}
+        self._cells: Dict[CellKey, Dict[str, Any]] = {}
+        self._fold_of: Dict[CellKey, str] = {}
+        self.last_update_seconds = 0.0
+        self.last_changed = 0
+
+    @property
+    def n_labels(self) -> int:
+        return len(self._cells)
+
+    def labeled(self) -> List[Dict[str, Any]]:
+        return list(self._cells.values())
+
+    def update(self, delta: Iterable[Dict[str, Any]], limit: Optional[int] = 1000) -> List[Dict[str, Any]]:
+        """Apply new, changed or removed labels and return the cells whose confidence moved.
+
+        Args:
+            delta: Labeled cell dicts (table/row/col/is_error/cell_fold...).
+                A cell with ``is_error`` set to ``None`` removes its label.
+            limit: Maximum number of changed cells returned (most confident
+                first); ``None`` returns all of them. The total count is
+                always available as ``last_changed``.
+
+        Returns:
+            Unlabeled cells whose error confidence changed, as dicts with
+            table/row/col/val/confidence/fold.
+        """
+        t0 = time.perf_counter()
+        self.last_changed = 0
+        by_fold: Dict[str, Dict[CellKey, Optional[bool]]] = defaultdict(dict)
+        for cell in delta:
+            key = _cell_key(cell)
+            fold = self._fold_of.get(key) or _fold_key(cell)
+            is_error = cell.get("is_error")
+            if is_error is None:
+                self._cells.pop(key, None)
+                self._fold_of.pop(key, None)
+            else:
+                self._cells[key] = {**cell, "is_error": bool(is_error)}
+                self._fold_of[key] = fold
+            by_fold[fold][key] = None if is_error is None else bool(is_error)
+
+        changed: List[Dict[str, Any]] = []
+        for name, labels in by_fold.items():
+            fold = self._folds.get(name)
+            needed = {(k[0], k[2]) for k, f in self._fold_of.items() if f == name}
+            if fold is None or not needed <= set(fold.offsets):
+                fold = self._build_fold(name, needed)
+                nodes = np.flatnonzero(fold.f.sum(axis=1) > 0)
+                before = np.zeros(nodes.shape[0], dtype=np.float32)
+            else:
+                positions = {}
+                for key, is_error in labels.items():
+                    pos = fold.position(key)
+                    if pos is not None:
+                        positions[pos] = is_error
+                seed_nodes = np.unique(np.asarray([fold.inverse[p] for p in positions], dtype=np.int64))
+                y_old = fold.seed_rows(seed_nodes)
+                fold.set_labels(positions)
+                eps = self.eps * (fold.reportable_mass(self.min_mass_ratio) or 1.0)
+                nodes, f_old = fold.push(seed_nodes, y_old, self.alpha, eps)
+                mass = f_old.sum(axis=1)
+                before = np.divide(f_old[:, 0], mass, out=np.zeros(mass.shape[0], dtype=np.float32), where=mass > 0)
+            changed.extend(self._describe(fold, nodes, before, limit))
+
+        changed.sort(key=lambda c: -c["confidence"])
+        self.last_update_seconds = time.perf_counter() - t0
+        return changed if limit is None else changed[:limit]
+
+    def sync(self, labeled_cells: Iterable[Dict[str, Any]], limit: Optional[int] = 1000) -> List[Dict[str, Any]]:
+        """Make the label set equal to `labeled_cells`, updating only what differs."""
+        target = {_cell_key(c): c for c in labeled_cells}
+        delta = [c for key, c in target.items() if self._cells.get(key, {}).get("is_error") != bool(c.get("is_error"))]
+        delta.extend({**self._cells[key], "is_error": None} for key in self._cells if key not in target)
+        return self.update(delta, limit=limit) if delta else []
+
+    def labeled_cells(self) -> List[Dict[str, Any]]:
+        """Current results in the ``labeled_cells`` shape of backend_label_propagation."""
+        propagated: Dict[CellKey, List[Dict[str, Any]]] = defaultdict(list)
+        for name, fold in self._folds.items():
+            err_keys = [k for k, f in self._fold_of.items() if f == name and self._cells[k]["is_error"]]
+            err_pos = [p for p in (fold.position(k) for k in err_keys) if p is not None]
+            if not err_pos:
+                continue
+            err_keys = [k for k in err_keys if fold.position(k) is not None]
+            p_node, mass_node = fold.p_error()
+            p_error, mass = p_node[fold.inverse], mass_node[fold.inverse]
+            # Strictly above: an even split of error and correct mass is not an error
+            eligible = (p_error > self.threshold) & (mass >= fold.reportable_mass(self.min_mass_ratio))
+            eligible[np.asarray(list(fold.labels), dtype=np.int64)] = False
+            candidates = np.flatnonzero(eligible)
+            cap = self.max_per_label * len(err_pos)
+            if candidates.shape[0] > cap:
+                candidates = candidates[np.argpartition(-p_error[candidates], cap - 1)[:cap]]
+            if candidates.shape[0] == 0:
+                continue
+            owner = _nearest_seed(fold.features[candidates], fold.features[np.asarray(err_pos)])
+            for pos, o in zip(candidates, owner):
+                table, row, col = fold.cell_at(int(pos))
+                propagated[err_keys[int(o)]].append(
+                    {
+                        "table": table,
+                        "row": row,
+                        "col": col,
+                        "val": self._cache.value(table, row, col),
+                        "confidence": round(float(p_error[pos]), 2),
+                        "reason": f"Label spreading over k-NN graph ({name})",
+                    }
+                )
+
+        out = []
+        for key, cell in self._cells.items():
+            props = sorted(propagated.get(key, []), key=lambda c: -c["confidence"])[: self.max_per_label]
+            out.append({**cell, "propagated_cells": props})
+        return out
+
+    def _build_fold(self, name: str, columns: Iterable[Tuple[str, str]]) -> _Fold:
+        fold = _Fold(name, columns, self._cache, self.k)
+        positions = {}
+        for key, f in self._fold_of.items():
+            if f == name:
+                pos = fold.position(key)
+                if pos is not None:
+                    positions[pos] = self._cells[key]["is_error"]
+        fold.set_labels(positions)
+        fold.spread(self.alpha)
+        self._folds[name] = fold
+        return fold
+
+    def _describe(self, fold: _Fold, nodes: np.ndarray, before: np.ndarray, limit: Optional[int]) -> List[Dict[str, Any]]:
+        after, mass = fold.p_error(nodes)
+        # Same mass cut as labeled_cells(): barely reached cells are not reported
+        reported = mass >= fold.reportable_mass(self.min_mass_ratio)
+        moved = nodes[(np.abs(after - before) >= 0.01) & reported]
+        positions = fold.cells_of(moved)
+        if fold.labels:
+            positions = positions[~np.isin(positions, np.fromiter(fold.labels, dtype=np.int64))]
+        self.last_changed += int(positions.shape[0])
+        if limit == 0:
+            return []
+        conf = fold.p_error(fold.inverse[positions])[0]
+        if limit is not None and positions.shape[0] > limit:
+            top = np.argpartition(-conf, limit - 1)[:limit]
+            positions, conf = positions[top], conf[top]
+        out = []
+        for pos, c in zip(positions, conf):
+            table, row, col = fold.cell_at(int(pos))
+            out.append(
+                {
+                    "table": table,
+                    "row": row,
+                    "col": col,
+                    "val": self._cache.value(table, row, col),
+                    "confidence": round(float(c), 2),
+                    "fold": fold.name,
+                }
+            )
+        return out
+
+
+def propagate_labels(
+    datasets_path: str,
+    labeled_cells: Iterable[Dict[str, Any]],
+    k: int = DEFAULT_K,
+    alpha: float = DEFAULT_ALPHA,
+    threshold: float = 0.5,
+    min_mass_ratio: float = 0.01,
+    max_per_label: int = 25,
+) -> List[Dict[str, Any]]:
+    """Propagate labels fold by fold; returns labeled cells with ``propagated_cells``.
+
+    A fold's graph covers every cell of the (table, column) pairs its labeled
+    cells come from. Cells whose spread error share exceeds `threshold` (and
+    that received at least `min_mass_ratio` of the strongest mass) are
+    attributed to the nearest labeled error cell of the fold; each labeled
+    cell keeps its `max_per_label` most confident propagated cells.
+    """
+    propagator = IncrementalPropagator(
+        datasets_path,
+        k=k,
+        alpha=alpha,
+        threshold=threshold,
+        min_mass_ratio=min_mass_ratio,
+        max_per_label=max_per_label,
+    )
+    propagator.update(labeled_cells, limit=0)
+    return propagator.labeled_cells()
+
+
+def _benchmark(sizes: Sequence[int], k: int, n_labels: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    print(f"{'cells':>12} {'graph s':>9} {'spread s':>9} {'nnz':>12} {'graph MB':>9} {'peak RSS MB':>12}")
+    for n in sizes:
+        features = rng.standard_normal((n, N_VALUE_FEATURES), dtype=np.float32)
+        t0 = time.perf_counter()
+        graph = knn_graph(features, k=k)
+        t1 = time.perf_counter()
+        seeds = rng.choice(n, size=min(n_labels, n), replace=False)
+        label_spreading(graph, seeds, rng.random(seeds.shape[0]) < 0.3)
+        t2 = time.perf_counter()
+        graph_mb = (graph.data.nbytes + graph.indices.nbytes + graph.indptr.nbytes) / 2**20
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{n:>12,} {t1 - t0:>9.2f} {t2 - t1:>9.2f} {graph.nnz:>12,} {graph_mb:>9.1f} {peak_mb:>12.0f}")
+        del features, graph
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark k-NN graph label propagation")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e4, 1e5, 1e6, 1e7])
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--labels", type=int, default=100, help="Number of labeled seed cells")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    _benchmark([int(s) for s in args.sizes], args.k, args.labels, args.seed)
@@ -0,0 +1,246 @@
+"""
+Query-plan check for the multiplayer sessions database.
+
+Seeds a throwaway database with large synthetic sessions, calls every public
+function of backend.sessions against it while recording the SQL each call
+issues (via the SQLite trace callback), and runs ``EXPLAIN QUERY PLAN`` on
+every distinct statement. A statement that scans a table instead of
+searching an index fails the check, unless the (function, table) pair is
+listed in ALLOWED_SCANS. Call timings are reported alongside, and
+``--json`` writes them to a file for comparison between runs.
+
+    python -m backend.query_plans
+    python -m backend.query_plans --samples 50000 --json plans.json
+
+Exits with status 1 when a statement scans, so it can gate schema changes.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from . import sessions as S
+
+# Scans that are intended: maintenance sweeps that visit every row once
+ALLOWED_SCANS: Dict[Tuple[str, str], str] = {
+    ("session_activity", "sessions"): "retention lists every session once per pass",
+    ("prune_items", "items"): "retention sweep over all seeded items",
+    ("prune_items", "assignments"): "referenced items are collected once for the sweep",
+}
+
+_SKIP = re.compile(r"^\s*(BEGIN|COMMIT|ROLLBACK|PRAGMA|CREATE|ALTER|ANALYZE|VACUUM)\b", re.I)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?", re.I)
+_PARAM_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_NOT_ALIAS = {
+    "where", "on", "set", "left", "inner", "join", "order", "group", "limit", "values", "select",
+    "using", "natural", "cross", "default", "as", "union", "having", "window",
+}
+
+
+def _template(sql: str) -> str:
+    """Statement text with literals replaced by ``?`` (IN lists collapse to one)."""
+    t = _NUMBER.sub("?", _STRING.sub("?", sql))
+    return " ".join(_PARAM_LIST.sub("?...", t).split())
+
+
+def _aliases(sql: str) -> Dict[str, str]:
+    names: Dict[str, str] = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        names[table] = table
+        if alias and alias.lower() not in _NOT_ALIAS:
+            names[alias] = table
+    return names
+
+
+def _scanned_tables(conn: Any, sql: str) -> Tuple[List[str], List[str]]:
+    """(tables scanned, plan lines) for one statement."""
+    plan = [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    names = _aliases(sql)
+    scanned = []
+    for line in plan:
+        m = re.match(r"SCAN (\w+)", line)
+        # "SCAN (subquery-1)" and CTE scans read intermediate results, not tables
+        if m and m.group(1) in names:
+            scanned.append(names[m.group(1)])
+    return scanned, plan
+
+
+# ----------------------------
+# Synthetic data
+# ----------------------------
+def _seed(n_sessions: int, n_samples: int, n_players: int) -> Dict[str, Any]:
+    """Sessions with full pools, some leases and labels on about half of each pool."""
+    sids: List[str] = []
+    players: Dict[str, List[str]] = {}
+    S.seed_items_from_list([(f"item-{i}", f"payload {i}") for i in range(n_samples)])
+    for _ in range(n_sessions):
+        sid = S.create_session(min_budget=max(1, n_samples // (2 * n_players)), expected_players=n_players)["session_id"]
+        pids = [S.create_player(sid, "host" if i == 0 else "player")["player_id"] for i in range(n_players)]
+        S.save_session_pool(
+            sid,
+            [
+                {"sample_id": str(i), "dataset": "plans", "table": f"t{i % 7}", "row": i, "col": "c", "val": str(i)}
+                for i in range(n_samples)
+            ],
+        )
+        S.start_session(sid)
+        batches = []
+        for pid in pids:
+            items = S.get_player_batch(sid, pid)
+            batches.append((sid, pid, [{"item_id": it["sample_id"], "label_value": "correct"} for it in items]))
+        S.upsert_label_batches(batches)
+        sids.append(sid)
+        players[sid] = pids
+    return {"sessions": sids, "players": players}
+
+
+def _calls(data: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any], bool]]:
+    """(function, call, repeatable) for every public entry point of backend.sessions."""
+    sid = data["sessions"][0]
+    pid = data["players"][sid][1]
+    other = data["sessions"][-1]
+
+    def fresh_session() -> str:
+        new = S.create_session(min_budget=1, expected_players=1)["session_id"]
+        S.create_player(new, "host")
+        S.save_session_pool(new, [{"sample_id": "0", "dataset": "d", "table": "t", "row": 0, "col": "c", "val": "v"}])
+        return new
+
+    scratch: Dict[str, str] = {}
+    return [
+        ("get_session", lambda: S.get_session(sid), True),
+        ("list_players", lambda: S.list_players(sid), True),
+        ("progress", lambda: S.progress(sid), True),
+        ("count_player_labels", lambda: S.count_player_labels(sid, pid), True),
+        ("get_player_batch", lambda: S.get_player_batch(sid, pid), True),
+        ("upsert_labels", lambda: S.upsert_labels(sid, pid, [{"item_id": "1", "label_value": "error"}]), True),
+        ("reclaim_expired_leases", lambda: S.reclaim_expired_leases(sid), True),
+        ("get_session_pool", lambda: S.get_session_pool(sid), True),
+        ("merged_labels", lambda: S.merged_labels(sid), True),
+        ("set_player_done", lambda: S.set_player_done(sid, pid), True),
+        ("append_session_pool", lambda: S.append_session_pool(sid, [{"sample_id": "x", "row": 0}]), True),
+        ("create_player", lambda: S.create_player(sid, "player"), True),
+        ("seed_items_from_list", lambda: S.seed_items_from_list([("item-0", "payload")]), True),
+        ("session_activity", S.session_activity, True),
+        ("export_session", lambda: S.export_session(other), True),
+        ("create_session", lambda: scratch.update(sid=fresh_session()), False),
+        ("start_session", lambda: S.start_session(scratch["sid"]), False),
+        ("complete_session", lambda: S.complete_session(scratch["sid"]), False),
+        ("delete_session", lambda: S.delete_session(scratch["sid"]), False),
+        ("prune_items", lambda: S.prune_items(0), False),
+    ]
+
+
+# ----------------------------
+# Check
+# ----------------------------
+def check(n_sessions: int = 4, n_samples: int = 20000, n_players: int = 20, repeat: int = 5) -> Dict[str, Any]:
+    """Seed a temporary database, trace every call and explain its statements.
+
+    Returns per-function timings and statements, and the list of violations.
+    """
+    saved = S.DB_PATH
+    workdir = tempfile.mkdtemp(prefix="mp-plans-")
+    S.DB_PATH = os.path.join(workdir, "plans.sqlite3")
+    try:
+        S.init_db()
+        t0 = time.perf_counter()
+        data = _seed(n_sessions, n_samples, n_players)
+        seed_seconds = time.perf_counter() - t0
+        conn = S._connect()
+
+        functions: Dict[str, Any] = {}
+        for name, call, repeatable in _calls(data):
+            traced: List[str] = []
+            timings: List[float] = []
+            for _ in range(repeat if repeatable else 1):
+                conn.set_trace_callback(traced.append)
+                t = time.perf_counter()
+                try:
+                    call()
+                finally:
+                    conn.set_trace_callback(None)
+                timings.append((time.perf_counter() - t) * 1000)
+            statements: Dict[str, str] = {}
+            for sql in traced:
+                if not _SKIP.match(sql):
+                    statements.setdefault(_template(sql), sql)
+            functions[name] = {
+                "ms_median": round(statistics.median(timings), 3),
+                "ms_max": round(max(timings), 3),
+                "statements": statements,
+            }
+
+        violations = []
+        for name, info in functions.items():
+            plans = {}
+            for template, sql in info.pop("statements").items():
+                scanned, plan = _scanned_tables(conn, sql)
+                plans[template] = plan
+                for table in scanned:
+                    if (name, table) not in ALLOWED_SCANS:
+                        violations.append({"function": name, "table": table, "statement": template, "plan": plan})
+            info["plans"] = plans
+        return {
+            "sessions": n_sessions,
+            "samples_per_session": n_samples,
+            "players_per_session": n_players,
+            "seed_seconds": round(seed_seconds, 3),
+            "functions": functions,
+            "violations": violations,
+        }
+    finally:
+        S.close_connections()
+        S.DB_PATH = saved
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _print_report(result: Dict[str, Any], verbose: bool) -> None:
+    print(
+        f"{result['sessions']} sessions x {result['samples_per_session']} samples x "
+        f"{result['players_per_session']} players (seeded in {result['seed_seconds']:.1f}s)"
+    )
+    print(f"{'function':<26}{'median ms':>12}{'max ms':>12}{'statements':>12}")
+    for name, info in result["functions"].items():
+        print(f"{name:<26}{info['ms_median']:>12.3f}{info['ms_max']:>12.3f}{len(info['plans']):>12}")
+        if verbose:
+            for template, plan in info["plans"].items():
+                print(f"    {template}")
+                for line in plan:
+                    print(f"        {line}")
+    if result["violations"]:
+        print(f"\n{len(result['violations'])} statement(s) scan a table:")
+        for v in result["violations"]:
+            print(f"  {v['function']}: SCAN {v['table']}\n    {v['statement']}")
+            for line in v["plan"]:
+                print(f"        {line}")
+    else:
+        print("\nAll statements use indexes.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check that sessions.py queries use indexes")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=20000, help="Pool size per session")
+    parser.add_argument("--players", type=int, default=20, help="Players per session")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per function")
+    parser.add_argument("--json", default=None, help="Write timings, plans and violations to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every statement with its plan")
+    args = parser.parse_args()
+
+    result = check(args.sessions, args.samples, args.players, args.repeat)
+    _print_report(result, args.verbose)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    raise SystemExit(1 if result["violations"] else 0)
@@ -0,0 +1,178 @@
+"""
+Summary index of saved results across pipelines.
+
+The Results page compares runs of every pipeline. Instead of listing
+``pipelines/`` and parsing each pipeline configuration on every render, one
+row per saved run (pipeline, dataset, time, budget, metrics) is kept in
+``pipelines/results_index.sqlite3``. Rows of a pipeline are rewritten whenever
+its results, budget or dataset are saved (see components.utils), and the index
+is rebuilt from the pipeline folders when it does not exist yet.
+
+Run ``python -m backend.results_index rebuild`` after adding or removing
+pipeline folders by hand.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .pipeline_store import config_exists, get_pipeline_store
+
+INDEX_FILE = "results_index.sqlite3"
+# Configuration keys that feed the index
+INDEXED_KEYS = frozenset({"results", "labeling_budget", "selected_dataset"})
+
+_LOCK = threading.Lock()
+
+
+def index_path(pipelines_dir: str) -> str:
+    return os.path.join(pipelines_dir, INDEX_FILE)
+
+
+def _connect(pipelines_dir: str) -> sqlite3.Connection:
+    os.makedirs(pipelines_dir, exist_ok=True)
+    conn = sqlite3.connect(index_path(pipelines_dir), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(
+        """
+        PRAGMA journal_mode=WAL;
+        CREATE TABLE IF NOT EXISTS results_summary (
+            pipeline TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            time TEXT,
+            dataset TEXT,
+            labeling_budget TEXT,
+            recall REAL,
+            f1 REAL,
+            precision REAL,
+            run_id TEXT,
+            PRIMARY KEY (pipeline, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_summary_dataset ON results_summary(dataset, time);
+        """
+    )
+    return conn
+
+
+def _metric(metrics: Dict[str, Any], name: str) -> Optional[float]:
+    try:
+        return float(metrics.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _summary_rows(pipeline: str, dataset: Any, budget: Any, results: Iterable[Dict[str, Any]]) -> List[tuple]:
+    rows = []
+    for i, res in enumerate(results or []):
+        metrics = res.get("metrics", {}) or {}
+        rows.append(
+            (
+                pipeline,
+                i,
+                res.get("Time", ""),
+                dataset,
+                None if budget is None else str(budget),
+                _metric(metrics, "Recall"),
+                _metric(metrics, "F1"),
+                _metric(metrics, "Precision"),
+                res.get("run_id"),
+            )
+        )
+    return rows
+
+
+def _write_pipeline(conn: sqlite3.Connection, pipeline_path: str) -> None:
+    pipeline = os.path.basename(os.path.normpath(pipeline_path))
+    conn.execute("DELETE FROM results_summary WHERE pipeline = ?", (pipeline,))
+    if not config_exists(pipeline_path):
+        return
+    store = get_pipeline_store(pipeline_path)
+    conn.executemany(
+        "INSERT INTO results_summary VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        _summary_rows(
+            pipeline,
+            store.get("selected_dataset"),
+            store.get("labeling_budget"),
+            store.get("results", []),
+        ),
+    )
+
+
+def sync_pipeline(pipeline_path: str) -> None:
+    """Rewrite the index rows of one pipeline from its current configuration."""
+    pipelines_dir = os.path.dirname(os.path.normpath(pipeline_path))
+    if not os.path.exists(index_path(pipelines_dir)):
+        # First write: index every pipeline, not only this one
+        rebuild(pipelines_dir)
+        return
+    with _LOCK:
+        conn = _connect(pipelines_dir)
+        try:
+            with conn:
+                _write_pipeline(conn, pipeline_path)
+        finally:
+            conn.close()
+
+
+def rebuild(pipelines_dir: str) -> int:
+    """Re-index every pipeline folder under `pipelines_dir`; returns the number of rows."""
+    with _LOCK:
+        conn = _connect(pipelines_dir)
+        try:
+            with conn:
+                conn.execute("DELETE FROM results_summary")
+                for name in sorted(os.listdir(pipelines_dir)):
+                    path = os.path.join(pipelines_dir, name)
+                    if os.path.isdir(path):
+                        _write_pipeline(conn, path)
+            return conn.execute("SELECT COUNT(*) FROM results_summary").fetchone()[0]
+        finally:
+            conn.close()
+
+
+def summary_rows(pipelines_dir: str, dataset: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return saved runs (newest first) as rows for the Results page tables.
+
+    Args:
+        pipelines_dir: Folder holding the pipelines.
+        dataset: Only return runs of this dataset.
+    """
+    if not os.path.exists(index_path(pipelines_dir)):
+        rebuild(pipelines_dir)
+    conn = _connect(pipelines_dir)
+    try:
+        query = "SELECT * FROM results_summary"
+        params: tuple = ()
+        if dataset is not None:
+            query += " WHERE dataset = ?"
+            params = (dataset,)
+        rows = conn.execute(query + " ORDER BY time DESC", params).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "Time": r["time"] or "",
+            "Pipeline Name": r["pipeline"],
+            "Dataset": r["dataset"] or "",
+            "Labeling Budget": r["labeling_budget"] if r["labeling_budget"] is not None else "",
+            "Recall": r["recall"] if r["recall"] is not None else "",
+            "F1": r["f1"] if r["f1"] is not None else "",
+            "Precision": r["precision"] if r["precision"] is not None else "",
+        }
+        for r in rows
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Results summary index tools")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument(
+        "--pipelines",
+        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pipelines"),
+    )
+    args = parser.parse_args()
+    print(f"Indexed {rebuild(args.pipelines)} result(s)")
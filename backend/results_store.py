@@ -0,0 +1,426 @@
+"""
+Columnar per-run storage for propagation results.
+
+Each propagation run is written to ``<pipeline>/results/<run_id>.npz`` as
+parallel arrays (table id, row, column id, float16 confidence, source code,
+value, originating labeled cell) plus the small vocabularies the ids point
+into. Errors are stored sorted by (table, confidence descending) with
+``table_offsets`` marking each table's slice, which is what query_errors
+pages through. ``configurations.json`` only keeps ``{"Time", "run_id", "metrics",
+"summary"}`` per run, so the config stays small no matter how many errors a
+run finds.
+
+Pipelines written before this store (``propagated_errors`` and
+``propagation_results`` inline in the config) are still readable through
+the ``*_from_config`` helpers.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import heapq
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RESULTS_DIR = "results"
+DIRECT_LABEL = "direct_label"
+ERROR_KEYS = ("table_id", "row", "col_id", "confidence", "source", "val", "origin")
+_CACHE_SIZE = 4
+
+
+def results_dir(pipeline_path: str) -> str:
+    return os.path.join(pipeline_path, RESULTS_DIR)
+
+
+def run_path(pipeline_path: str, run_id: str) -> str:
+    return os.path.join(results_dir(pipeline_path), f"{run_id}.npz")
+
+
+def new_run_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(3)
+
+
+class _Vocab:
+    """Assigns dense integer ids to strings in first-seen order."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+
+    def __call__(self, value: Any) -> int:
+        key = "" if value is None else str(value)
+        if key not in self.ids:
+            self.ids[key] = len(self.ids)
+        return self.ids[key]
+
+    def array(self) -> np.ndarray:
+        return np.array(list(self.ids), dtype=str)
+
+
+def _code_dtype(n: int) -> type:
+    return np.int8 if n <= np.iinfo(np.int8).max else np.int16 if n <= np.iinfo(np.int16).max else np.int32
+
+
+def save_run(
+    pipeline_path: str, propagation_results: Dict[str, Any], run_id: Optional[str] = None
+) -> Tuple[str, Dict[str, int]]:
+    """Write one run's results and return ``(run_id, summary)``.
+
+    Every labeled error becomes a ``direct_label`` entry with confidence 1.0
+    and every propagated cell an entry whose source is its reason, matching
+    the aggregation PropagatedErrors used to store inline.
+    """
+    run_id = run_id or new_run_id()
+    tables, cols, sources, folds = _Vocab(), _Vocab(), _Vocab(), _Vocab()
+    sources(DIRECT_LABEL)
+
+    l_table, l_row, l_col, l_err, l_val, l_domain, l_cell = [], [], [], [], [], [], []
+    e_table, e_row, e_col, e_conf, e_src, e_val, e_origin = [], [], [], [], [], [], []
+    for origin, cell in enumerate(propagation_results.get("labeled_cells", [])):
+        table = cell.get("table")
+        l_table.append(tables(table))
+        l_row.append(int(cell.get("row") or 0))
+        l_col.append(cols(cell.get("col", "")))
+        l_err.append(bool(cell.get("is_error")))
+        l_val.append("" if cell.get("val") is None else str(cell.get("val")))
+        l_domain.append(folds(cell.get("domain_fold", "")))
+        l_cell.append(folds(cell.get("cell_fold", "")))
+        if not table:
+            continue
+        if cell.get("is_error"):
+            e_table.append(l_table[-1])
+            e_row.append(l_row[-1])
+            e_col.append(l_col[-1])
+            e_conf.append(1.0)
+            e_src.append(sources(DIRECT_LABEL))
+            e_val.append(l_val[-1])
+            e_origin.append(origin)
+        for prop in cell.get("propagated_cells", []):
+            e_table.append(tables(prop.get("table") or table))
+            e_row.append(int(prop.get("row") or 0))
+            e_col.append(cols(prop.get("col", "")))
+            e_conf.append(float(prop.get("confidence", 0.5)))
+            e_src.append(sources(prop.get("reason", "Unknown")))
+            e_val.append("" if prop.get("val") is None else str(prop.get("val")))
+            e_origin.append(origin)
+
+    arrays = {
+        "tables": tables.array(),
+        "cols": cols.array(),
+        "sources": sources.array(),
+        "folds": folds.array(),
+        "table_id": np.asarray(e_table, dtype=np.int32),
+        "row": np.asarray(e_row, dtype=np.int32),
+        "col_id": np.asarray(e_col, dtype=np.int32),
+        "confidence": np.asarray(e_conf, dtype=np.float16),
+        "source": np.asarray(e_src, dtype=_code_dtype(len(sources.ids))),
+        "val": np.asarray(e_val, dtype=str),
+        "origin": np.asarray(e_origin, dtype=np.int32),
+        "labeled_table_id": np.asarray(l_table, dtype=np.int32),
+        "labeled_row": np.asarray(l_row, dtype=np.int32),
+        "labeled_col_id": np.asarray(l_col, dtype=np.int32),
+        "labeled_is_error": np.asarray(l_err, dtype=bool),
+        "labeled_val": np.asarray(l_val, dtype=str),
+        "labeled_domain_fold": np.asarray(l_domain, dtype=np.int32),
+        "labeled_cell_fold": np.asarray(l_cell, dtype=np.int32),
+    }
+
+    arrays = build_index(arrays)
+    path = run_path(pipeline_path, run_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+    summary = {
+        "n_errors": int(arrays["row"].shape[0]),
+        "n_labeled": int(arrays["labeled_row"].shape[0]),
+        "n_tables": int(np.unique(arrays["table_id"]).shape[0]),
+    }
+    return run_id, summary
+
+
+def build_index(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Sort errors by (table, confidence descending) and add ``table_offsets``.
+
+    Table ``t`` owns rows ``table_offsets[t]:table_offsets[t + 1]``.
+    """
+    order = np.lexsort((-arrays["confidence"].astype(np.float32), arrays["table_id"]))
+    out = dict(arrays)
+    for key in ERROR_KEYS:
+        out[key] = arrays[key][order]
+    out["table_offsets"] = np.searchsorted(out["table_id"], np.arange(arrays["tables"].shape[0] + 1)).astype(np.int64)
+    return out
+
+
+_RUNS: "OrderedDict[Tuple[str, float], Dict[str, np.ndarray]]" = OrderedDict()
+
+
+def load_run(pipeline_path: str, run_id: str) -> Dict[str, np.ndarray]:
+    """Load a run's arrays (see save_run for the keys); recently used runs stay in memory."""
+    path = run_path(pipeline_path, run_id)
+    key = (path, os.path.getmtime(path))
+    if key in _RUNS:
+        _RUNS.move_to_end(key)
+        return _RUNS[key]
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {k: data[k] for k in data.files}
+    if "table_offsets" not in arrays:
+        arrays = build_index(arrays)
+    _RUNS[key] = arrays
+    while len(_RUNS) > _CACHE_SIZE:
+        _RUNS.popitem(last=False)
+    return arrays
+
+
+def delete_run(pipeline_path: str, run_id: str) -> None:
+    try:
+        os.remove(run_path(pipeline_path, run_id))
+    except OSError:
+        pass
+
+
+def propagated_errors(arrays: Dict[str, np.ndarray]) -> Dict[str, List[Dict[str, Any]]]:
+    """Rebuild the ``{table: [{row, col, val, confidence, source}]}`` view of a run."""
+    tables, cols, sources = arrays["tables"], arrays["cols"], arrays["sources"]
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for t, r, c, conf, s, v in zip(
+        arrays["table_id"], arrays["row"], arrays["col_id"], arrays["confidence"], arrays["source"], arrays["val"]
+    ):
+        out.setdefault(str(tables[t]), []).append(
+            {
+                "confidence": round(float(conf), 3),
+                "source": str(sources[s]),
+                "row": int(r),
+                "col": str(cols[c]),
+                "val": str(v),
+            }
+        )
+    return out
+
+
+def propagation_results(arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Rebuild the ``{"labeled_cells": [...]}`` view of a run."""
+    tables, cols, sources, folds = arrays["tables"], arrays["cols"], arrays["sources"], arrays["folds"]
+    labeled = []
+    for i in range(arrays["labeled_row"].shape[0]):
+        labeled.append(
+            {
+                "table": str(tables[arrays["labeled_table_id"][i]]),
+                "row": int(arrays["labeled_row"][i]),
+                "col": str(cols[arrays["labeled_col_id"][i]]),
+                "val": str(arrays["labeled_val"][i]),
+                "is_error": bool(arrays["labeled_is_error"][i]),
+                "domain_fold": str(folds[arrays["labeled_domain_fold"][i]]),
+                "cell_fold": str(folds[arrays["labeled_cell_fold"][i]]),
+                "propagated_cells": [],
+            }
+        )
+    direct = sources.tolist().index(DIRECT_LABEL) if DIRECT_LABEL in sources else -1
+    for t, r, c, conf, s, v, o in zip(
+        arrays["table_id"], arrays["row"], arrays["col_id"], arrays["confidence"],
+        arrays["source"], arrays["val"], arrays["origin"],
+    ):
+        if int(s) == direct or o < 0:
+            continue
+        labeled[o]["propagated_cells"].append(
+            {
+                "table": str(tables[t]),
+                "row": int(r),
+                "col": str(cols[c]),
+                "val": str(v),
+                "confidence": round(float(conf), 3),
+                "reason": str(sources[s]),
+            }
+        )
+    return {"labeled_cells": labeled}
+
+
+def arrays_from_propagated_errors(errors: Dict[str, List[Dict[str, Any]]]) -> Dict[str, np.ndarray]:
+    """Indexed arrays for a legacy ``{table: [error, ...]}`` dict."""
+    tables, cols, sources = _Vocab(), _Vocab(), _Vocab()
+    t_ids, rows, c_ids, conf, src, vals = [], [], [], [], [], []
+    for table, items in (errors or {}).items():
+        for e in items:
+            t_ids.append(tables(table))
+            rows.append(int(e.get("row") or 0))
+            c_ids.append(cols(e.get("col", "")))
+            conf.append(float(e.get("confidence", 0.5)))
+            src.append(sources(e.get("source", "Unknown")))
+            vals.append("" if e.get("val") is None else str(e.get("val")))
+    arrays = {
+        "tables": tables.array(),
+        "cols": cols.array(),
+        "sources": sources.array(),
+        "table_id": np.asarray(t_ids, dtype=np.int32),
+        "row": np.asarray(rows, dtype=np.int32),
+        "col_id": np.asarray(c_ids, dtype=np.int32),
+        "confidence": np.asarray(conf, dtype=np.float16),
+        "source": np.asarray(src, dtype=_code_dtype(len(sources.ids))),
+        "val": np.asarray(vals, dtype=str),
+        "origin": np.full(len(rows), -1, dtype=np.int32),
+    }
+    return build_index(arrays)
+
+
+# ----------------------------
+# Queries
+# ----------------------------
+def _filter_key(*parts: Any) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str], filter_key: str) -> Tuple[Dict[int, int], int]:
+    if not cursor:
+        return {}, 0
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+    if state.get("f") != filter_key:
+        raise ValueError("Cursor does not match the query filters")
+    return {int(t): int(o) for t, o in state.get("o", {}).items()}, int(state.get("n", 0))
+
+
+def _ids(vocab: np.ndarray, names: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+    if names is None:
+        return None
+    lookup = {str(v): i for i, v in enumerate(vocab.tolist())}
+    return np.asarray([lookup[n] for n in names if n in lookup], dtype=np.int64)
+
+
+def error_facets(arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Per-table error counts plus the column and source vocabularies, for filter widgets."""
+    counts = np.diff(arrays["table_offsets"])
+    return {
+        "tables": {str(t): int(n) for t, n in zip(arrays["tables"], counts) if n},
+        "cols": sorted(set(arrays["cols"].tolist())),
+        "sources": sorted(set(arrays["sources"].tolist())),
+    }
+
+
+def query_errors(
+    arrays: Dict[str, np.ndarray],
+    tables: Optional[Sequence[str]] = None,
+    cols: Optional[Sequence[str]] = None,
+    sources: Optional[Sequence[str]] = None,
+    min_confidence: float = 0.0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Top errors by confidence across tables, one page at a time.
+
+    Every table's slice is already sorted by confidence, so the confidence
+    threshold is a binary search and each page only scans from the table's
+    cursor offset until `limit` matches are found; the per-table heads are
+    then merged with a heap. The returned ``next_cursor`` encodes the
+    per-table offsets and is only valid for the same filters.
+
+    Returns:
+        ``{"errors": [...], "next_cursor": str or None, "total": int}`` where
+        each error has table/row/col/val/confidence/source.
+    """
+    limit = max(0, int(limit))
+    filter_key = _filter_key(tables, cols, sources, float(min_confidence))
+    offsets_state, served = _decode_cursor(cursor, filter_key)
+
+    offsets = arrays["table_offsets"]
+    conf = arrays["confidence"]
+    table_ids = _ids(arrays["tables"], tables)
+    if table_ids is None:
+        table_ids = np.flatnonzero(np.diff(offsets))
+    col_ids = _ids(arrays["cols"], cols)
+    src_ids = _ids(arrays["sources"], sources)
+
+    def matches(lo: int, hi: int) -> np.ndarray:
+        mask = np.ones(hi - lo, dtype=bool)
+        if col_ids is not None:
+            mask &= np.isin(arrays["col_id"][lo:hi], col_ids)
+        if src_ids is not None:
+            mask &= np.isin(arrays["source"][lo:hi], src_ids)
+        return mask
+
+    total = 0
+    heads: List[List[Tuple[float, int, int]]] = []
+    for t in table_ids.tolist():
+        start, stop = int(offsets[t]), int(offsets[t + 1])
+        end = start + int(np.searchsorted(-conf[start:stop].astype(np.float32), -float(min_confidence), side="right"))
+        total += int(matches(start, end).sum())
+        pos = start + offsets_state.get(t, 0)
+        found: List[int] = []
+        chunk = max(4 * limit, 1024)
+        while pos < end and len(found) < limit:
+            hi = min(end, pos + chunk)
+            found.extend((pos + np.flatnonzero(matches(pos, hi))).tolist())
+            pos = hi
+        heads.append([(-float(conf[i]), t, i) for i in found[:limit]])
+
+    page = list(heapq.merge(*heads))[:limit]
+    for _, t, i in page:
+        offsets_state[t] = i - int(offsets[t]) + 1
+    served += len(page)
+
+    names, col_names, src_names = arrays["tables"], arrays["cols"], arrays["sources"]
+    errors = [
+        {
+            "table": str(names[t]),
+            "row": int(arrays["row"][i]),
+            "col": str(col_names[arrays["col_id"][i]]),
+            "val": str(arrays["val"][i]),
+            "confidence": round(-neg, 3),
+            "source": str(src_names[arrays["source"][i]]),
+        }
+        for neg, t, i in page
+    ]
+    next_cursor = None
+    if served < total and page:
+        next_cursor = _encode_cursor({"f": filter_key, "o": {str(t): o for t, o in offsets_state.items()}, "n": served})
+    return {"errors": errors, "next_cursor": next_cursor, "total": total}
+
+
+# ----------------------------
+# Config helpers (with legacy fallback)
+# ----------------------------
+def latest_result(cfg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    results = cfg.get("results") or []
+    return results[-1] if results and isinstance(results[-1], dict) else None
+
+
+def run_arrays_from_config(pipeline_path: str, cfg: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """Indexed arrays of the latest run, from the store or legacy inline config keys."""
+    latest = latest_result(cfg)
+    if latest and latest.get("run_id"):
+        try:
+            return load_run(pipeline_path, latest["run_id"])
+        except OSError:
+            return None
+    legacy = cfg.get("propagated_errors") or (latest or {}).get("propagated_errors")
+    return arrays_from_propagated_errors(legacy) if legacy else None
+
+
+def propagated_errors_from_config(pipeline_path: str, cfg: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Latest run's propagated errors, from the store or legacy inline config keys."""
+    arrays = run_arrays_from_config(pipeline_path, cfg)
+    return propagated_errors(arrays) if arrays is not None else {}
+
+
+def propagation_results_from_config(pipeline_path: str, cfg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Latest run's full propagation results, from the store or legacy inline config keys."""
+    latest = latest_result(cfg)
+    if latest and latest.get("run_id"):
+        try:
+            return propagation_results(load_run(pipeline_path, latest["run_id"]))
+        except OSError:
+            return None
+    if cfg.get("propagation_results"):
+        return cfg["propagation_results"]
+    return (latest or {}).get("propagation_results")
@@ -0,0 +1,177 @@
+"""
+Retention for the multiplayer database.
+
+A background RetentionWorker periodically:
+
+1. archives sessions whose TTL has passed to ``<archive_dir>/<session_id>.json.gz``
+   (every row of the session, so results can be reconstructed) and deletes
+   their rows from the hot database,
+2. prunes seeded ``items`` that are old and no longer referenced,
+3. runs an incremental vacuum and a WAL checkpoint so the file shrinks.
+
+Completed sessions expire ``MP_RETENTION_TTL_HOURS`` (default 168) after their
+last activity; sessions that never completed expire after
+``MP_ABANDONED_TTL_HOURS`` (default 72). The worker runs every
+``MP_RETENTION_INTERVAL_S`` seconds (default 3600); ``MP_RETENTION=0``
+disables it. ``python -m backend.retention`` runs one pass.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import sessions as S
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def default_archive_dir() -> str:
+    return os.path.join(os.path.dirname(S.DB_PATH), "archive", "multiplayer")
+
+
+def archive_session(session_id: str, archive_dir: str) -> str:
+    """Write all rows of a session to a gzip-compressed JSON file; returns its path."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{session_id}.json.gz")
+    tmp = path + ".tmp"
+    payload = {"session_id": session_id, "archived_at": time.time(), "tables": S.export_session(session_id)}
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def run_retention(
+    ttl: Optional[float] = None,
+    abandoned_ttl: Optional[float] = None,
+    archive_dir: Optional[str] = None,
+    dry_run: bool = False,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """One retention pass. TTLs are in seconds; returns what was done.
+
+    Args:
+        ttl: Age after last activity at which completed sessions expire.
+        abandoned_ttl: Same for sessions that never completed.
+        archive_dir: Where session archives are written.
+        dry_run: Only report which sessions would expire.
+    """
+    ttl = _env_float("MP_RETENTION_TTL_HOURS", 168) * 3600 if ttl is None else ttl
+    abandoned_ttl = _env_float("MP_ABANDONED_TTL_HOURS", 72) * 3600 if abandoned_ttl is None else abandoned_ttl
+    archive_dir = archive_dir or default_archive_dir()
+    now = time.time() if now is None else now
+    t0 = time.perf_counter()
+
+    expired = [
+        s["session_id"]
+        for s in S.session_activity()
+        if now - float(s["last_activity"] or 0) > (ttl if s["status"] == "completed" else abandoned_ttl)
+    ]
+    stats: Dict[str, Any] = {"expired_sessions": len(expired), "archived": 0, "rows_deleted": 0}
+    if dry_run:
+        stats["sessions"] = expired
+        return stats
+
+    for sid in expired:
+        try:
+            archive_session(sid, archive_dir)
+        except Exception as e:
+            # Never delete what could not be archived
+            print(f"Retention: failed to archive session {sid}: {e}")
+            continue
+        stats["archived"] += 1
+        stats["rows_deleted"] += S.delete_session(sid)
+    stats["items_deleted"] = S.prune_items(now - ttl)
+    stats.update(S.compact())
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    stats["ran_at"] = now
+    return stats
+
+
+class RetentionWorker:
+    """Runs run_retention every `interval` seconds on a daemon thread."""
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = _env_float("MP_RETENTION_INTERVAL_S", 3600) if interval is None else float(interval)
+        self.last_stats: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "RetentionWorker":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mp-retention", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.last_stats = run_retention()
+            except Exception as e:
+                print(f"Retention pass failed: {e}")
+            self._stop.wait(self.interval)
+
+
+_WORKER: Optional[RetentionWorker] = None
+_WORKER_LOCK = threading.Lock()
+
+
+def retention_enabled() -> bool:
+    return os.environ.get("MP_RETENTION", "1").strip().lower() not in ("0", "false", "off")
+
+
+def start_retention_worker() -> Optional[RetentionWorker]:
+    global _WORKER
+    if not retention_enabled():
+        return None
+    with _WORKER_LOCK:
+        if _WORKER is None:
+            _WORKER = RetentionWorker().start()
+        return _WORKER
+
+
+def stop_retention_worker() -> None:
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is not None:
+            _WORKER.stop()
+            _WORKER = None
+
+
+def retention_metrics() -> Dict[str, Any]:
+    if _WORKER is None:
+        return {"enabled": False}
+    return {"enabled": True, "interval_s": _WORKER.interval, "last_run": _WORKER.last_stats}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive and delete expired multiplayer sessions")
+    parser.add_argument("--ttl-hours", type=float, default=None, help="TTL for completed sessions")
+    parser.add_argument("--abandoned-ttl-hours", type=float, default=None, help="TTL for unfinished sessions")
+    parser.add_argument("--archive-dir", default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    result = run_retention(
+        ttl=None if args.ttl_hours is None else args.ttl_hours * 3600,
+        abandoned_ttl=None if args.abandoned_ttl_hours is None else args.abandoned_ttl_hours * 3600,
+        archive_dir=args.archive_dir,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(result, indent=2))
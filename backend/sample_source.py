@@ -7,18 +7,18 @@ Implements backend_sample_labeling(total_samples) by reusing the app's
 existing backend.backend_sample_labeling with the most recent pipeline
 configuration under pipelines/<name>/configurations.json.
 """
-import json
 import os
 from typing import Any, Dict, List
 
 from .backend import backend_sample_labeling as single_sample
+from .pipeline_store import config_exists, load_config
 
 
 def _latest_pipeline_dir() -> str | None:
     root = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pipelines")
     try:
         dirs = [os.path.join(root, d) for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))]
-        dirs = [d for d in dirs if os.path.exists(os.path.join(d, "configurations.json"))]
+        dirs = [d for d in dirs if config_exists(d)]
         if not dirs:
             return None
         dirs.sort(key=lambda d: os.path.getmtime(d), reverse=True)
@@ -30,17 +30,21 @@ def _latest_pipeline_dir() -> str | None:
 def _load_config(pipeline_dir: str) -> Dict[str, Any]:
     cfg = {}
     try:
-        with open(os.path.join(pipeline_dir, "configurations.json"), "r") as f:
-            cfg = json.load(f)
+        cfg = load_config(pipeline_dir)
     except Exception:
         pass
     return cfg
 
 
-def backend_sample_labeling(total_samples: int, pipeline_cfg: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+def backend_sample_labeling(
+    total_samples: int,
+    pipeline_cfg: Dict[str, Any] | None = None,
+    seed: int | None = None,
+) -> List[Dict[str, Any]]:
     """Return a list of item payloads for multiplayer assignments.
 
-    total_samples = min_budget * num_players
+    total_samples = min_budget * num_players. Without an explicit seed the
+    pipeline's ``labeling_seed`` is used so the pool is reproducible.
     """
     cfg = pipeline_cfg or {}
     if not cfg:
@@ -51,6 +55,7 @@ def backend_sample_labeling(total_samples: int, pipeline_cfg: Dict[str, Any] | N
     selected_dataset = cfg.get("selected_dataset") or "Demo"
     domain_folds = cfg.get("domain_folds", {})
     cell_folds = cfg.get("cell_folds", {})
+    strategies = cfg.get("selected_strategies") or None
 
     # Reuse single-player sampler with a budget equal to total samples
     items = single_sample(
@@ -58,6 +63,8 @@ def backend_sample_labeling(total_samples: int, pipeline_cfg: Dict[str, Any] | N
         labeling_budget=int(total_samples),
         cell_folds=cell_folds,
         domain_folds=domain_folds,
+        strategies=strategies,
+        seed=seed if seed is not None else cfg.get("labeling_seed"),
     )
 
     # Ensure a stable id field named 'id' and include dataset for frontend rendering
@@ -0,0 +1,283 @@
+"""
+Vectorized sampling strategies for choosing which cells to label.
+
+Every selector works on a cell feature matrix of shape (n_cells, n_features)
+and returns the row indices of the chosen cells. Uncertainty sampling ranks
+cells by a per-cell error probability and takes a batched top-k; Core-Set
+uses greedy k-center and Diversity uses k-means++ style D^2 sampling, both
+with incremental min-distance updates so a pick costs one pass over the
+candidates.
+
+Margin and entropy ranking are not separate strategies: with two classes
+(correct / error) least confidence, margin and entropy are all monotone in
+|p_error - 0.5| and rank cells identically. Their old names are accepted as
+aliases of uncertainty sampling (see STRATEGY_ALIASES).
+
+Run ``python -m backend.sampling`` for a scaling benchmark.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Number of per-cell strategy flags carried in cell dicts ("strategy01".."strategy08")
+N_STRATEGY_FLAGS = 8
+
+# Rows processed per block in distance and top-k passes; bounds peak memory
+CHUNK_SIZE = 1_000_000
+
+
+def cell_feature_matrix(cells: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Build a float32 feature matrix from the cells' strategy flags.
+
+    Args:
+        cells: Cell dicts as produced by quality-based folding; each may carry
+            a ``strategies`` dict of ``strategyNN -> bool``.
+
+    Returns:
+        np.ndarray: Array of shape (len(cells), N_STRATEGY_FLAGS) with 1.0 where
+        a detection strategy flagged the cell.
+    """
+    keys = [f"strategy{i:02d}" for i in range(1, N_STRATEGY_FLAGS + 1)]
+    features = np.zeros((len(cells), N_STRATEGY_FLAGS), dtype=np.float32)
+    for i, cell in enumerate(cells):
+        flags = cell.get("strategies") or {}
+        features[i] = [1.0 if flags.get(k) else 0.0 for k in keys]
+    return features
+
+
+def error_probabilities(features: np.ndarray) -> np.ndarray:
+    """Return an (n, 2) class probability matrix [p_correct, p_error].
+
+    The error probability is the Laplace-smoothed fraction of detection
+    strategies that flagged the cell.
+    """
+    votes = features.sum(axis=1, dtype=np.float32)
+    p_err = (votes + 1.0) / (features.shape[1] + 2.0)
+    return np.stack([1.0 - p_err, p_err], axis=1).astype(np.float32, copy=False)
+
+
+# ----------------------------
+# Score functions (higher = more informative)
+# ----------------------------
+def least_confidence(proba: np.ndarray) -> np.ndarray:
+    return 1.0 - proba.max(axis=1)
+
+
+def top_k(scores: np.ndarray, k: int, rng: np.random.Generator, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """Indices of the k highest scores, best first.
+
+    Scans the scores in blocks and keeps only a running candidate set of size
+    k, so memory stays O(chunk_size + k). Ties are broken randomly via a tiny
+    per-block jitter so equal scores do not favour low row numbers.
+    """
+    n = scores.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    cand_idx = np.empty(0, dtype=np.int64)
+    cand_val = np.empty(0, dtype=np.float64)
+    for start in range(0, n, chunk_size):
+        block = scores[start:start + chunk_size].astype(np.float64)
+        block += rng.random(block.shape[0]) * 1e-9
+        if block.shape[0] > k:
+            part = np.argpartition(block, -k)[-k:]
+        else:
+            part = np.arange(block.shape[0])
+        cand_idx = np.concatenate([cand_idx, part + start])
+        cand_val = np.concatenate([cand_val, block[part]])
+        if cand_idx.shape[0] > k:
+            keep = np.argpartition(cand_val, -k)[-k:]
+            cand_idx, cand_val = cand_idx[keep], cand_val[keep]
+
+    order = np.argsort(-cand_val, kind="stable")
+    return cand_idx[order]
+
+
+def _sq_dist_to(features: np.ndarray, center: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    out = np.empty(features.shape[0], dtype=np.float32)
+    for start in range(0, features.shape[0], chunk_size):
+        diff = features[start:start + chunk_size] - center
+        out[start:start + chunk_size] = np.einsum("ij,ij->i", diff, diff)
+    return out
+
+
+def _fill_random(chosen: List[int], taken: np.ndarray, k: int, rng: np.random.Generator) -> None:
+    """Top up `chosen` with random untaken rows once distances are exhausted."""
+    need = k - len(chosen)
+    if need <= 0:
+        return
+    rest = np.flatnonzero(~taken)
+    extra = rng.choice(rest, size=min(need, rest.shape[0]), replace=False)
+    chosen.extend(int(i) for i in extra)
+    taken[extra] = True
+
+
+# ----------------------------
+# Selectors: (features, k, rng) -> indices
+# ----------------------------
+def select_uncertainty(features: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    return top_k(least_confidence(error_probabilities(features)), k, rng)
+
+
+def select_core_set(features: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Greedy k-center: repeatedly pick the cell farthest from all picks so far."""
+    n = features.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    taken = np.zeros(n, dtype=bool)
+    first = int(rng.integers(n))
+    chosen = [first]
+    taken[first] = True
+    min_dist = _sq_dist_to(features, features[first])
+    min_dist[taken] = -1.0
+
+    while len(chosen) < k:
+        nxt = int(np.argmax(min_dist))
+        if min_dist[nxt] <= 0.0:
+            # Every remaining cell duplicates a center; spread the rest randomly
+            _fill_random(chosen, taken, k, rng)
+            break
+        chosen.append(nxt)
+        taken[nxt] = True
+        np.minimum(min_dist, _sq_dist_to(features, features[nxt]), out=min_dist)
+        min_dist[nxt] = -1.0
+    return np.asarray(chosen, dtype=np.int64)
+
+
+def select_diversity(features: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding: sample each pick with probability proportional to D^2."""
+    n = features.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    taken = np.zeros(n, dtype=bool)
+    first = int(rng.integers(n))
+    chosen = [first]
+    taken[first] = True
+    min_dist = _sq_dist_to(features, features[first])
+    min_dist[first] = 0.0
+
+    while len(chosen) < k:
+        cum = np.cumsum(min_dist, dtype=np.float64)
+        total = cum[-1]
+        if total <= 0.0:
+            _fill_random(chosen, taken, k, rng)
+            break
+        nxt = int(np.searchsorted(cum, rng.random() * total, side="right"))
+        nxt = min(nxt, n - 1)
+        if taken[nxt]:
+            continue
+        chosen.append(nxt)
+        taken[nxt] = True
+        np.minimum(min_dist, _sq_dist_to(features, features[nxt]), out=min_dist)
+        min_dist[nxt] = 0.0
+    return np.asarray(chosen, dtype=np.int64)
+
+
+SAMPLING_STRATEGIES: Dict[str, Callable[[np.ndarray, int, np.random.Generator], np.ndarray]] = {
+    "Uncertainty Sampling": select_uncertainty,
+    "Diversity Sampling": select_diversity,
+    "Core-Set Selection": select_core_set,
+}
+
+# Names of earlier strategies that ranked exactly like uncertainty sampling;
+# saved pipeline configurations may still list them
+STRATEGY_ALIASES: Dict[str, str] = {
+    "Margin Confidence": "Uncertainty Sampling",
+    "Entropy Ranking": "Uncertainty Sampling",
+}
+
+
+def canonical_strategies(strategies: Optional[Sequence[str]]) -> List[str]:
+    """Resolve aliases and drop duplicates, keeping the first occurrence's position."""
+    out: List[str] = []
+    for name in strategies or []:
+        name = STRATEGY_ALIASES.get(name, name)
+        if name not in out:
+            out.append(name)
+    return out
+
+
+def select_cells(
+    strategies: Optional[Sequence[str]],
+    features: np.ndarray,
+    budget: int,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """Select `budget` row indices, splitting the budget across strategies.
+
+    Each known strategy gets an equal share (the remainder goes to the first
+    ones) and runs on the cells not yet picked by earlier strategies. Aliases
+    count as the strategy they name. Unknown or missing strategies fall back
+    to uniform random sampling.
+
+    Args:
+        strategies: Strategy names from SAMPLING_STRATEGIES, in priority order.
+        features: Cell feature matrix of shape (n_cells, n_features).
+        budget: Number of cells to select.
+        rng: Optional numpy Generator for reproducible picks.
+
+    Returns:
+        np.ndarray: Unique row indices into `features`, at most `budget` long.
+    """
+    rng = rng or np.random.default_rng()
+    n = features.shape[0]
+    budget = min(int(budget), n)
+    known = [s for s in canonical_strategies(strategies) if s in SAMPLING_STRATEGIES]
+    if budget <= 0:
+        return np.empty(0, dtype=np.int64)
+    if not known:
+        return rng.choice(n, size=budget, replace=False)
+
+    shares = [budget // len(known) + (1 if i < budget % len(known) else 0) for i in range(len(known))]
+    remaining = np.arange(n)
+    picked: List[np.ndarray] = []
+    for name, share in zip(known, shares):
+        if share <= 0 or remaining.shape[0] == 0:
+            continue
+        sub = features if remaining.shape[0] == n else features[remaining]
+        local = SAMPLING_STRATEGIES[name](sub, share, rng)
+        chosen = remaining[local]
+        picked.append(chosen)
+        mask = np.ones(remaining.shape[0], dtype=bool)
+        mask[local] = False
+        remaining = remaining[mask]
+    return np.concatenate(picked) if picked else np.empty(0, dtype=np.int64)
+
+
+def _benchmark(sizes: Sequence[int], budget: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    print(f"{'cells':>12} {'strategy':<22} {'seconds':>9}")
+    for n in sizes:
+        features = (rng.random((n, N_STRATEGY_FLAGS), dtype=np.float32) < 0.3).astype(np.float32)
+        for name, fn in SAMPLING_STRATEGIES.items():
+            t0 = time.perf_counter()
+            idx = fn(features, budget, np.random.default_rng(seed))
+            dt = time.perf_counter() - t0
+            assert len(np.unique(idx)) == min(budget, n)
+            print(f"{n:>12,} {name:<22} {dt:>9.3f}")
+        del features
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark vectorized sampling strategies")
+    parser.add_argument(
+        "--sizes",
+        type=float,
+        nargs="+",
+        default=[1e4, 1e5, 1e6, 1e7],
+        help="Candidate cell counts to benchmark",
+    )
+    parser.add_argument("--budget", type=int, default=100, help="Cells selected per run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    _benchmark([int(s) for s in args.sizes], args.budget, args.seed)
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import os
+import pathlib
+import re
 import sqlite3
 import time
 import uuid
 import random
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .namegen import generate_unique_name
 
@@ -17,24 +23,268 @@ DB_PATH = os.environ.get(
 )
 
 
-def _connect() -> sqlite3.Connection:
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+# Applied once per connection; WAL lets readers proceed while a writer commits
+PRAGMAS = (
+    # Only takes effect on a new file; retention converts existing ones once
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Rows per executemany call when bulk-inserting pools and seeds
+WRITE_CHUNK = 5000
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Sharded mode (MP_SHARDED=1): DB_PATH only holds the session catalog and seeded
+# items; each session's players, pool, assignments and labels live in their own
+# file under MP_SHARD_DIR, so sessions never wait on each other's write lock.
+# Completed sessions are moved to MP_SHARD_DIR/archive. At most MP_SHARD_CACHE
+# session files stay open per thread (least recently used are closed first).
+SHARDED = os.environ.get("MP_SHARDED", "0").strip().lower() in ("1", "true", "on")
+SHARD_CACHE = max(1, int(_env_float("MP_SHARD_CACHE", 16)))
+_SHARD_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# Work queue: players lease pool items for LEASE_SECONDS; the lease is renewed
+# whenever they submit labels and expired leases are handed to other players.
+LEASE_SECONDS = _env_float("MP_LEASE_SECONDS", 300)
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready: set = set()
+
+# Time writers spend waiting for the write lock (BEGIN IMMEDIATE); see lock_stats()
+LOCK_WAIT_THRESHOLD_MS = 1.0
+_lock_stats = {"write_txns": 0, "lock_waits": 0, "lock_wait_ms": 0.0, "max_lock_wait_ms": 0.0, "lock_timeouts": 0}
+_lock_stats_lock = threading.Lock()
+
+
+def _open(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
+def _connect(session_id: Optional[str] = None) -> sqlite3.Connection:
+    """Return this thread's long-lived connection to DB_PATH, or to a session's file.
+
+    The connection is opened (and the schema created) on first use; callers
+    use it as ``with _connect() as conn:`` which commits or rolls back but
+    keeps the connection open. Outside sharded mode every session lives in
+    DB_PATH; in sharded mode an unknown session also falls back to DB_PATH,
+    whose session tables are empty.
+    """
+    path = _route(session_id)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = OrderedDict()
+    conn = conns.get(path)
+    if conn is None:
+        conn = conns[path] = _open(path)
+        if len(conns) > SHARD_CACHE + 1:
+            # Close the least recently used session file (never the catalog)
+            stale = next(p for p in conns if p != DB_PATH and p != path)
+            conns.pop(stale).close()
+    else:
+        conns.move_to_end(path)
+    if path not in _schema_ready:
+        _init_schema(conn, path)
+    return conn
+
+
+def _route(session_id: Optional[str]) -> str:
+    if SHARDED and session_id is not None:
+        return _shard_path(session_id) or DB_PATH
+    return DB_PATH
+
+
+@contextmanager
+def _write_txn(session_id: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """One write transaction on this thread's connection (see _connect).
+
+    BEGIN IMMEDIATE takes the write lock up front, so concurrent writers wait
+    on busy_timeout instead of failing when upgrading from a read. In sharded
+    mode a writer that waited on a session file while _archive_shard moved it
+    would get the lock on the removed file; it rolls back and starts over on
+    the archived copy instead.
+    """
+    while True:
+        path = _route(session_id)
+        conn = _connect(session_id)
+        t0 = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            _record_lock_wait((time.perf_counter() - t0) * 1000, timed_out=True)
+            raise
+        _record_lock_wait((time.perf_counter() - t0) * 1000)
+        if path == DB_PATH or os.path.exists(path):
+            break
+        conn.rollback()
+        _close_connection(path)
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _record_lock_wait(ms: float, timed_out: bool = False) -> None:
+    with _lock_stats_lock:
+        _lock_stats["write_txns"] += 1
+        if timed_out:
+            _lock_stats["lock_timeouts"] += 1
+        if ms >= LOCK_WAIT_THRESHOLD_MS:
+            _lock_stats["lock_waits"] += 1
+            _lock_stats["lock_wait_ms"] += ms
+            _lock_stats["max_lock_wait_ms"] = max(_lock_stats["max_lock_wait_ms"], ms)
+
+
+def lock_stats() -> Dict[str, float]:
+    """Write transactions and how often/long they waited for the SQLite write lock."""
+    with _lock_stats_lock:
+        stats = dict(_lock_stats)
+    stats["lock_wait_ms"] = round(stats["lock_wait_ms"], 3)
+    stats["max_lock_wait_ms"] = round(stats["max_lock_wait_ms"], 3)
+    return stats
+
+
+def _chunks(rows: Iterable[tuple], size: int = WRITE_CHUNK) -> Iterator[List[tuple]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def close_connections() -> None:
+    """Close the calling thread's connections (e.g. before deleting the DB file)."""
+    for conn in getattr(_local, "conns", {}).values():
+        conn.close()
+    _local.conns = OrderedDict()
+
+
+def _close_connection(path: str) -> None:
+    conn = getattr(_local, "conns", {}).pop(path, None)
+    if conn is not None:
+        conn.close()
+
+
+# ----------------------------
+# Session files (sharded mode)
+# ----------------------------
+def shard_dir() -> str:
+    return os.environ.get("MP_SHARD_DIR") or os.path.join(os.path.dirname(DB_PATH), "multiplayer_sessions")
+
+
+def _shard_path(session_id: str) -> Optional[str]:
+    """The session's live file, else its archived file, else None."""
+    if not _SHARD_ID.match(session_id):
+        return None
+    name = f"{session_id}.sqlite3"
+    for path in (os.path.join(shard_dir(), name), os.path.join(shard_dir(), "archive", name)):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _create_shard(session_id: str) -> sqlite3.Connection:
+    path = os.path.join(shard_dir(), f"{session_id}.sqlite3")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "ab").close()  # an empty file is an empty database
+    return _connect(session_id)
+
+
+def _archive_shard(session_id: str) -> Optional[str]:
+    """Move a completed session's file to the archive folder; returns the new path.
+
+    The copy is taken with the backup API while the session's write lock is
+    held, so it contains every committed label. Writers already waiting for
+    that lock find the live file gone once they get it and retry on the
+    archived copy (see _write_txn).
+    """
+    live = os.path.join(shard_dir(), f"{session_id}.sqlite3")
+    if _shard_path(session_id) != live:
+        return None
+    target = os.path.join(shard_dir(), "archive", f"{session_id}.sqlite3")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".tmp"
+    with _write_txn(session_id):
+        # A second connection reads the committed state while ours holds the lock
+        source, dest = sqlite3.connect(live), sqlite3.connect(tmp)
+        try:
+            source.backup(dest)
+        finally:
+            source.close()
+            dest.close()
+        os.replace(tmp, target)
+        _remove_db_files(live)
+    _close_connection(live)
+    return target
+
+
+def _remove_db_files(path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def _last_label_at(path: str) -> float:
+    # Short-lived connection so scanning every session does not churn the LRU
+    conn = sqlite3.connect(f"{pathlib.Path(os.path.abspath(path)).as_uri()}?mode=rw", uri=True)
+    try:
+        return float(conn.execute("SELECT MAX(labeled_at) FROM labels").fetchone()[0] or 0)
+    finally:
+        conn.close()
+
+
+def _catalog_status(session_id: str, status: str) -> None:
+    """Mirror a session status change into the catalog (sharded mode only)."""
+    if SHARDED:
+        with _connect() as conn:
+            conn.execute("UPDATE sessions SET status=? WHERE session_id=?", (status, session_id))
+
+
 def init_db() -> None:
-    conn = _connect()
+    """Create the schema if needed; a no-op after the first call in this process."""
+    _connect()
+
+
+def _init_schema(conn: sqlite3.Connection, path: str) -> None:
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        _create_schema(conn)
+        _schema_ready.add(path)
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
     cur = conn.cursor()
     cur.executescript(
         """
-        PRAGMA journal_mode=WAL;
         CREATE TABLE IF NOT EXISTS sessions (
             session_id TEXT PRIMARY KEY,
             created_at REAL NOT NULL,
             status TEXT NOT NULL,
-            min_budget INTEGER NOT NULL
+            min_budget INTEGER NOT NULL,
+            expected_players INTEGER NOT NULL DEFAULT 1
         );
 
         CREATE TABLE IF NOT EXISTS players (
@@ -43,12 +293,15 @@ def init_db() -> None:
             display_name TEXT NOT NULL,
             role TEXT NOT NULL,
             status TEXT NOT NULL,
+            assigned_count INTEGER NOT NULL DEFAULT 0,
+            labeled_count INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY(session_id) REFERENCES sessions(session_id)
         );
 
         CREATE TABLE IF NOT EXISTS items (
             item_id TEXT PRIMARY KEY,
-            payload TEXT
+            payload TEXT,
+            created_at REAL
         );
 
         -- Ordered per-session pool provided by host
@@ -61,6 +314,9 @@ def init_db() -> None:
             row_index INTEGER,
             col_name TEXT,
             val TEXT,
+            leased_by TEXT,
+            lease_expires_at REAL,
+            labeled INTEGER NOT NULL DEFAULT 0,
             PRIMARY KEY(session_id, seq)
         );
 
@@ -89,14 +345,77 @@ def init_db() -> None:
         );
 
         CREATE INDEX IF NOT EXISTS idx_sessions_session_id ON sessions(session_id);
+        CREATE INDEX IF NOT EXISTS idx_samples_session_sample ON session_samples(session_id, sample_id);
         CREATE INDEX IF NOT EXISTS idx_players_session ON players(session_id);
         CREATE INDEX IF NOT EXISTS idx_assign_session_player ON assignments(session_id, player_id);
         CREATE INDEX IF NOT EXISTS idx_assign_session_item ON assignments(session_id, item_id);
         CREATE INDEX IF NOT EXISTS idx_labels_session_player ON labels(session_id, player_id);
+        -- Covering indexes for progress: last activity per player, assignments per player
+        CREATE INDEX IF NOT EXISTS idx_labels_session_player_time ON labels(session_id, player_id, labeled_at);
+        -- Latest label per sample (merged_labels) without a sort
+        CREATE INDEX IF NOT EXISTS idx_labels_session_item_time ON labels(session_id, item_id, labeled_at);
+        CREATE INDEX IF NOT EXISTS idx_assign_session_player_item ON assignments(session_id, player_id, item_id);
         """
     )
+    # Columns added after the first release; CREATE TABLE IF NOT EXISTS leaves old DBs untouched
+    _ensure_columns(conn, "sessions", {"expected_players": "INTEGER NOT NULL DEFAULT 1"})
+    _ensure_columns(conn, "items", {"created_at": "REAL"})
+    added = _ensure_columns(
+        conn,
+        "players",
+        {"assigned_count": "INTEGER NOT NULL DEFAULT 0", "labeled_count": "INTEGER NOT NULL DEFAULT 0"},
+    )
+    if _ensure_columns(
+        conn,
+        "session_samples",
+        {"leased_by": "TEXT", "lease_expires_at": "REAL", "labeled": "INTEGER NOT NULL DEFAULT 0"},
+    ):
+        # Static block assignments become already-expired leases
+        conn.execute(
+            """
+            UPDATE session_samples SET
+                labeled = EXISTS (SELECT 1 FROM labels l
+                                  WHERE l.session_id = session_samples.session_id AND l.item_id = session_samples.sample_id),
+                leased_by = (SELECT a.player_id FROM assignments a
+                             WHERE a.session_id = session_samples.session_id AND a.item_id = session_samples.sample_id),
+                lease_expires_at = 0
+            """
+        )
+        conn.execute("UPDATE session_samples SET leased_by = NULL, lease_expires_at = NULL WHERE leased_by IS NULL OR labeled = 1")
+    # Partial indexes: the next open items of a session and its live leases.
+    # A player's leases are read in seq order; without seq in the index the
+    # planner walked the whole pool by primary key instead (query_plans).
+    conn.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_samples_open ON session_samples(session_id, seq)
+            WHERE labeled = 0 AND leased_by IS NULL;
+        CREATE INDEX IF NOT EXISTS idx_samples_leases ON session_samples(session_id, lease_expires_at)
+            WHERE labeled = 0 AND leased_by IS NOT NULL;
+        DROP INDEX IF EXISTS idx_samples_holder;
+        CREATE INDEX IF NOT EXISTS idx_samples_holder_seq ON session_samples(session_id, leased_by, seq)
+            WHERE labeled = 0 AND leased_by IS NOT NULL;
+        """
+    )
+    if added:
+        # Counters are maintained incrementally from now on; backfill them once
+        conn.execute(
+            """
+            UPDATE players SET
+                assigned_count = (SELECT COUNT(*) FROM assignments a WHERE a.player_id = players.player_id),
+                labeled_count = (SELECT COUNT(*) FROM labels l WHERE l.player_id = players.player_id)
+            """
+        )
     conn.commit()
-    conn.close()
+
+
+def _ensure_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> List[str]:
+    existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    added = []
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+            added.append(name)
+    return added
 
 
 def _generate_session_id() -> str:
@@ -104,16 +423,24 @@ def _generate_session_id() -> str:
     return "".join(random.choices(alphabet, k=8))
 
 
-def create_session(min_budget: int = 10) -> Dict:
-    init_db()
+def create_session(min_budget: int = 10, expected_players: int = 1) -> Dict:
     sid = _generate_session_id()
     created_at = time.time()
+    row = (sid, created_at, "lobby", int(min_budget), int(expected_players))
+    insert = "INSERT INTO sessions(session_id, created_at, status, min_budget, expected_players) VALUES (?,?,?,?,?)"
+    if SHARDED:
+        # The session file keeps its own copy of the row for in-session queries
+        with _create_shard(sid) as conn:
+            conn.execute(insert, row)
     with _connect() as conn:
-        conn.execute(
-            "INSERT INTO sessions(session_id, created_at, status, min_budget) VALUES (?,?,?,?)",
-            (sid, created_at, "lobby", int(min_budget)),
-        )
-    return {"session_id": sid, "created_at": created_at, "status": "lobby", "min_budget": min_budget}
+        conn.execute(insert, row)
+    return {
+        "session_id": sid,
+        "created_at": created_at,
+        "status": "lobby",
+        "min_budget": min_budget,
+        "expected_players": int(expected_players),
+    }
 
 
 def get_session(session_id: str) -> Optional[sqlite3.Row]:
@@ -123,7 +450,7 @@ def get_session(session_id: str) -> Optional[sqlite3.Row]:
 
 
 def list_players(session_id: str) -> List[sqlite3.Row]:
-    with _connect() as conn:
+    with _connect(session_id) as conn:
         rows = conn.execute(
             "SELECT player_id, display_name, role, status FROM players WHERE session_id=? ORDER BY rowid",
             (session_id,),
@@ -138,28 +465,24 @@ def create_player(session_id: str, role: str) -> Dict:
     used = {p["display_name"] for p in list_players(session_id)}
     display_name = generate_unique_name(used)
     player_id = str(uuid.uuid4())
-    with _connect() as conn:
+    # Players joining a running session start pulling work right away
+    status = "labeling" if sess["status"] == "active" else "lobby"
+    with _write_txn(session_id) as conn:
         conn.execute(
             "INSERT INTO players(player_id, session_id, display_name, role, status) VALUES (?,?,?,?,?)",
-            (player_id, session_id, display_name, role, "lobby"),
+            (player_id, session_id, display_name, role, status),
         )
     return {"player_id": player_id, "display_name": display_name}
 
 
 def seed_items_from_list(items: List[Tuple[str, str]]) -> int:
     """Seed items as (item_id, payload) list. Returns count inserted (ignores existing)."""
-    init_db()
-    with _connect() as conn:
-        cur = conn.cursor()
-        count = 0
-        for iid, payload in items:
-            try:
-                cur.execute("INSERT OR IGNORE INTO items(item_id, payload) VALUES (?,?)", (str(iid), payload))
-                count += cur.rowcount > 0
-            except Exception:
-                continue
-        conn.commit()
-    return int(count)
+    tnow = time.time()
+    with _write_txn() as conn:
+        before = conn.total_changes
+        for chunk in _chunks((str(iid), payload, tnow) for iid, payload in items):
+            conn.executemany("INSERT OR IGNORE INTO items(item_id, payload, created_at) VALUES (?,?,?)", chunk)
+        return int(conn.total_changes - before)
 
 
 def seed_items_from_csv(csv_path: str, id_column: Optional[str] = None) -> int:
@@ -183,12 +506,13 @@ def _list_all_item_ids() -> List[str]:
 
 
 def _assigned_items_in_session(session_id: str) -> set:
-    with _connect() as conn:
+    with _connect(session_id) as conn:
         rows = conn.execute("SELECT item_id FROM assignments WHERE session_id=?", (session_id,)).fetchall()
         return {r["item_id"] for r in rows}
 
 
 def start_session(session_id: str) -> Dict:
+    """Activate the session; players then lease work with get_player_batch."""
     sess = get_session(session_id)
     if not sess:
         raise ValueError("Session not found")
@@ -197,71 +521,105 @@ def start_session(session_id: str) -> Dict:
 
     min_budget = int(sess["min_budget"])
     players = list_players(session_id)
-    # Include host in assignments so host can label too
+    # The host labels too
     if not players:
         raise ValueError("No players registered")
 
-    # Use ordered session pool if provided by host
-    with _connect() as conn:
-        pool_rows = conn.execute(
-            "SELECT seq, sample_id FROM session_samples WHERE session_id=? ORDER BY seq",
-            (session_id,),
-        ).fetchall()
-
-    total_needed = min_budget * len(players)
-    if not pool_rows or len(pool_rows) < total_needed:
+    pool_size = _pool_size(session_id)
+    if not pool_size or pool_size < min_budget * len(players):
         raise ValueError("Session pool not prepared by host or insufficient samples")
 
-    assignments: List[Tuple[str, str, str, float]] = []  # (session_id, player_id, item_id, assigned_at)
-    tnow = time.time()
-
-    # Assign contiguous blocks per player
-    for i, p in enumerate(players):
-        pid = p["player_id"]
-        start = i * min_budget
-        end = start + min_budget
-        for row in pool_rows[start:end]:
-            sample_id = row["sample_id"]
-            assignments.append((session_id, pid, sample_id, tnow))
-
-    with _connect() as conn:
-        cur = conn.cursor()
-        cur.executemany(
-            "INSERT OR REPLACE INTO assignments(assignment_id, session_id, player_id, item_id, assigned_at) VALUES (?,?,?,?,?)",
-            [
-                (str(uuid.uuid4()), session_id, pid, item_id, ts)
-                for (session_id, pid, item_id, ts) in assignments
-            ],
-        )
-        cur.execute("UPDATE sessions SET status='active' WHERE session_id=?", (session_id,))
-        cur.execute(
+    with _write_txn(session_id) as conn:
+        conn.execute("UPDATE sessions SET status='active' WHERE session_id=?", (session_id,))
+        conn.execute(
             "UPDATE players SET status='labeling' WHERE session_id=? AND status='lobby'",
             (session_id,),
         )
-        conn.commit()
+    _catalog_status(session_id, "active")
+    return {"status": "active", "pool": pool_size}
+
 
-    return {"status": "active", "assigned": len(assignments)}
+def _pool_size(session_id: str) -> int:
+    with _connect(session_id) as conn:
+        return int(
+            conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM session_samples WHERE session_id=?", (session_id,)
+            ).fetchone()[0]
+        )
 
 
 def set_status(session_id: str, status: str) -> None:
-    with _connect() as conn:
+    with _write_txn(session_id) as conn:
         conn.execute("UPDATE sessions SET status=? WHERE session_id=?", (status, session_id))
-        conn.commit()
-
-
-def get_player_batch(session_id: str, player_id: str) -> List[Dict]:
-    with _connect() as conn:
-        rows = conn.execute(
+    _catalog_status(session_id, status)
+
+
+def get_player_batch(session_id: str, player_id: str, limit: Optional[int] = None) -> List[Dict]:
+    """Lease up to `limit` items of the session pool to a player (pull-based work queue).
+
+    Items the player already holds are returned first and their lease renewed,
+    so reloading the page gives the same cards. The rest are the lowest-seq
+    items that are neither labeled nor leased; expired leases are reclaimed
+    first so abandoned work goes to whoever asks next. When nothing is left
+    for the player, they are marked done. Defaults to the session's
+    min_budget items per call.
+    """
+    now = time.time()
+    expires = now + LEASE_SECONDS
+    with _write_txn(session_id) as conn:
+        sess = conn.execute("SELECT status, min_budget FROM sessions WHERE session_id=?", (session_id,)).fetchone()
+        if not sess or sess["status"] != "active":
+            return []
+        limit = int(limit or sess["min_budget"])
+        _reclaim_expired(conn, session_id, now)
+
+        held = conn.execute(
             """
-            SELECT a.item_id as sample_id,
-                   s.dataset, s.table_name, s.row_index, s.col_name, s.val
-            FROM assignments a
-            JOIN session_samples s
-              ON s.session_id = a.session_id AND s.sample_id = a.item_id
-            WHERE a.session_id=? AND a.player_id=?
-            ORDER BY a.assigned_at, s.seq
+            SELECT seq FROM session_samples
+            WHERE session_id=? AND leased_by=? AND labeled=0
+            ORDER BY seq LIMIT ?
             """,
-            (session_id, player_id),
+            (session_id, player_id, limit),
+        ).fetchall()
+        fresh = conn.execute(
+            """
+            SELECT seq, sample_id FROM session_samples
+            WHERE session_id=? AND labeled=0 AND leased_by IS NULL
+            ORDER BY seq LIMIT ?
+            """,
+            (session_id, limit - len(held)),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE session_samples SET lease_expires_at=? WHERE session_id=? AND seq=?",
+            [(expires, session_id, r["seq"]) for r in held],
+        )
+        if fresh:
+            conn.executemany(
+                "UPDATE session_samples SET leased_by=?, lease_expires_at=? WHERE session_id=? AND seq=?",
+                [(player_id, expires, session_id, r["seq"]) for r in fresh],
+            )
+            conn.executemany(
+                "INSERT INTO assignments(assignment_id, session_id, player_id, item_id, assigned_at) VALUES (?,?,?,?,?)",
+                [(str(uuid.uuid4()), session_id, player_id, r["sample_id"], now) for r in fresh],
+            )
+            conn.execute(
+                "UPDATE players SET assigned_count = assigned_count + ? WHERE player_id=?",
+                (len(fresh), player_id),
+            )
+        seqs = [r["seq"] for r in held] + [r["seq"] for r in fresh]
+        if not seqs:
+            conn.execute("UPDATE players SET status='done' WHERE player_id=? AND status != 'done'", (player_id,))
+            return []
+        # A player who ran dry earlier gets reclaimed work
+        conn.execute("UPDATE players SET status='labeling' WHERE player_id=? AND status='done'", (player_id,))
+        marks = ",".join("?" * len(seqs))
+        rows = conn.execute(
+            f"""
+            SELECT sample_id, dataset, table_name, row_index, col_name, val, lease_expires_at
+            FROM session_samples WHERE session_id=? AND seq IN ({marks})
+            ORDER BY seq
+            """,
+            (session_id, *seqs),
         ).fetchall()
     return [
         {
@@ -271,71 +629,215 @@ def get_player_batch(session_id: str, player_id: str) -> List[Dict]:
             "row": r["row_index"],
             "col": r["col_name"],
             "val": r["val"],
+            "lease_expires_at": r["lease_expires_at"],
         }
         for r in rows
     ]
 
 
+def _reclaim_expired(conn: sqlite3.Connection, session_id: str, now: float) -> int:
+    """Return expired, unlabeled leases of a session to the open pool."""
+    expired = conn.execute(
+        """
+        SELECT seq, sample_id, leased_by FROM session_samples
+        WHERE session_id=? AND labeled=0 AND leased_by IS NOT NULL AND lease_expires_at < ?
+        """,
+        (session_id, now),
+    ).fetchall()
+    if not expired:
+        return 0
+    conn.executemany(
+        "UPDATE session_samples SET leased_by=NULL, lease_expires_at=NULL WHERE session_id=? AND seq=?",
+        [(session_id, r["seq"]) for r in expired],
+    )
+    conn.executemany(
+        "DELETE FROM assignments WHERE session_id=? AND player_id=? AND item_id=?",
+        [(session_id, r["leased_by"], r["sample_id"]) for r in expired],
+    )
+    conn.executemany(
+        "UPDATE players SET assigned_count = MAX(0, assigned_count - 1) WHERE player_id=?",
+        [(r["leased_by"],) for r in expired],
+    )
+    return len(expired)
+
+
+def reclaim_expired_leases(session_id: str) -> int:
+    """Reclaim expired leases now (they are also reclaimed lazily on the next lease)."""
+    with _write_txn(session_id) as conn:
+        return _reclaim_expired(conn, session_id, time.time())
+
+
 def upsert_labels(session_id: str, player_id: str, labels: List[Dict[str, str]]) -> int:
+    """Insert or update a batch of labels in one transaction. Returns the batch size.
+
+    Work is O(batch): new labels are found with a lookup on UNIQUE(player_id,
+    item_id) and the player's labeled_count is bumped by that number instead
+    of recounting the session.
+    """
+    return upsert_label_batches([(session_id, player_id, labels)])
+
+
+def upsert_label_batches(batches: Iterable[Tuple[str, str, List[Dict[str, str]]]]) -> int:
+    """Apply label batches of several players in a single transaction (group commit).
+
+    In sharded mode there is one transaction per session file instead.
+
+    Args:
+        batches: (session_id, player_id, labels) tuples; labels as for upsert_labels.
+    """
     tnow = time.time()
-    with _connect() as conn:
-        cur = conn.cursor()
-        count = 0
-        for item in labels:
-            iid = str(item.get("item_id") or item.get("sample_id"))
-            val = str(item.get("label_value"))
-            lid = str(uuid.uuid4())
-            cur.execute(
-                """
-                INSERT INTO labels(label_id, session_id, player_id, item_id, label_value, labeled_at)
-                VALUES (?,?,?,?,?,?)
-                ON CONFLICT(player_id, item_id) DO UPDATE SET
-                    label_value=excluded.label_value,
-                    labeled_at=excluded.labeled_at
+    total = 0
+    groups: Dict[Optional[str], List[Tuple[str, str, List[Dict[str, str]]]]] = {}
+    for batch in batches:
+        groups.setdefault(batch[0] if SHARDED else None, []).append(batch)
+    for shard, group in groups.items():
+        with _write_txn(shard) as conn:
+            for session_id, player_id, labels in group:
+                _upsert_player_labels(conn, session_id, player_id, labels, tnow)
+                total += len(labels)
+    return total
+
+
+def _upsert_player_labels(
+    conn: sqlite3.Connection, session_id: str, player_id: str, labels: List[Dict[str, str]], tnow: float
+) -> None:
+    latest: Dict[str, str] = {}
+    for item in labels:
+        latest[str(item.get("item_id") or item.get("sample_id"))] = str(item.get("label_value"))
+    if not latest:
+        return
+    item_ids = list(latest)
+    existing = set()
+    for chunk in _chunks(((iid,) for iid in item_ids), 500):
+        marks = ",".join("?" * len(chunk))
+        existing.update(
+            r[0]
+            for r in conn.execute(
+                f"SELECT item_id FROM labels WHERE player_id=? AND item_id IN ({marks})",
+                (player_id, *(c[0] for c in chunk)),
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO labels(label_id, session_id, player_id, item_id, label_value, labeled_at)
+        VALUES (?,?,?,?,?,?)
+        ON CONFLICT(player_id, item_id) DO UPDATE SET
+            label_value=excluded.label_value,
+            labeled_at=excluded.labeled_at
+        """,
+        [(str(uuid.uuid4()), session_id, player_id, iid, val, tnow) for iid, val in latest.items()],
+    )
+    added = len(item_ids) - len(existing)
+    if added:
+        conn.execute("UPDATE players SET labeled_count = labeled_count + ? WHERE player_id=?", (added, player_id))
+    # An item leased to someone else is theirs no longer: drop it from their
+    # assignments and assigned count, or it stays "remaining" for them forever
+    taken: List[Tuple[str, str]] = []
+    for chunk in _chunks(((iid,) for iid in item_ids), 500):
+        marks = ",".join("?" * len(chunk))
+        taken.extend(
+            (r[0], r[1])
+            for r in conn.execute(
+                f"""
+                SELECT leased_by, sample_id FROM session_samples
+                WHERE session_id=? AND sample_id IN ({marks})
+                  AND labeled=0 AND leased_by IS NOT NULL AND leased_by != ?
                 """,
-                (lid, session_id, player_id, iid, val, tnow),
+                (session_id, *(c[0] for c in chunk), player_id),
             )
-            count += 1
-
-        # If player finished all assigned items, mark done
-        total_assigned = conn.execute(
-            "SELECT COUNT(*) FROM assignments WHERE session_id=? AND player_id=?",
-            (session_id, player_id),
-        ).fetchone()[0]
-        total_labeled = conn.execute(
-            "SELECT COUNT(*) FROM labels WHERE session_id=? AND player_id=?",
-            (session_id, player_id),
-        ).fetchone()[0]
-        if total_assigned > 0 and total_assigned == total_labeled:
-            conn.execute("UPDATE players SET status='done' WHERE player_id=?", (player_id,))
-
-        conn.commit()
-    return count
+        )
+    if taken:
+        conn.executemany(
+            "DELETE FROM assignments WHERE session_id=? AND player_id=? AND item_id=?",
+            [(session_id, holder, iid) for holder, iid in taken],
+        )
+        conn.executemany(
+            "UPDATE players SET assigned_count = MAX(0, assigned_count - 1) WHERE player_id=?",
+            [(holder,) for holder, _ in taken],
+        )
+    # Labeled items leave the work queue; activity keeps the player's other leases alive
+    conn.executemany(
+        "UPDATE session_samples SET labeled=1, leased_by=NULL, lease_expires_at=NULL WHERE session_id=? AND sample_id=?",
+        [(session_id, iid) for iid in item_ids],
+    )
+    conn.execute(
+        "UPDATE session_samples SET lease_expires_at=? WHERE session_id=? AND leased_by=? AND labeled=0",
+        (tnow + LEASE_SECONDS, session_id, player_id),
+    )
 
 
 def progress(session_id: str) -> Dict:
-    sess = get_session(session_id)
-    if not sess:
+    """Session status plus per-player assigned/labeled/remaining/last activity.
+
+    One statement: per-player counts come from the player counters and last
+    activity from MAX(labeled_at) on the covering (session_id, player_id,
+    labeled_at) index. The session's ``labeled`` counts pool items labeled by
+    anyone, so an item labeled by two players is counted once.
+    ``assigned`` counts items a player has leased (see get_player_batch).
+    """
+    with _connect(session_id) as conn:
+        rows = conn.execute(
+            """
+            SELECT s.status AS session_status,
+                   (SELECT COALESCE(MAX(seq) + 1, 0) FROM session_samples ss
+                     WHERE ss.session_id = s.session_id) AS pool_size,
+                   (SELECT COALESCE(SUM(ss.labeled), 0) FROM session_samples ss
+                     WHERE ss.session_id = s.session_id) AS pool_labeled,
+                   p.player_id, p.display_name, p.role, p.status,
+                   p.assigned_count, p.labeled_count,
+                   (SELECT MAX(l.labeled_at) FROM labels l
+                     WHERE l.session_id = s.session_id AND l.player_id = p.player_id) AS last_activity
+            FROM sessions s
+            LEFT JOIN players p ON p.session_id = s.session_id
+            WHERE s.session_id=?
+            ORDER BY p.rowid
+            """,
+            (session_id,),
+        ).fetchall()
+    if not rows:
         raise ValueError("Session not found")
-    players = list_players(session_id)
-    players_out = [
-        {"display_name": p["display_name"], "status": p["status"], "role": p["role"]}
-        for p in players
-    ]
-    all_done = all(p["status"] == "done" for p in players if p["role"] != "host") and any(
-        p["role"] == "host" for p in players
+    players_out = []
+    for r in rows:
+        if r["player_id"] is None:
+            continue
+        assigned = int(r["assigned_count"] or 0)
+        labeled = int(r["labeled_count"] or 0)
+        players_out.append(
+            {
+                "display_name": r["display_name"],
+                "status": r["status"],
+                "role": r["role"],
+                "assigned": assigned,
+                "labeled": labeled,
+                "remaining": max(0, assigned - labeled),
+                "last_activity": r["last_activity"],
+            }
+        )
+    all_done = all(p["status"] == "done" for p in players_out if p["role"] != "host") and any(
+        p["role"] == "host" for p in players_out
     )
-    return {"players": players_out, "all_done": all_done, "status": sess["status"]}
+    pool_size = int(rows[0]["pool_size"] or 0)
+    total_labeled = int(rows[0]["pool_labeled"] or 0)
+    return {
+        "players": players_out,
+        "all_done": all_done,
+        "status": rows[0]["session_status"],
+        "pool_size": pool_size,
+        "assigned": sum(p["assigned"] for p in players_out),
+        "labeled": total_labeled,
+        "percent": round(100.0 * total_labeled / pool_size, 1) if pool_size else 0.0,
+    }
 
 
 def complete_session(session_id: str) -> None:
-    with _connect() as conn:
-        conn.execute("UPDATE sessions SET status='completed' WHERE session_id=?", (session_id,))
-        conn.commit()
+    set_status(session_id, "completed")
+    if SHARDED:
+        _archive_shard(session_id)
+
 
 def set_player_done(session_id: str, player_id: str) -> None:
     """Mark a player's status as 'done' regardless of how many items they labeled."""
-    with _connect() as conn:
+    with _write_txn(session_id) as conn:
         # Ensure player belongs to session for safety
         row = conn.execute(
             "SELECT 1 FROM players WHERE player_id=? AND session_id=?",
@@ -343,39 +845,55 @@ def set_player_done(session_id: str, player_id: str) -> None:
         ).fetchone()
         if row:
             conn.execute("UPDATE players SET status='done' WHERE player_id=?", (player_id,))
-            conn.commit()
 
 
 def save_session_pool(session_id: str, samples: List[Dict]) -> int:
     """Store ordered pool provided by host. Each item requires sample_id, dataset, table, row, col, val."""
-    with _connect() as conn:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM session_samples WHERE session_id=?", (session_id,))
-        seq = 0
-        for s in samples:
-            cur.execute(
-                """
-                INSERT INTO session_samples(session_id, seq, sample_id, dataset, table_name, row_index, col_name, val)
-                VALUES (?,?,?,?,?,?,?,?)
-                """,
-                (
-                    session_id,
-                    seq,
-                    str(s.get("sample_id")),
-                    str(s.get("dataset")),
-                    str(s.get("table")),
-                    int(s.get("row", 0)),
-                    str(s.get("col")),
-                    str(s.get("val")),
-                ),
-            )
-            seq += 1
-        conn.commit()
-        return seq
+    with _write_txn(session_id) as conn:
+        conn.execute("DELETE FROM session_samples WHERE session_id=?", (session_id,))
+        return _insert_pool(conn, session_id, 0, samples)
+
+
+def _insert_pool(conn: sqlite3.Connection, session_id: str, start: int, samples: Iterable[Dict]) -> int:
+    """Bulk insert samples at seq start, start+1, ...; returns the seq after the last one."""
+    seq = start
+    rows = (
+        (
+            session_id,
+            start + i,
+            str(s.get("sample_id")),
+            str(s.get("dataset")),
+            str(s.get("table")),
+            int(s.get("row", 0)),
+            str(s.get("col")),
+            str(s.get("val")),
+        )
+        for i, s in enumerate(samples)
+    )
+    for chunk in _chunks(rows):
+        conn.executemany(
+            """
+            INSERT INTO session_samples(session_id, seq, sample_id, dataset, table_name, row_index, col_name, val)
+            VALUES (?,?,?,?,?,?,?,?)
+            """,
+            chunk,
+        )
+        seq += len(chunk)
+    return seq
+
+
+def append_session_pool(session_id: str, samples: List[Dict]) -> int:
+    """Append samples after the current end of a session's pool. Returns the new pool size."""
+    with _write_txn(session_id) as conn:
+        start = conn.execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0) FROM session_samples WHERE session_id=?",
+            (session_id,),
+        ).fetchone()[0]
+        return int(_insert_pool(conn, session_id, start, samples))
 
 
 def get_session_pool(session_id: str) -> List[Dict]:
-    with _connect() as conn:
+    with _connect(session_id) as conn:
         rows = conn.execute(
             "SELECT seq, sample_id, dataset, table_name, row_index, col_name, val FROM session_samples WHERE session_id=? ORDER BY seq",
             (session_id,),
@@ -394,46 +912,250 @@ def get_session_pool(session_id: str) -> List[Dict]:
     ]
 
 
+def iter_merged_labels(session_id: str, chunk_size: int = WRITE_CHUNK) -> Iterator[Dict]:
+    """Yield each pool sample (in pool order) with its latest label across players.
+
+    The latest label is one seek on idx_labels_session_item_time per sample,
+    and rows are fetched `chunk_size` at a time, so memory does not grow with
+    the session.
+    """
+    cur = _connect(session_id).execute(
+        """
+        SELECT s.sample_id, s.dataset, s.table_name, s.row_index, s.col_name, s.val,
+               (SELECT l.label_value FROM labels l
+                WHERE l.session_id = s.session_id AND l.item_id = s.sample_id
+                ORDER BY l.labeled_at DESC
+                LIMIT 1) AS label_value
+        FROM session_samples s
+        WHERE s.session_id = ?
+        ORDER BY s.seq
+        """,
+        (session_id,),
+    )
+    try:
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            for r in rows:
+                yield {
+                    "sample_id": r["sample_id"],
+                    "dataset": r["dataset"],
+                    "table": r["table_name"],
+                    "row": r["row_index"],
+                    "col": r["col_name"],
+                    "val": r["val"],
+                    "label_value": r["label_value"],
+                }
+    finally:
+        cur.close()
+
+
 def merged_labels(session_id: str) -> List[Dict]:
     """Return merged labels across players keyed by sample_id. If multiple exist, latest wins."""
-    with _connect() as conn:
-        rows = conn.execute(
-            """
-            SELECT s.sample_id, s.dataset, s.table_name, s.row_index, s.col_name, s.val,
-                   l.label_value, l.labeled_at
-            FROM session_samples s
-            LEFT JOIN labels l
-              ON l.session_id = s.session_id AND l.item_id = s.sample_id
-            WHERE s.session_id=?
-            ORDER BY s.seq, l.labeled_at
-            """,
-            (session_id,),
-        ).fetchall()
-    # Reduce to latest label per sample
-    merged: Dict[str, Dict] = {}
-    for r in rows:
-        sid = r["sample_id"]
-        merged[sid] = {
-            "sample_id": sid,
-            "dataset": r["dataset"],
-            "table": r["table_name"],
-            "row": r["row_index"],
-            "col": r["col_name"],
-            "val": r["val"],
-            "label_value": r["label_value"],
-        }
-    return list(merged.values())
+    return list(iter_merged_labels(session_id))
 
 
 def count_player_labels(session_id: str, player_id: str) -> int:
-    with _connect() as conn:
+    with _connect(session_id) as conn:
         row = conn.execute(
-            "SELECT COUNT(*) AS c FROM labels WHERE session_id=? AND player_id=?",
+            "SELECT labeled_count FROM players WHERE session_id=? AND player_id=?",
             (session_id, player_id),
         ).fetchone()
         return int(row[0] if row else 0)
 
 
+# ----------------------------
+# Retention (see backend.retention)
+# ----------------------------
+# Tables holding per-session rows, children first
+_SESSION_TABLES = ("labels", "assignments", "session_samples", "players", "sessions")
+
+
+def session_activity() -> List[Dict]:
+    """Every session with its status and last activity (creation or latest label)."""
+    with _connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT s.session_id, s.status,
+                   MAX(s.created_at, COALESCE(
+                       (SELECT MAX(l.labeled_at) FROM labels l WHERE l.session_id = s.session_id), 0
+                   )) AS last_activity
+            FROM sessions s
+            """
+        ).fetchall()
+    activity = [dict(r) for r in rows]
+    if SHARDED:
+        # Labels live in the session files
+        for a in activity:
+            path = _shard_path(a["session_id"])
+            if path is not None:
+                a["last_activity"] = max(a["last_activity"], _last_label_at(path))
+    return activity
+
+
+def export_session(session_id: str) -> Dict[str, List[Dict]]:
+    """All rows belonging to a session, keyed by table name."""
+    with _connect(session_id) as conn:
+        return {
+            table: [dict(r) for r in conn.execute(f"SELECT * FROM {table} WHERE session_id=?", (session_id,))]
+            for table in reversed(_SESSION_TABLES)
+        }
+
+
+def delete_session(session_id: str) -> int:
+    """Delete a session and all its rows in one transaction. Returns rows deleted.
+
+    In sharded mode the session file is removed along with the catalog row.
+    """
+    with _write_txn(session_id) as conn:
+        before = conn.total_changes
+        for table in _SESSION_TABLES:
+            conn.execute(f"DELETE FROM {table} WHERE session_id=?", (session_id,))
+        deleted = int(conn.total_changes - before)
+    if SHARDED:
+        path = _shard_path(session_id)
+        if path is not None:
+            _close_connection(path)
+            _remove_db_files(path)
+        with _connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id=?", (session_id,))
+    return deleted
+
+
+def prune_items(older_than: float) -> int:
+    """Delete seeded items created before `older_than` that no assignment references."""
+    with _write_txn() as conn:
+        before = conn.total_changes
+        # NOT IN reads assignments once; a correlated NOT EXISTS rescanned it per item
+        conn.execute(
+            """
+            DELETE FROM items
+            WHERE COALESCE(created_at, 0) < ?
+              AND item_id NOT IN (SELECT item_id FROM assignments)
+            """,
+            (older_than,),
+        )
+        return int(conn.total_changes - before)
+
+
+def compact(max_pages: int = 1000) -> Dict[str, int]:
+    """Return free pages to the OS (incremental vacuum) and truncate the WAL.
+
+    A database created before auto_vacuum=INCREMENTAL was set is converted
+    with one full VACUUM first.
+    """
+    conn = _connect()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # execute() steps the pragma once (one page); executescript runs it to completion
+    conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    busy, wal_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return {
+        "pages_freed": int(free_before - free_after),
+        "free_pages": int(free_after),
+        "wal_busy": int(busy),
+        "wal_pages_checkpointed": int(max(checkpointed, 0)),
+    }
+
+
+def _benchmark(n_requests: int, n_players: int, budget: int) -> None:
+    """Time the DB work behind the hot API endpoints with per-call vs pooled connections."""
+    import statistics
+    import tempfile
+
+    global DB_PATH, _connect
+    pooled_connect = _connect
+
+    def fresh_connect(session_id: Optional[str] = None) -> sqlite3.Connection:
+        # Previous behaviour: a new connection (and makedirs) on every call
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    sess = create_session(min_budget=budget, expected_players=n_players)
+    sid = sess["session_id"]
+    players = [create_player(sid, "host" if i == 0 else "player")["player_id"] for i in range(n_players)]
+    save_session_pool(
+        sid,
+        [
+            {"sample_id": f"s{i}", "dataset": "bench", "table": "t", "row": i, "col": "c", "val": str(i)}
+            for i in range(budget * n_players)
+        ],
+    )
+    start_session(sid)
+
+    ops = {
+        "GET /session": lambda i: get_session(sid),
+        "GET /progress": lambda i: progress(sid),
+        "GET /batch": lambda i: get_player_batch(sid, players[i % n_players]),
+        "POST /labels": lambda i: upsert_labels(
+            sid, players[i % n_players], [{"item_id": f"s{i % budget}", "label_value": "1"}]
+        ),
+    }
+    for mode, connect in (("per-call connections", fresh_connect), ("pooled connections", pooled_connect)):
+        _connect = connect
+        print(mode)
+        for name, op in ops.items():
+            timings = []
+            for i in range(n_requests):
+                t0 = time.perf_counter()
+                op(i)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"  {name:<14} p50 {statistics.median(timings):.3f}ms  p95 {p95:.3f}ms")
+    _connect = pooled_connect
+
+
+def _benchmark_sessions(n_sessions: int, n_batches: int, batch_size: int) -> None:
+    """Label throughput of concurrent sessions: one shared file vs one file per session."""
+    import tempfile
+
+    global DB_PATH, SHARDED
+    saved = (DB_PATH, SHARDED)
+    for sharded in (False, True):
+        DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+        SHARDED = sharded
+        work = []
+        for _ in range(n_sessions):
+            sid = create_session(min_budget=batch_size)["session_id"]
+            pid = create_player(sid, "host")["player_id"]
+            save_session_pool(
+                sid,
+                [
+                    {"sample_id": f"s{i}", "dataset": "bench", "table": "t", "row": i, "col": "c", "val": str(i)}
+                    for i in range(n_batches * batch_size)
+                ],
+            )
+            start_session(sid)
+            work.append((sid, pid))
+
+        def label(sid: str, pid: str) -> None:
+            for b in range(n_batches):
+                upsert_labels(
+                    sid, pid, [{"item_id": f"s{b * batch_size + i}", "label_value": "1"} for i in range(batch_size)]
+                )
+            close_connections()
+
+        threads = [threading.Thread(target=label, args=w) for w in work]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        mode = "one file per session" if sharded else "shared file"
+        print(f"  {mode:<22} {n_sessions * n_batches * batch_size / elapsed:,.0f} labels/s  ({elapsed:.2f}s)")
+        close_connections()
+    DB_PATH, SHARDED = saved
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -445,7 +1167,23 @@ if __name__ == "__main__":
     seed.add_argument("--id-column", type=str, default=None, help="Optional column for item_id")
     seed.add_argument("--fake", type=int, default=0, help="Seed N fake items if >0")
 
+    bench = sub.add_parser("bench", help="Microbenchmark per-request DB latency")
+    bench.add_argument("--requests", type=int, default=500)
+    bench.add_argument("--players", type=int, default=4)
+    bench.add_argument("--budget", type=int, default=50)
+
+    bench_sessions = sub.add_parser("bench-sessions", help="Concurrent sessions: shared vs per-session files")
+    bench_sessions.add_argument("--sessions", type=int, default=8)
+    bench_sessions.add_argument("--batches", type=int, default=200)
+    bench_sessions.add_argument("--batch-size", type=int, default=5)
+
     args = parser.parse_args()
+    if args.cmd == "bench":
+        _benchmark(args.requests, args.players, args.budget)
+        raise SystemExit(0)
+    if args.cmd == "bench-sessions":
+        _benchmark_sessions(args.sessions, args.batches, args.batch_size)
+        raise SystemExit(0)
     init_db()
 
     if args.cmd == "seed":
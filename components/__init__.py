@@ -8,6 +8,9 @@ from .utils import (
     load_clean_table,
     load_pipeline_config,
     save_pipeline_config,
+    update_pipeline_config,
+    get_pipeline_config_value,
+    pipeline_config_exists,
     update_domain_folds_in_config,
     get_base_url,
 )
@@ -25,6 +28,9 @@ __all__ = [
     'load_clean_table',
     'load_pipeline_config',
     'save_pipeline_config',
+    'update_pipeline_config',
+    'get_pipeline_config_value',
+    'pipeline_config_exists',
     'update_domain_folds_in_config',
     'get_base_url',
 ]
@@ -0,0 +1,212 @@
+"""
+Shared HTTP client for the multiplayer API.
+
+Pages, the label buffer and the live-update reader all go through one
+ApiClient per API base URL instead of module-level ``requests`` calls, so:
+
+- connections are pooled and kept alive across page reruns,
+- every call gets the same timeouts (connect 3 s, read 10 s by default),
+- GETs are retried with exponential backoff on connection errors and 5xx,
+  POSTs only when the caller says the request is safe to repeat,
+- after ``failure_threshold`` consecutive connection failures a circuit
+  breaker fails calls immediately with ApiUnavailable for ``reset_after``
+  seconds, then lets one call through to probe the API,
+- latency and error counts are kept per endpoint (ids replaced by
+  placeholders) and returned by ``metrics()``.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+Timeout = Union[float, Tuple[float, float]]
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 10.0)
+
+_ID_SEGMENTS = re.compile(r"/(sessions|players)/[^/?]+")
+
+
+class ApiUnavailable(requests.ConnectionError):
+    """Raised without contacting the API while the circuit breaker is open."""
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """``GET /sessions/{id}/progress`` style key for a request path."""
+    return f"{method.upper()} {_ID_SEGMENTS.sub(lambda m: f'/{m.group(1)}/{{id}}', path.split('?', 1)[0])}"
+
+
+class ApiClient:
+    """Pooled, retrying client for one API base URL.
+
+    Args:
+        base: API root, e.g. ``http://127.0.0.1:8000/api``.
+        timeout: Default (connect, read) timeout in seconds.
+        retries: Extra attempts for retryable calls.
+        backoff: First retry delay in seconds; doubles per attempt.
+        failure_threshold: Consecutive connection failures that open the circuit.
+        reset_after: Seconds the circuit stays open before a probe call.
+        pool_size: Keep-alive connections kept per host.
+        latency_window: Recent calls per endpoint kept for percentiles.
+    """
+
+    def __init__(
+        self,
+        base: str,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        retries: int = 2,
+        backoff: float = 0.25,
+        failure_threshold: int = 3,
+        reset_after: float = 5.0,
+        pool_size: int = 32,
+        latency_window: int = 500,
+    ) -> None:
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_after = reset_after
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=latency_window))
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._rejected = 0
+
+    # ----------------------------
+    # Requests
+    # ----------------------------
+    def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        retry: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send ``method`` to ``base + path``; keyword arguments go to requests.
+
+        Args:
+            retry: Retry connection errors and 5xx responses. Defaults to
+                True for GET and False otherwise; pass True for POSTs that
+                are safe to repeat (e.g. with an Idempotency-Key).
+            timeout: Overrides the default timeout for this call.
+
+        Raises:
+            ApiUnavailable: The circuit breaker is open.
+            requests.RequestException: The last attempt failed.
+        """
+        method = method.upper()
+        name = endpoint_name(method, path)
+        attempts = 1 + (self.retries if (method == "GET" if retry is None else retry) else 0)
+        delay = self.backoff
+        while True:
+            attempts -= 1
+            self._before_call()
+            t0 = time.perf_counter()
+            try:
+                resp = self.session.request(
+                    method, self.base + path, timeout=self.timeout if timeout is None else timeout, **kwargs
+                )
+            except requests.RequestException as e:
+                # A read timeout means the API accepted the connection: busy, not down
+                self._record(name, t0, ok=False, reachable=isinstance(e, requests.ReadTimeout))
+                if not attempts:
+                    raise
+            else:
+                self._record(name, t0, ok=resp.status_code < 500, reachable=True)
+                if resp.status_code < 500 or not attempts:
+                    return resp
+                resp.close()
+            time.sleep(delay)
+            delay *= 2
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    # ----------------------------
+    # Circuit breaker and counters
+    # ----------------------------
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return
+            if time.monotonic() < self._open_until or self._probing:
+                self._rejected += 1
+                raise ApiUnavailable(f"API at {self.base} is unavailable; retrying in {self.reset_after:.0f}s")
+            # Half-open: this call probes whether the API is back
+            self._probing = True
+
+    def _record(self, name: str, t0: float, ok: bool, reachable: bool) -> None:
+        with self._lock:
+            self._latencies[name].append((time.perf_counter() - t0) * 1000)
+            self._counts[name] += 1
+            if not ok:
+                self._errors[name] += 1
+            self._probing = False
+            if reachable:
+                self._failures = 0
+            else:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._open_until = time.monotonic() + self.reset_after
+
+    @property
+    def circuit_open(self) -> bool:
+        with self._lock:
+            return self._failures >= self.failure_threshold and time.monotonic() < self._open_until
+
+    def metrics(self) -> Dict[str, Any]:
+        """Calls, errors and latency percentiles (ms) per endpoint, plus breaker state."""
+
+        def pct(values: list, q: float) -> float:
+            return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+        with self._lock:
+            endpoints = {}
+            for name, window in self._latencies.items():
+                ordered = sorted(window)
+                endpoints[name] = {
+                    "count": self._counts[name],
+                    "errors": self._errors[name],
+                    "p50_ms": pct(ordered, 0.5),
+                    "p95_ms": pct(ordered, 0.95),
+                    "max_ms": round(ordered[-1], 2),
+                }
+            return {
+                "endpoints": endpoints,
+                "circuit_open": self._failures >= self.failure_threshold and time.monotonic() < self._open_until,
+                "consecutive_failures": self._failures,
+                "rejected_while_open": self._rejected,
+            }
+
+
+_CLIENTS: Dict[str, ApiClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_api_client(base: str) -> ApiClient:
+    """Return the process-wide client for `base`, shared by all pages and reruns."""
+    key = base.rstrip("/")
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = ApiClient(key)
+        return client
@@ -0,0 +1,190 @@
+"""
+Buffered label submission for the multiplayer labeling page.
+
+Swipes are added to a LabelBuffer instead of being posted inside the script
+run. A background thread sends them in batches to
+``POST /sessions/{sid}/players/{pid}/labels``: it waits up to ``max_delay``
+seconds for more labels (or until ``max_batch`` are pending), posts them with
+an ``Idempotency-Key`` and retries network errors and 5xx responses with
+backoff, reusing the key so a batch is applied once even if a response is
+lost.
+
+Buffers are shared per (API, session, player) in this process, so pending
+labels survive reruns and page switches. The page also mirrors them into
+``st.session_state["mp.pending_labels"]``, which session persistence writes
+to disk; a buffer created after a reload or restart resends them (label
+upserts are idempotent per player and item).
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from .api_client import get_api_client
+
+PENDING_KEY = "mp.pending_labels"
+
+
+class LabelBuffer:
+    """Batches one player's labels and posts them from a background thread.
+
+    Args:
+        api_base: API root, e.g. ``http://127.0.0.1:8000/api``.
+        session_id: Session being labeled.
+        player_id: Player the labels belong to.
+        max_batch: Most labels sent in one request.
+        max_delay: Seconds the first pending label waits for more.
+        idle_timeout: Seconds without work after which the thread exits;
+            it is started again by the next add().
+    """
+
+    def __init__(
+        self,
+        api_base: str,
+        session_id: str,
+        player_id: str,
+        max_batch: int = 25,
+        max_delay: float = 1.0,
+        idle_timeout: float = 60.0,
+    ) -> None:
+        self.api = get_api_client(api_base)
+        self.path = f"/sessions/{session_id}/players/{player_id}/labels"
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max_delay
+        self.idle_timeout = idle_timeout
+        self.sent = 0
+        self.retries = 0
+        self.rejected: List[Dict[str, Any]] = []
+        self.last_error: Optional[str] = None
+        self._pending: List[Dict[str, Any]] = []
+        # Batch being posted, with its idempotency key; kept until acknowledged
+        self._inflight: Optional[Tuple[str, List[Dict[str, Any]]]] = None
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # ----------------------------
+    # Page side
+    # ----------------------------
+    def add(self, labels: List[Dict[str, Any]]) -> None:
+        """Queue labels (``item_id``, ``label_value``, ``order_index``) for sending."""
+        if not labels:
+            return
+        with self._cond:
+            self._pending.extend(dict(label) for label in labels)
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def unsent(self) -> List[Dict[str, Any]]:
+        """Labels not yet acknowledged by the API, in submission order."""
+        with self._cond:
+            inflight = list(self._inflight[1]) if self._inflight else []
+            return inflight + list(self._pending)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Send everything pending now; True if the buffer drained within `timeout`."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if not self._pending and self._inflight is None:
+                return True
+            self._flush_requested = True
+            self._ensure_thread()
+            self._cond.notify_all()
+            drained = self._cond.wait_for(
+                lambda: not self._pending and self._inflight is None, max(0.0, deadline - time.monotonic())
+            )
+            self._flush_requested = False
+            return drained
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "pending": len(self._pending) + (len(self._inflight[1]) if self._inflight else 0),
+                "sent": self.sent,
+                "retries": self.retries,
+                "rejected": len(self.rejected),
+                "last_error": self.last_error,
+            }
+
+    # ----------------------------
+    # Sender thread
+    # ----------------------------
+    def _ensure_thread(self) -> None:
+        # Caller holds self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="mp-label-buffer", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """Wait for a batch to send; None once idle for `idle_timeout`."""
+        with self._cond:
+            if self._inflight is not None:
+                return self._inflight
+            if not self._cond.wait_for(lambda: self._pending, self.idle_timeout):
+                self._thread = None
+                return None
+            # Give the player's next swipes a moment to join this request
+            self._cond.wait_for(
+                lambda: self._flush_requested or len(self._pending) >= self.max_batch, self.max_delay
+            )
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch :]
+            self._inflight = (uuid.uuid4().hex, batch)
+            return self._inflight
+
+    def _run(self) -> None:
+        backoff = 0.5
+        while True:
+            inflight = self._next_batch()
+            if inflight is None:
+                return
+            key, batch = inflight
+            try:
+                # Retries are ours (with the same key), so the client tries once
+                resp = self.api.post(self.path, json=batch, headers={"Idempotency-Key": key}, retry=False)
+                status: Optional[int] = resp.status_code
+                error = None if resp.ok else f"HTTP {resp.status_code}: {resp.text[:200]}"
+            except requests.RequestException as e:
+                status, error = None, str(e)
+            # 409: a previous attempt with this key is still being applied
+            retry = status is None or status >= 500 or status in (408, 409, 429)
+            with self._cond:
+                self.last_error = error
+                if not retry:
+                    if error is None:
+                        self.sent += len(batch)
+                    else:
+                        # The API refused the batch (e.g. unknown player); resending cannot help
+                        self.rejected.extend(batch)
+                    self._inflight = None
+                    self._cond.notify_all()
+                    backoff = 0.5
+                    continue
+                self.retries += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+
+_BUFFERS: Dict[Tuple[str, str, str], LabelBuffer] = {}
+_BUFFERS_LOCK = threading.Lock()
+
+
+def get_label_buffer(
+    api_base: str, session_id: str, player_id: str, restore: Optional[List[Dict[str, Any]]] = None
+) -> LabelBuffer:
+    """Return the shared buffer for a player.
+
+    Args:
+        restore: Unsent labels saved by an earlier page run (see PENDING_KEY);
+            queued again when the buffer is created.
+    """
+    key = (api_base, session_id, player_id)
+    with _BUFFERS_LOCK:
+        buffer = _BUFFERS.get(key)
+        if buffer is None:
+            buffer = _BUFFERS[key] = LabelBuffer(api_base, session_id, player_id)
+            buffer.add(list(restore or []))
+        return buffer
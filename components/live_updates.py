@@ -0,0 +1,176 @@
+"""
+Live session updates for the multiplayer pages.
+
+The Streamlit server subscribes to the API's server-sent events
+(``/sessions/{sid}/events``) and a page reruns only when its session changed
+(status, players or progress), instead of asking the user to click Refresh
+or rerunning on a fixed timer.
+
+One reader thread per (API, session) is shared by every browser tab in this
+process; it is dropped from the registry when it exits (session finished or
+no reader for a while) and started again by the next page that asks. ``live_session()`` returns the latest snapshot and renders a small
+fragment that compares the reader's version with the one the page was drawn
+from; that check is in memory, so an idle page sends no API requests.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+import streamlit as st
+
+from .api_client import get_api_client
+
+
+class SessionFeed:
+    """Background reader of one session's event stream.
+
+    Args:
+        api_base: API root, e.g. ``http://127.0.0.1:8000/api``.
+        session_id: Session to follow.
+        idle_timeout: Seconds without a reader after which the thread exits.
+    """
+
+    def __init__(self, api_base: str, session_id: str, idle_timeout: float = 120.0) -> None:
+        self.key = (api_base, session_id)
+        self.api = get_api_client(api_base)
+        self.path = f"/sessions/{session_id}/events"
+        self.idle_timeout = idle_timeout
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.finished = False
+        self._cond = threading.Condition()
+        self._last_used = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"mp-feed-{session_id}", daemon=True)
+
+    def start(self) -> "SessionFeed":
+        self._thread.start()
+        return self
+
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def current(self, wait: float = 0.0) -> Tuple[Optional[Dict[str, Any]], int]:
+        """(snapshot, version); waits up to `wait` seconds for the first snapshot."""
+        with self._cond:
+            self._last_used = time.monotonic()
+            if self.snapshot is None and wait > 0:
+                self._cond.wait_for(lambda: self.snapshot is not None or self.finished, wait)
+            return self.snapshot, self.version
+
+    # ----------------------------
+    # Reader thread
+    # ----------------------------
+    def _idle(self) -> bool:
+        return time.monotonic() - self._last_used > self.idle_timeout
+
+    def _run(self) -> None:
+        try:
+            self._follow()
+        finally:
+            _forget_feed(self)
+
+    def _follow(self) -> None:
+        backoff = 0.5
+        while not self.finished and not self._idle():
+            try:
+                with self.api.get(self.path, stream=True, timeout=(5, 60), retry=False) as resp:
+                    if resp.status_code == 404:
+                        self._finish()
+                        return
+                    resp.raise_for_status()
+                    backoff = 0.5
+                    self._consume(resp)
+            except requests.RequestException:
+                pass
+            if not self.finished:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+
+    def _finish(self) -> None:
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def _consume(self, resp: requests.Response) -> None:
+        event, data = "message", []
+        for line in resp.iter_lines(decode_unicode=True):
+            if self._idle():
+                return
+            if line:
+                field, _, value = line.partition(":")
+                if field == "event":
+                    event = value.strip()
+                elif field == "data":
+                    data.append(value.lstrip())
+                continue
+            if data:
+                self._dispatch(event, "\n".join(data))
+            event, data = "message", []
+            if self.finished:
+                return
+
+    def _dispatch(self, event: str, data: str) -> None:
+        if event == "gone":
+            self._finish()
+            return
+        if event != "session":
+            return
+        snapshot = json.loads(data)
+        with self._cond:
+            self.snapshot = snapshot
+            self.version += 1
+            if snapshot.get("status") == "completed":
+                self.finished = True
+            self._cond.notify_all()
+
+
+_FEEDS: Dict[Tuple[str, str], SessionFeed] = {}
+_FEEDS_LOCK = threading.Lock()
+
+
+def get_session_feed(api_base: str, session_id: str) -> SessionFeed:
+    """Return the shared feed for a session, starting its reader if needed."""
+    key = (api_base, session_id)
+    with _FEEDS_LOCK:
+        feed = _FEEDS.get(key)
+        if feed is None or not feed.alive():
+            feed = _FEEDS[key] = SessionFeed(api_base, session_id).start()
+        return feed
+
+
+def _forget_feed(feed: SessionFeed) -> None:
+    """Drop an exited reader from the registry (unless it was already replaced)."""
+    with _FEEDS_LOCK:
+        if _FEEDS.get(feed.key) is feed:
+            del _FEEDS[feed.key]
+
+
+def live_session(api_base: str, session_id: str, key: str = "live", check_every: float = 1.0) -> Optional[Dict[str, Any]]:
+    """Rerun the page when the session changes; returns its latest snapshot.
+
+    The snapshot has the shape of ``GET /sessions/{sid}/progress`` (status,
+    players, pool and label counts). None means no event has arrived yet and
+    the caller should fetch the state itself.
+
+    Args:
+        api_base: API root as returned by ``ensure_api_started()``.
+        session_id: Session the page shows.
+        key: Distinguishes several subscriptions on one page.
+        check_every: Seconds between in-memory version checks.
+    """
+    feed = get_session_feed(api_base, session_id)
+    snapshot, version = feed.current(wait=2.0)
+    seen_key = f"live_updates.{key}.{session_id}"
+    st.session_state[seen_key] = version
+
+    @st.fragment(run_every=None if feed.finished else check_every)
+    def _watch() -> None:
+        if feed.current()[1] != st.session_state.get(seen_key):
+            st.rerun()
+
+    _watch()
+    return snapshot
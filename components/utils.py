@@ -2,12 +2,16 @@
 Common utility functions used across pages
 """
 import pandas as pd
+import copy
 import os
-import json
 from typing import Dict, Any, Optional
 from urllib.parse import urlparse
 import streamlit as st
 
+from backend.fingerprint import content_fingerprint
+from backend import results_index
+from backend.pipeline_store import get_pipeline_store
+
 
 def get_datasets_path(selected_dataset: str) -> str:
     """Get the path to the datasets directory"""
@@ -26,39 +30,78 @@ def load_clean_table(table_name: str, datasets_path: str) -> pd.DataFrame:
 
 
 def load_pipeline_config(pipeline_path: str) -> Dict[str, Any]:
-    """Load pipeline configuration from JSON file"""
-    config_path = os.path.join(pipeline_path, "configurations.json")
-    if os.path.exists(config_path):
-        with open(config_path, 'r') as f:
-            return json.load(f)
-    return {}
+    """Load pipeline configuration (cached; re-read only when the file changes).
+
+    Top-level keys may be set on the result; nested values are shared with the cache.
+    """
+    return get_pipeline_store(pipeline_path).load()
+
+
+def get_pipeline_config_value(pipeline_path: str, key: str, default: Any = None) -> Any:
+    """Read one configuration key (a copy, safe to edit) without copying the whole config"""
+    return copy.deepcopy(get_pipeline_store(pipeline_path).get(key, default))
+
+
+def pipeline_config_exists(pipeline_path: str) -> bool:
+    """Check whether the pipeline has a configuration (saved or pending)"""
+    return get_pipeline_store(pipeline_path).exists()
+
+
+def _sync_results_index(pipeline_path: str, keys) -> None:
+    """Refresh the Results page summary index when indexed keys change"""
+    if results_index.INDEXED_KEYS.isdisjoint(keys):
+        return
+    try:
+        results_index.sync_pipeline(pipeline_path)
+    except Exception as e:
+        print(f"Error updating results index: {e}")
 
 
 def save_pipeline_config(pipeline_path: str, config: Dict[str, Any]) -> None:
-    """Save pipeline configuration to JSON file"""
-    config_path = os.path.join(pipeline_path, "configurations.json")
-    with open(config_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    """Save the full pipeline configuration (written atomically after a short debounce)"""
+    get_pipeline_store(pipeline_path).replace(config)
+    _sync_results_index(pipeline_path, results_index.INDEXED_KEYS)
+
+
+def update_pipeline_config(pipeline_path: str, changes: Optional[Dict[str, Any]] = None, remove=(), **kwargs: Any) -> None:
+    """Set or remove individual configuration keys, leaving the rest untouched"""
+    get_pipeline_store(pipeline_path).update(changes, remove=remove, **kwargs)
+    _sync_results_index(pipeline_path, {*(changes or {}), *kwargs, *remove})
+
+
+def flush_pipeline_config(pipeline_path: str) -> None:
+    """Write pending configuration changes now, e.g. before copying the pipeline folder"""
+    get_pipeline_store(pipeline_path).flush()
 
 
 def update_domain_folds_in_config(pipeline_path: str, table_locations: Dict[str, str]) -> bool:
     """Update domain folds in pipeline configuration and return success status"""
     try:
-        config = load_pipeline_config(pipeline_path)
-        
         # Convert table_locations to domain_folds format
         domain_folds = {}
         for table, fold in table_locations.items():
             domain_folds.setdefault(fold, []).append(table)
         
-        config["domain_folds"] = domain_folds
-        save_pipeline_config(pipeline_path, config)
+        update_pipeline_config(pipeline_path, domain_folds=domain_folds)
         return True
     except Exception as e:
         print(f"Error saving domain folds: {e}")
         return False
 
 
+def cell_label_key(cell: Dict[str, Any]) -> str:
+    """Key of a cell in ``labeling_results``.
+
+    Built from the cell's position, not the card id: ids are sample positions in
+    one-shot mode and learner candidate indices in active-learning mode, so the
+    same id can name different cells. Multiplayer items keep their pool
+    ``sample_id`` (see pages/05_Multi_PlayerLabel.py).
+    """
+    if cell.get("sample_id") is not None:
+        return str(cell["sample_id"])
+    return f"{cell.get('table')}|{cell.get('row')}|{cell.get('col')}"
+
+
 # ----------------------------
 # Pipeline change tracking
 # ----------------------------
@@ -77,6 +120,28 @@ def is_pipeline_dirty() -> bool:
     return bool(st.session_state.get("pipeline_dirty", False))
 
 
+# ----------------------------
+# Stage output fingerprints
+# ----------------------------
+def set_stage_fingerprint(key: str) -> str:
+    """Recompute and store the fingerprint of ``st.session_state[key]``.
+
+    Call this right after a stage output (e.g. ``cell_folds``) is produced
+    or edited; the digest is kept under ``<key>_fingerprint``.
+    """
+    fp = content_fingerprint(st.session_state.get(key, {}))
+    st.session_state[f"{key}_fingerprint"] = fp
+    return fp
+
+
+def get_stage_fingerprint(key: str) -> str:
+    """Return the stored fingerprint for a stage output, computing it once if missing."""
+    fp = st.session_state.get(f"{key}_fingerprint")
+    if not fp:
+        fp = set_stage_fingerprint(key)
+    return fp
+
+
 # ----------------------------
 # URL utilities
 # ----------------------------
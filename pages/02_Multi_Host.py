@@ -1,6 +1,6 @@
-import requests
 import streamlit as st
 from components import render_sidebar, apply_base_styles, get_current_theme, get_base_url, render_inline_restart_button
+from components.api_client import get_api_client
 from backend.api import ensure_api_started
 
 st.set_page_config(page_title="Host Lobby", layout="wide")
@@ -8,6 +8,7 @@ apply_base_styles(get_current_theme())
 render_sidebar()
 
 API_BASE = ensure_api_started()
+api = get_api_client(API_BASE)
 
 st.title("Host Lobby")
 st.caption("Create a multiplayer session and invite players.")
@@ -25,26 +26,23 @@ if not st.session_state.get("mp.session_id"):
             min_budget = int(st.session_state.get("budget_input"))
         # Final fallback: read from configurations.json
         if min_budget is None and st.session_state.get("pipeline_path"):
-            import os, json
-            cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-            if os.path.exists(cfg_path):
-                try:
-                    with open(cfg_path) as f:
-                        cfg = json.load(f)
-                    if cfg.get("labeling_budget") is not None:
-                        min_budget = int(cfg.get("labeling_budget", 10))
-                except Exception:
-                    pass
+            from components.utils import get_pipeline_config_value
+            try:
+                cfg_budget = get_pipeline_config_value(st.session_state.pipeline_path, "labeling_budget")
+                if cfg_budget is not None:
+                    min_budget = int(cfg_budget)
+            except Exception:
+                pass
         if min_budget is None:
             min_budget = 10
-        r = requests.post(f"{API_BASE}/sessions", json={"min_budget": min_budget}, timeout=10)
+        r = api.post("/sessions", json={"min_budget": min_budget})
         r.raise_for_status()
         data = r.json()
         sid = data["session_id"]
         st.session_state["mp.session_id"] = sid
         st.session_state["mp.role"] = "host"
         # Create host player
-        p = requests.post(f"{API_BASE}/sessions/{sid}/players", json={"role": "host"}, timeout=10).json()
+        p = api.post(f"/sessions/{sid}/players", json={"role": "host"}).json()
         st.session_state["mp.player_id"] = p["player_id"]
         st.session_state["mp.display_name"] = p["display_name"]
     except Exception as e:
@@ -91,7 +89,7 @@ with st.container(border=True):
         st.rerun()
     st.info("Once all players are in, click Refresh now to update their status before starting.")
     try:
-        meta = requests.get(f"{API_BASE}/sessions/{sid}", timeout=10).json()
+        meta = api.get(f"/sessions/{sid}").json()
         for p in meta.get("players", []):
             st.write(f"- {p.get('display_name')} ({p.get('role')}) — {p.get('status')}")
     except Exception as e:
@@ -116,7 +114,7 @@ with nav_cols[2]:
             with col1:
                 if st.button("🆗 Yes, start", key="host_start_confirm", use_container_width=True):
                     try:
-                        requests.post(f"{API_BASE}/sessions/{sid}/start", timeout=10)
+                        api.post(f"/sessions/{sid}/start")
                         st.switch_page("pages/05_Multi_PlayerLabel.py")
                     except Exception as e:
                         st.error(f"Failed to start: {e}")
@@ -1,7 +1,7 @@
-import requests
 import streamlit as st
 from components import render_sidebar, apply_base_styles, get_current_theme, render_inline_restart_button
 from components.session_persistence import persist_session
+from components.api_client import get_api_client
 from backend.api import ensure_api_started
 
 st.set_page_config(page_title="Join Session", layout="wide")
@@ -10,6 +10,7 @@ render_sidebar()
 
 
 API_BASE = ensure_api_started()
+api = get_api_client(API_BASE)
 
 
 st.title("Join a Session")
@@ -28,9 +29,9 @@ sid = st.text_input("Session code", value=sid_param or "").strip()
 # Auto-join if session_id present in URL and not already joined
 if sid_param and not st.session_state.get("mp.session_id"):
     try:
-        meta = requests.get(f"{API_BASE}/sessions/{sid_param}", timeout=5)
+        meta = api.get(f"/sessions/{sid_param}")
         if meta.status_code == 200:
-            p = requests.post(f"{API_BASE}/sessions/{sid_param}/players", json={"role": "player"}, timeout=5).json()
+            p = api.post(f"/sessions/{sid_param}/players", json={"role": "player"}).json()
             st.session_state["mp.session_id"] = sid_param
             st.session_state["mp.player_id"] = p["player_id"]
             st.session_state["mp.display_name"] = p["display_name"]
@@ -44,11 +45,11 @@ if sid_param and not st.session_state.get("mp.session_id"):
 
 if st.button("Join") and sid:
     try:
-        meta = requests.get(f"{API_BASE}/sessions/{sid}", timeout=5)
+        meta = api.get(f"/sessions/{sid}")
         if meta.status_code != 200:
             st.error("Session not found")
         else:
-            p = requests.post(f"{API_BASE}/sessions/{sid}/players", json={"role": "player"}, timeout=5).json()
+            p = api.post(f"/sessions/{sid}/players", json={"role": "player"}).json()
             st.session_state["mp.session_id"] = sid
             st.session_state["mp.player_id"] = p["player_id"]
             st.session_state["mp.display_name"] = p["display_name"]
@@ -74,11 +75,11 @@ with nav_cols[2]:
         # Attempt to join using the entered sid
         if sid:
             try:
-                meta = requests.get(f"{API_BASE}/sessions/{sid}", timeout=5)
+                meta = api.get(f"/sessions/{sid}")
                 if meta.status_code != 200:
                     st.error("Session not found")
                 else:
-                    p = requests.post(f"{API_BASE}/sessions/{sid}/players", json={"role": "player"}, timeout=5).json()
+                    p = api.post(f"/sessions/{sid}/players", json={"role": "player"}).json()
                     st.session_state["mp.session_id"] = sid
                     st.session_state["mp.player_id"] = p["player_id"]
                     st.session_state["mp.display_name"] = p["display_name"]
@@ -1,6 +1,7 @@
-import requests
 import streamlit as st
 from components import render_sidebar, apply_base_styles, get_current_theme
+from components.live_updates import live_session
+from components.api_client import get_api_client
 from backend.api import ensure_api_started
 
 st.set_page_config(page_title="Player Lobby", layout="wide")
@@ -8,6 +9,7 @@ apply_base_styles(get_current_theme())
 render_sidebar()
 
 API_BASE = ensure_api_started()
+api = get_api_client(API_BASE)
 
 
 st.title("Lobby")
@@ -22,12 +24,13 @@ if not (sid and pid):
 
 st.info(f"You are: {name}")
 
-if st.button("Refresh now"):
-    st.rerun()
-st.info("Waiting for host to start. Click Refresh to check the status.")
+st.info("Waiting for host to start. This page updates when the session changes.")
 
 try:
-    meta = requests.get(f"{API_BASE}/sessions/{sid}", timeout=5).json()
+    # Pushed by the API whenever players join or the status changes
+    meta = live_session(API_BASE, sid, key="lobby")
+    if meta is None:
+        meta = api.get(f"/sessions/{sid}").json()
     status = meta.get("status")
     st.write(f"Session: {sid} — Status: {status}")
     st.subheader("Players")
@@ -1,6 +1,5 @@
 import os
 import json
-import requests
 import streamlit as st
 from typing import Dict, Any, List
 from streamlit_swipecards import streamlit_swipecards
@@ -12,6 +11,10 @@ from components import (
     get_swipecard_colors,
 )
 from components.utils import mark_pipeline_dirty
+from components.live_updates import live_session
+from components.label_buffer import PENDING_KEY, get_label_buffer
+from components.session_persistence import persist_session
+from components.api_client import get_api_client
 from backend.api import ensure_api_started
 
 st.set_page_config(page_title="Player Labeling", layout="wide")
@@ -19,6 +22,7 @@ apply_base_styles(get_current_theme())
 render_sidebar()
 
 API_BASE = ensure_api_started()
+api = get_api_client(API_BASE)
 
 sid = st.session_state.get("mp.session_id")
 pid = st.session_state.get("mp.player_id")
@@ -33,9 +37,12 @@ st.caption(f"Player: {name}")
 
 API_TIMEOUT = 10
 
+# Swipes are posted in batches by a background sender; unsent ones survive reruns
+label_buffer = get_label_buffer(API_BASE, sid, pid, restore=st.session_state.get(PENDING_KEY))
+
 def fetch_batch():
     try:
-        r = requests.get(f"{API_BASE}/sessions/{sid}/players/{pid}/next-batch", timeout=API_TIMEOUT)
+        r = api.get(f"/sessions/{sid}/players/{pid}/next-batch")
         r.raise_for_status()
         return r.json()
     except Exception as e:
@@ -44,7 +51,7 @@ def fetch_batch():
 
 def fetch_status():
     try:
-        r = requests.get(f"{API_BASE}/sessions/{sid}", timeout=API_TIMEOUT)
+        r = api.get(f"/sessions/{sid}")
         r.raise_for_status()
         return r.json()
     except Exception:
@@ -55,14 +62,9 @@ if "sampled_cells" not in st.session_state:
     # Wait until session becomes active if needed
     meta = fetch_status()
     if meta.get("status") in {"lobby", "preparing", None}:
-        try:
-            from streamlit_autorefresh import st_autorefresh
-            st.info("Waiting for host to prepare sampling…")
-            st_autorefresh(interval=3000, key="player_wait_refresh")
-        except Exception:
-            st.info("Waiting for host to prepare sampling… Click Refresh.")
-            if st.button("Refresh"):
-                st.rerun()
+        st.info("Waiting for host to prepare sampling…")
+        # Reruns this page once the API reports the status change
+        live_session(API_BASE, sid, key="player_wait")
         st.stop()
     batch = fetch_batch()
     items = batch.get("items", [])
@@ -101,11 +103,14 @@ card_data = [c for c in (make_card(card) for card in cards) if c]
 
 st.info("Swipe left to mark as error, swipe right to mark as correct.")
 
+# Each leased batch gets a fresh component instance
+batch_no = st.session_state.get("mp.batch_no", 0)
+
 results = streamlit_swipecards(
     cards=card_data,
     display_mode="table",
     view="desktop",
-    key="labeling_cards",
+    key=f"labeling_cards_{batch_no}" if batch_no else "labeling_cards",
     last_card_message="No more cards to swipe, continue with the Next-button below.",
     colors=get_swipecard_colors(),
 )
@@ -113,10 +118,10 @@ results = streamlit_swipecards(
 if "labeling_results" not in st.session_state:
     st.session_state.labeling_results = {}
 
-# Record swipes like single-player and also POST to backend for persistence
+# Record swipes like single-player and queue them for the backend
 if results and isinstance(results.get("swipedCards", None), list):
     swipes = results.get("swipedCards", [])
-    made_changes = False
+    new_labels: List[Dict[str, Any]] = []
     for swipe in swipes:
         idx = swipe.get("index")
         action = swipe.get("action")
@@ -126,26 +131,38 @@ if results and isinstance(results.get("swipedCards", None), list):
             new_val = action == "right"  # True == correct
             if st.session_state.labeling_results.get(key) is None:
                 st.session_state.labeling_results[key] = new_val
-                # Submit incrementally to backend
-                try:
-                    label_value = "correct" if new_val else "error"
-                    payload = [{
-                        "item_id": card_id,
-                        "label_value": label_value,
-                        "order_index": int(idx),
-                    }]
-                    requests.post(
-                        f"{API_BASE}/sessions/{sid}/players/{pid}/labels",
-                        json=payload,
-                        timeout=API_TIMEOUT,
-                    )
-                except Exception:
-                    # Non-blocking
-                    pass
-                made_changes = True
-    if made_changes:
+                new_labels.append({
+                    "item_id": str(card_id),
+                    "label_value": "correct" if new_val else "error",
+                    "order_index": int(idx),
+                })
+    if new_labels:
+        label_buffer.add(new_labels)
+        st.session_state[PENDING_KEY] = label_buffer.unsent()
+        persist_session()
         mark_pipeline_dirty()
 
+buffer_status = label_buffer.status()
+st.session_state[PENDING_KEY] = label_buffer.unsent()
+if buffer_status["rejected"]:
+    st.error(f"{buffer_status['rejected']} label(s) were rejected by the server: {buffer_status['last_error']}")
+elif buffer_status["last_error"] and buffer_status["pending"]:
+    st.warning(f"{buffer_status['pending']} label(s) not saved yet, retrying: {buffer_status['last_error']}")
+
+# Work is leased in batches: once this one is done, pull the next from the shared pool
+batch_keys = {str(c.get("id") or c.get("sample_id")) for c in cards}
+if cards and batch_keys <= set(st.session_state.labeling_results):
+    if st.button("Get more cells", key=f"player_more_{batch_no}", use_container_width=True):
+        # Labels still in the buffer would otherwise keep their cells leased to us
+        label_buffer.flush(timeout=API_TIMEOUT)
+        more = fetch_batch().get("items", [])
+        if more:
+            st.session_state.sampled_cells = more
+            st.session_state["mp.batch_no"] = batch_no + 1
+            st.rerun()
+        else:
+            st.info("No more cells left in this session. Press Next to finish.")
+
 st.markdown("---")
 nav_cols = st.columns([1, 1, 1], gap="small")
 
@@ -162,11 +179,11 @@ if nav_cols[1].button("Back", key="player_label_back", use_container_width=True)
 
 if nav_cols[2].button("Next", key="player_label_next", use_container_width=True):
     # Allow proceeding even if not all items labeled. Mark the player as done.
+    # Send buffered labels first; whatever is still unsent keeps retrying in the background
+    label_buffer.flush(timeout=API_TIMEOUT)
+    st.session_state[PENDING_KEY] = label_buffer.unsent()
     try:
-        requests.post(
-            f"{API_BASE}/sessions/{sid}/players/{pid}/done",
-            timeout=API_TIMEOUT,
-        )
+        api.post(f"/sessions/{sid}/players/{pid}/done", retry=True)
     except Exception:
         pass
     # Navigate: host -> Host Progress; player -> Thanks
@@ -1,6 +1,7 @@
-import requests
 import streamlit as st
 from components import render_sidebar, apply_base_styles, get_current_theme, render_inline_restart_button
+from components.live_updates import live_session
+from components.api_client import get_api_client
 from backend.api import ensure_api_started
 
 st.set_page_config(page_title="Host Progress", layout="wide")
@@ -9,6 +10,7 @@ render_sidebar()
 
 
 API_BASE = ensure_api_started()
+api = get_api_client(API_BASE)
 
 
 st.title("Session Progress")
@@ -18,18 +20,24 @@ if not sid:
     st.warning("No session active.")
     st.stop()
 
-if st.button("Refresh now"):
-    st.rerun()
-st.info("Click Refresh to update player statuses. You can continue once everyone is ready.")
+st.info("Player statuses update as they label. You can continue once everyone is ready.")
 
 all_done = False
 try:
-    prog = requests.get(f"{API_BASE}/sessions/{sid}/progress", timeout=10).json()
+    prog = live_session(API_BASE, sid, key="host_progress")
+    if prog is None:
+        prog = api.get(f"/sessions/{sid}/progress").json()
     players = prog.get("players", [])
     all_done = bool(prog.get("all_done", False))
+    if prog.get("pool_size"):
+        st.progress(
+            min(1.0, prog.get("labeled", 0) / prog["pool_size"]),
+            text=f"{prog.get('labeled', 0)} / {prog['pool_size']} cells labeled ({prog.get('percent', 0)}%)",
+        )
     for p in players:
         status_text = "Done" if p["status"] == "done" else "Still labeling"
-        st.write(f"- {p['display_name']} — {status_text}")
+        counts = f" ({p['labeled']}/{p['assigned']})" if p.get("assigned") else ""
+        st.write(f"- {p['display_name']} — {status_text}{counts}")
     if all_done:
         st.success("All players are done. You can continue to Propagated Errors.")
     else:
@@ -70,7 +78,7 @@ with nav_cols[2]:
         else:
             # Everyone done: signal backend to export then proceed
             try:
-                requests.post(f"{API_BASE}/sessions/{sid}/next", timeout=10)
+                api.post(f"/sessions/{sid}/next")
             except Exception:
                 pass
             st.switch_page("pages/PropagatedErrors.py")
@@ -14,7 +14,7 @@ from components import (
     render_inline_restart_button,
     get_current_theme,
 )
-from components.utils import mark_pipeline_dirty, mark_pipeline_clean
+from components.utils import flush_pipeline_config, mark_pipeline_dirty, mark_pipeline_clean
 from components.session_persistence import get_session_hash
 
 # Set page config and apply base styles
@@ -470,6 +470,8 @@ if nav_cols[2].button("Next", key="config_next", use_container_width=True):
                     # Copy the entire pipeline folder to preserve results
                     src_path = os.path.join(pipelines_folder, current_name)
                     try:
+                        # Debounced config writes must land before the folder is copied
+                        flush_pipeline_config(src_path)
                         shutil.copytree(src_path, new_folder_path)
                     except Exception as e:
                         st.error(f"Failed to create pipeline copy: {e}")
@@ -555,6 +557,7 @@ if nav_cols[2].button("Next", key="config_next", use_container_width=True):
                                 else:
                                     src_path = os.path.join(pipelines_folder, current_name)
                                     try:
+                                        flush_pipeline_config(src_path)
                                         shutil.copytree(src_path, new_path)
                                     except Exception as e:
                                         st.error(f"Failed to create pipeline copy: {e}")
@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import os
 import time
-import json
 from backend import backend_dbf
 from components import (
     render_sidebar,
@@ -11,6 +10,8 @@ from components import (
     render_restart_expander,
     render_inline_restart_button,
     update_domain_folds_in_config,
+    get_pipeline_config_value,
+    update_pipeline_config,
 )
 from components.utils import mark_pipeline_dirty
 
@@ -26,13 +27,9 @@ render_sidebar()
 # 🔄 Load dataset from pipeline config if not already in session_state
 # Load the dataset from the pipeline configuration if available
 if "dataset_select" not in st.session_state and "pipeline_path" in st.session_state:
-    config_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(config_path):
-        with open(config_path) as f:
-            config = json.load(f)
-        selected = config.get("selected_dataset")
-        if selected:
-            st.session_state["dataset_select"] = selected
+    selected = get_pipeline_config_value(st.session_state.pipeline_path, "selected_dataset")
+    if selected:
+        st.session_state["dataset_select"] = selected
 
 # If we still don't have a dataset configured, show a warning and redirect option
 if "dataset_select" not in st.session_state:
@@ -48,17 +45,13 @@ datasets_path = os.path.join(root_dir, "datasets", selected_dataset)
 
 # Load saved domain folds only if a pipeline is selected. If found, also mark run_folding True
 if "pipeline_path" in st.session_state and "table_locations" not in st.session_state:
-    pipeline_config_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(pipeline_config_path):
-        with open(pipeline_config_path, "r") as f:
-            pipeline_config = json.load(f)
-        if "domain_folds" in pipeline_config:
-            saved_folds = pipeline_config["domain_folds"]
-            # Convert the saved fold structure {fold: [table1, table2, ...]} into our internal mapping {table: fold}
-            st.session_state.table_locations = {
-                table: fold for fold, tables in saved_folds.items() for table in tables
-            }
-            st.session_state.run_folding = True
+    saved_folds = get_pipeline_config_value(st.session_state.pipeline_path, "domain_folds")
+    if saved_folds is not None:
+        # Convert the saved fold structure {fold: [table1, table2, ...]} into our internal mapping {table: fold}
+        st.session_state.table_locations = {
+            table: fold for fold, tables in saved_folds.items() for table in tables
+        }
+        st.session_state.run_folding = True
 
 # Initialize session state variables
 if "merge_mode" not in st.session_state:
@@ -227,18 +220,10 @@ if st.session_state.get("run_folding"):
     # Next: Save and Continue
     if nav_cols[2].button("Next", key="dbf_next", use_container_width=True):
         if "pipeline_path" in st.session_state:
-            pipeline_config_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-            if os.path.exists(pipeline_config_path):
-                with open(pipeline_config_path, "r") as f:
-                    pipeline_config = json.load(f)
-            else:
-                pipeline_config = {}
             domain_folds_to_save = {}
             for table, fold in st.session_state.table_locations.items():
                 domain_folds_to_save.setdefault(fold, []).append(table)
-            pipeline_config["domain_folds"] = domain_folds_to_save
-            with open(pipeline_config_path, "w") as f:
-                json.dump(pipeline_config, f, indent=4)
+            update_pipeline_config(st.session_state.pipeline_path, domain_folds=domain_folds_to_save)
             st.success("Domain folds saved to pipeline configurations!")
         else:
             st.warning("No pipeline selected; domain folds not saved.")
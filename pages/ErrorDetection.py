@@ -3,10 +3,9 @@ import pandas as pd
 import numpy as np
 import time
 import os
-import json
 from backend import backend_pull_errors
 from components import render_sidebar, apply_base_styles, render_restart_expander, render_inline_restart_button, get_current_theme
-from components.utils import is_pipeline_dirty
+from components.utils import is_pipeline_dirty, get_pipeline_config_value
 
 # Set the page title and layout
 st.set_page_config(page_title="Error Detection", layout="wide")
@@ -27,13 +26,9 @@ render_sidebar()
 # available. Warn the user if no dataset is configured.
 # ---------------------------------------------------------------------------
 if "dataset_select" not in st.session_state and "pipeline_path" in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        with open(cfg_path) as f:
-            cfg = json.load(f)
-        selected = cfg.get("selected_dataset")
-        if selected:
-            st.session_state.dataset_select = selected
+    selected = get_pipeline_config_value(st.session_state.pipeline_path, "selected_dataset")
+    if selected:
+        st.session_state.dataset_select = selected
 
 if "dataset_select" not in st.session_state:
     st.warning("⚠️ Pipeline not configured.")
@@ -56,15 +51,23 @@ def hex_to_rgb(hex_color):
 
 primary_rgb = hex_to_rgb(primary_color)
 
-# Function to load and display table with propagated errors
+@st.cache_data(show_spinner=False)
+def load_table(file_path):
+    return pd.read_csv(file_path)
+
+
+# Function to load and display the rows of a table that hold errors on the current page
 def display_table_with_errors(table_name, error_cells):
     file_path = os.path.join(datasets_path, table_name, "clean.csv")
     try:
-        df = pd.read_csv(file_path)
+        df = load_table(file_path)
     except Exception as e:
         st.error(f"Could not load {file_path}: {e}")
         return
 
+    rows = sorted({error["row"] for error in error_cells if 0 <= error["row"] < len(df)})
+    page_df = df.iloc[rows]
+
     # Define a style function to highlight the error cells with confidence
     def highlight_errors(data):
         df_styles = pd.DataFrame("", index=data.index, columns=data.columns)
@@ -74,31 +77,73 @@ def display_table_with_errors(table_name, error_cells):
                 # Convert confidence to opacity (higher confidence = more opaque)
                 opacity = confidence
                 r, g, b = primary_rgb
-                df_styles.iloc[error["row"], data.columns.get_loc(error["col"])] = f"background-color: rgba({r}, {g}, {b}, {opacity}); color: white"
+                df_styles.loc[error["row"], error["col"]] = f"background-color: rgba({r}, {g}, {b}, {opacity}); color: white"
             except Exception:
                 continue
         return df_styles
 
     # Apply styling and display
-    styled_df = df.style.apply(highlight_errors, axis=None)
+    styled_df = page_df.style.apply(highlight_errors, axis=None)
     return styled_df
 
+
+# Session-state keys for filters and cursor pagination
+FILTERS_KEY = "error_detection.filters"
+CURSORS_KEY = "error_detection.cursors"
+PAGE_KEY = "error_detection.page"
+
+facets = backend_pull_errors(selected_dataset, limit=0)["facets"]
+
+st.markdown("### Detected Errors")
+filter_cols = st.columns([2, 2, 2, 1, 1])
+table_filter = filter_cols[0].multiselect(
+    "Tables",
+    options=list(facets["tables"]),
+    format_func=lambda t: f"{t} ({facets['tables'][t]})",
+    key="error_detection_tables",
+)
+col_filter = filter_cols[1].multiselect("Columns", options=facets["cols"], key="error_detection_cols")
+source_filter = filter_cols[2].multiselect("Sources", options=facets["sources"], key="error_detection_sources")
+min_confidence = filter_cols[3].slider("Min. confidence", 0.0, 1.0, 0.0, 0.05, key="error_detection_min_conf")
+page_size = filter_cols[4].selectbox("Page size", [25, 50, 100, 250], index=1, key="error_detection_page_size")
+
+filters = (tuple(table_filter), tuple(col_filter), tuple(source_filter), min_confidence, page_size)
+if st.session_state.get(FILTERS_KEY) != filters:
+    # Cursors are only valid for the filters they were issued for
+    st.session_state[FILTERS_KEY] = filters
+    st.session_state[CURSORS_KEY] = [None]
+    st.session_state[PAGE_KEY] = 0
+page_idx = st.session_state.get(PAGE_KEY, 0)
+cursors = st.session_state.get(CURSORS_KEY, [None])
+
 # Display loading message
 with st.spinner("🔍 Searching for possible errors in the datasets..."):
-    # Get errors using the new backend function
-    results = backend_pull_errors(selected_dataset)
+    # Get one page of errors, most confident first
+    results = backend_pull_errors(
+        selected_dataset,
+        tables=list(table_filter) or None,
+        cols=list(col_filter) or None,
+        sources=list(source_filter) or None,
+        min_confidence=min_confidence,
+        limit=page_size,
+        cursor=cursors[page_idx],
+    )
     propagated_errors = results["propagated_errors"]
-    
+
     # Display tables with propagated errors
-    st.markdown("### Detected Errors")
-    st.markdown("The intensity of the highlighting indicates the confidence level of the error detection (darker = higher confidence)")
-    
+    shown = sum(len(errors) for errors in propagated_errors.values())
+    first = page_idx * page_size + 1 if shown else 0
+    st.markdown(
+        f"Showing errors {first}–{first + shown - 1 if shown else 0} of {results['total']}. "
+        "The intensity of the highlighting indicates the confidence level of the error detection (darker = higher confidence)"
+    )
+
     for table, errors in propagated_errors.items():
-        with st.expander(f"📊 {table} ({len(errors)} potential errors)"):
+        with st.expander(f"📊 {table} ({len(errors)} potential errors on this page)"):
             styled_df = display_table_with_errors(table, errors)
             if styled_df is not None:
                 st.dataframe(styled_df)
-                
+
                 # Display error details
                 st.markdown("#### Error Details:")
                 for error in errors:
@@ -112,6 +157,17 @@ with st.spinner("🔍 Searching for possible errors in the datasets..."):
                     ---
                     """)
 
+page_cols = st.columns([1, 1, 4])
+if page_cols[0].button("Previous page", key="err_prev_page", disabled=page_idx == 0):
+    st.session_state[PAGE_KEY] = page_idx - 1
+    st.rerun()
+if page_cols[1].button("Next page", key="err_next_page", disabled=not results.get("next_cursor")):
+    if len(cursors) == page_idx + 1:
+        cursors.append(results["next_cursor"])
+    st.session_state[CURSORS_KEY] = cursors
+    st.session_state[PAGE_KEY] = page_idx + 1
+    st.rerun()
+
 st.markdown("---")
 nav_cols = st.columns([1, 1, 1], gap="small")
 
@@ -1,14 +1,23 @@
 import streamlit as st
 import logging
 import time
-import json
 import os
+import random
 from typing import Dict, Any, List
 
 from streamlit_swipecards import streamlit_swipecards
-from backend import backend_sample_labeling
+from backend import backend_sample_labeling, backend_active_learning, backend_incremental_propagation
 from components import render_sidebar, apply_base_styles, get_datasets_path, render_restart_expander, render_inline_restart_button, get_swipecard_colors
-from components.utils import mark_pipeline_dirty
+from components.utils import (
+    mark_pipeline_dirty,
+    get_stage_fingerprint,
+    set_stage_fingerprint,
+    get_pipeline_config_value,
+    load_pipeline_config,
+    pipeline_config_exists,
+    update_pipeline_config,
+    cell_label_key,
+)
 
 # Logger setup (console only)
 logger = logging.getLogger("labeling")
@@ -33,17 +42,21 @@ render_sidebar()
 
 # Load dataset and labeling budget from pipeline configuration if available
 if "pipeline_path" in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
+    if pipeline_config_exists(st.session_state.pipeline_path):
         try:
-            with open(cfg_path) as f:
-                cfg = json.load(f)
+            cfg = load_pipeline_config(st.session_state.pipeline_path)
             selected = cfg.get("selected_dataset")
             if selected and "dataset_select" not in st.session_state:
                 st.session_state.dataset_select = selected
             # Ensure labeling budget is hydrated from config if missing in session
             if "labeling_budget" not in st.session_state and cfg.get("labeling_budget") is not None:
                 st.session_state.labeling_budget = int(cfg.get("labeling_budget", 10))
+            # Sampling seed: reuse the pipeline's seed, or create one and persist it so samples are reproducible
+            if "labeling_seed" not in st.session_state:
+                if cfg.get("labeling_seed") is None:
+                    cfg["labeling_seed"] = random.randrange(2**31)
+                    update_pipeline_config(st.session_state.pipeline_path, labeling_seed=cfg["labeling_seed"])
+                st.session_state.labeling_seed = int(cfg["labeling_seed"])
         except Exception:
             pass
 
@@ -60,28 +73,31 @@ dataset = st.session_state.dataset_select
 SAMPLE_KEY = "labeling.sampled_cells"
 SAMPLE_DATASET_KEY = "labeling.sampled_cells.dataset"
 SAMPLE_BUDGET_KEY = "labeling.sampled_cells.budget"
+# Active-learning mode: learner object (rebuilt after reloads), current batch and round.
+# Batch, round and served cells use the persisted "labeling_" prefix so a reload
+# can rebuild the learner where it left off.
+AL_MODE_KEY = "labeling_active_learning"
+AL_LEARNER_KEY = "labeling.learner"
+AL_BATCH_KEY = "labeling_al_batch"
+AL_ROUND_KEY = "labeling_al_round"
+AL_SERVED_KEY = "labeling_al_served"
+AL_BATCH_SIZE = 10
+# Live propagation: swipes are pushed into an incremental propagator that
+# pages/PropagatedErrors.py reads from
+PROPAGATOR_KEY = "labeling.propagator"
+PROPAGATOR_DATASET_KEY = "labeling.propagator.dataset"
 
 # Hydrate domain_folds and cell_folds from pipeline config on reload
 if ("domain_folds" not in st.session_state or not st.session_state.get("domain_folds")) and "pipeline_path" in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        try:
-            with open(cfg_path) as f:
-                cfg = json.load(f)
-            st.session_state.domain_folds = cfg.get("domain_folds", {})
-        except Exception:
-            pass
+    if pipeline_config_exists(st.session_state.pipeline_path):
+        st.session_state.domain_folds = get_pipeline_config_value(st.session_state.pipeline_path, "domain_folds", {})
+        set_stage_fingerprint("domain_folds")
 
 if ("cell_folds" not in st.session_state or not st.session_state.get("cell_folds")) and "pipeline_path" in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        try:
-            with open(cfg_path) as f:
-                cfg = json.load(f)
-            if cfg.get("cell_folds"):
-                st.session_state.cell_folds = cfg.get("cell_folds")
-        except Exception:
-            pass
+    saved_cell_folds = get_pipeline_config_value(st.session_state.pipeline_path, "cell_folds")
+    if saved_cell_folds:
+        st.session_state.cell_folds = saved_cell_folds
+        set_stage_fingerprint("cell_folds")
 
 
 def make_card(cell: Dict[str, Any]) -> Dict[str, Any]:
@@ -111,29 +127,40 @@ def _compute_sampled_cells(
     labeling_budget: int,
     cell_folds: Dict[str, Any],
     domain_folds: Dict[str, Any],
+    strategies: List[str],
+    seed: int,
 ):
     # Log only when actually computing (i.e., cache miss)
     logger.info(
-        "Sampling cells via backend_sample_labeling (dataset=%s, budget=%s)",
+        "Sampling cells via backend_sample_labeling (dataset=%s, budget=%s, strategies=%s, seed=%s)",
         dataset,
         labeling_budget,
+        strategies,
+        seed,
     )
     return backend_sample_labeling(
         selected_dataset=dataset,
         labeling_budget=labeling_budget,
         cell_folds=cell_folds,
         domain_folds=domain_folds,
+        strategies=strategies,
+        seed=seed,
     )
 
 
 @st.cache_data(show_spinner=False)
 def get_cached_sampled_cells(
     dataset: str,
+    folds_fingerprint: str,
     labeling_budget: int,
-    cell_folds: Dict[str, Any],
-    domain_folds: Dict[str, Any],
+    seed: int,
+    strategies: tuple,
+    _cell_folds: Dict[str, Any],
+    _domain_folds: Dict[str, Any],
 ):
-    return _compute_sampled_cells(dataset, labeling_budget, cell_folds, domain_folds)
+    # Underscore-prefixed args are skipped by st.cache_data hashing; the fold
+    # contents are represented in the key by their precomputed fingerprint.
+    return _compute_sampled_cells(dataset, labeling_budget, _cell_folds, _domain_folds, list(strategies), seed)
 
 
 def run_sampling():
@@ -141,11 +168,17 @@ def run_sampling():
         labeling_budget = st.session_state.get("labeling_budget", 10)
         cell_folds = st.session_state.get("cell_folds", {})
         domain_folds = st.session_state.get("domain_folds", {})
+        strategies = tuple(st.session_state.get("selected_strategies", []))
+        seed = int(st.session_state.get("labeling_seed", 0))
+        folds_fingerprint = get_stage_fingerprint("cell_folds") + ":" + get_stage_fingerprint("domain_folds")
         sampled_cells = get_cached_sampled_cells(
             dataset=dataset,
+            folds_fingerprint=folds_fingerprint,
             labeling_budget=labeling_budget,
-            cell_folds=cell_folds,
-            domain_folds=domain_folds,
+            seed=seed,
+            strategies=strategies,
+            _cell_folds=cell_folds,
+            _domain_folds=domain_folds,
         )
         # Persist in session state to avoid re-sampling on reload
         st.session_state[SAMPLE_KEY] = sampled_cells
@@ -154,23 +187,156 @@ def run_sampling():
         # Small delay to make spinner visible and UX smooth
         time.sleep(0.3)
 
+def _card_key(c: Dict[str, Any]) -> str:
+    # Same cell, same key in both modes (card ids differ between them)
+    return cell_label_key(c)
+
+
+def _batch_labels(batch: List[Dict[str, Any]]) -> Dict[int, bool]:
+    """Labels for a batch in learner form: candidate id -> is_error."""
+    results = st.session_state.get("labeling_results", {})
+    return {
+        int(c["id"]): not bool(results[_card_key(c)])
+        for c in batch
+        if _card_key(c) in results
+    }
+
+
+def _propagate_swipes(changed: List[Dict[str, Any]]) -> None:
+    """Push newly labeled cards into the live propagator."""
+    propagator = st.session_state.get(PROPAGATOR_KEY)
+    if propagator is None or st.session_state.get(PROPAGATOR_DATASET_KEY) != dataset:
+        propagator = backend_incremental_propagation(dataset)
+        st.session_state[PROPAGATOR_KEY] = propagator
+        st.session_state[PROPAGATOR_DATASET_KEY] = dataset
+    results = st.session_state.get("labeling_results", {})
+    delta = [
+        {**c, "is_error": not bool(results[_card_key(c)])}
+        for c in changed
+        if _card_key(c) in results
+    ]
+    try:
+        propagator.update(delta, limit=0)
+        st.session_state["labeling.propagation_updated"] = propagator.last_changed
+    except Exception as e:
+        logger.warning("Live propagation failed: %s", e)
+
+
+def _start_active_learning():
+    with st.spinner("🔄 Preparing active learning... Please wait..."):
+        labeling_budget = st.session_state.get("labeling_budget", 10)
+        learner = backend_active_learning(
+            selected_dataset=dataset,
+            labeling_budget=labeling_budget,
+            cell_folds=st.session_state.get("cell_folds", {}),
+            domain_folds=st.session_state.get("domain_folds", {}),
+            strategies=list(st.session_state.get("selected_strategies", [])),
+            seed=int(st.session_state.get("labeling_seed", 0)),
+            batch_size=AL_BATCH_SIZE,
+        )
+        served = st.session_state.get(SAMPLE_KEY, []) if st.session_state.get(AL_BATCH_KEY) else []
+        if served:
+            # Rebuilt after a reload: replay what was shown and labeled so far
+            learner.mark_served([int(c["id"]) for c in served])
+            learner.update(_batch_labels(served))
+        else:
+            batch = backend_sample_labeling(
+                dataset, labeling_budget, {}, {}, learner=learner
+            )
+            st.session_state[SAMPLE_KEY] = batch
+            st.session_state[AL_BATCH_KEY] = batch
+            st.session_state[AL_ROUND_KEY] = 0
+        st.session_state[AL_LEARNER_KEY] = learner
+        st.session_state[SAMPLE_DATASET_KEY] = dataset
+        st.session_state[SAMPLE_BUDGET_KEY] = labeling_budget
+        _remember_served()
+
+
+def _remember_served() -> None:
+    """Mirror the cells served in active mode into the persisted snapshot."""
+    st.session_state[AL_SERVED_KEY] = {
+        "dataset": st.session_state.get(SAMPLE_DATASET_KEY),
+        "budget": st.session_state.get(SAMPLE_BUDGET_KEY),
+        "cells": st.session_state.get(SAMPLE_KEY, []),
+    }
+
+
+def _advance_active_learning() -> bool:
+    """Feed the finished batch back to the learner and serve the next one."""
+    batch = st.session_state.get(AL_BATCH_KEY, [])
+    labels = _batch_labels(batch)
+    if len(labels) < len(batch):
+        return False
+    nxt = backend_sample_labeling(
+        dataset,
+        st.session_state.get(SAMPLE_BUDGET_KEY, 10),
+        {},
+        {},
+        learner=st.session_state[AL_LEARNER_KEY],
+        labels=labels,
+    )
+    if not nxt:
+        return False
+    st.session_state[SAMPLE_KEY] = st.session_state.get(SAMPLE_KEY, []) + nxt
+    st.session_state[AL_BATCH_KEY] = nxt
+    st.session_state[AL_ROUND_KEY] = st.session_state.get(AL_ROUND_KEY, 0) + 1
+    _remember_served()
+    return True
+
+
+active_mode = st.toggle(
+    "Active learning mode",
+    key=AL_MODE_KEY,
+    help="Label in small batches; each batch updates the per-fold models before the next cells are chosen.",
+)
+
 # Migration: support prior non-namespaced key
 if "sampled_cells" in st.session_state and SAMPLE_KEY not in st.session_state:
     st.session_state[SAMPLE_KEY] = st.session_state["sampled_cells"]
     st.session_state[SAMPLE_DATASET_KEY] = dataset
     st.session_state[SAMPLE_BUDGET_KEY] = st.session_state.get("labeling_budget", 10)
 
+# After a reload only the persisted active-learning state is left; restore the
+# served cells so the learner is rebuilt from them instead of starting over
+_al_served = st.session_state.get(AL_SERVED_KEY)
+if active_mode and SAMPLE_KEY not in st.session_state and _al_served and st.session_state.get(AL_BATCH_KEY):
+    st.session_state[SAMPLE_KEY] = _al_served.get("cells", [])
+    st.session_state[SAMPLE_DATASET_KEY] = _al_served.get("dataset")
+    st.session_state[SAMPLE_BUDGET_KEY] = _al_served.get("budget")
+
 # Auto-run sampling only if no samples exist for the current dataset
 _current_budget = st.session_state.get("labeling_budget", 10)
-if (
+_stale = (
     SAMPLE_KEY not in st.session_state
     or st.session_state.get(SAMPLE_DATASET_KEY) != dataset
     or st.session_state.get(SAMPLE_BUDGET_KEY) != _current_budget
-):
-    run_sampling()
+)
+if active_mode:
+    if _stale or not st.session_state.get(AL_BATCH_KEY):
+        st.session_state.pop(AL_BATCH_KEY, None)
+        _start_active_learning()
+    elif AL_LEARNER_KEY not in st.session_state:
+        _start_active_learning()
+else:
+    if st.session_state.pop(AL_BATCH_KEY, None) is not None:
+        # Leaving active mode: switch back to a regular one-shot sample
+        st.session_state.pop(AL_LEARNER_KEY, None)
+        st.session_state.pop(AL_SERVED_KEY, None)
+        _stale = True
+    if _stale:
+        run_sampling()
 
 if SAMPLE_KEY in st.session_state:
-    cards: List[Dict[str, Any]] = st.session_state.get(SAMPLE_KEY, [])
+    if active_mode:
+        cards: List[Dict[str, Any]] = st.session_state.get(AL_BATCH_KEY, [])
+        cards_key = f"labeling_cards_al_{st.session_state.get(AL_ROUND_KEY, 0)}"
+        st.caption(
+            f"Batch {st.session_state.get(AL_ROUND_KEY, 0) + 1} — "
+            f"{len(st.session_state.get(SAMPLE_KEY, []))} of {st.session_state.get(SAMPLE_BUDGET_KEY)} cells served"
+        )
+    else:
+        cards = st.session_state.get(SAMPLE_KEY, [])
+        cards_key = "labeling_cards"
     # Log: initializing cards (console)
     logger.info(
         "Initializing cards (n=%s, dataset=%s, budget=%s)",
@@ -187,7 +353,7 @@ if SAMPLE_KEY in st.session_state:
         cards=card_data, 
         display_mode="table", 
         view="desktop", 
-        key="labeling_cards",
+        key=cards_key,
         last_card_message="No more cards to swipe, continue with the Next-button below.",
         colors=get_swipecard_colors()
     )
@@ -198,22 +364,30 @@ if SAMPLE_KEY in st.session_state:
     if results and isinstance(results.get("swipedCards", None), list):
         swipes = results.get("swipedCards", [])
         made_changes = False
+        changed_cards: List[Dict[str, Any]] = []
         for swipe in swipes:
             idx = swipe.get("index")
             action = swipe.get("action")
             if idx is not None and action in {"left", "right"} and idx < len(cards):
-                # Support legacy/multiplayer shapes without 'id'
-                c = cards[idx]
-                card_id = c.get("id") or c.get("sample_id") or f"{c.get('table')}|{c.get('row')}|{c.get('col')}|{c.get('val')}"
-                key = str(card_id)
+                key = _card_key(cards[idx])
                 new_val = action == "right"
                 prev_val = st.session_state.labeling_results.get(key)
                 if prev_val is None or prev_val != new_val:
                     st.session_state.labeling_results[key] = new_val
+                    changed_cards.append(cards[idx])
                     made_changes = True
         if made_changes:
             # Only mark dirty if we actually recorded new swipes in this render
             mark_pipeline_dirty()
+            _propagate_swipes(changed_cards)
+        if made_changes and active_mode and _advance_active_learning():
+            st.rerun()
+
+    if st.session_state.get(PROPAGATOR_KEY) is not None:
+        st.caption(
+            f"Live propagation: {st.session_state[PROPAGATOR_KEY].n_labels} labels, "
+            f"last swipe updated {st.session_state.get('labeling.propagation_updated', 0)} cells"
+        )
 
     st.markdown("---")
     nav_cols = st.columns([1, 1, 1], gap="small")
@@ -1,11 +1,17 @@
 import streamlit as st
-import os
-import json
 import time
 import random
-from backend import backend_label_propagation
+from backend import backend_label_propagation, backend_incremental_propagation
+from backend import results_store
 from backend import sessions as mp_sessions  # multiplayer labels source
 from components import render_sidebar, apply_base_styles, render_restart_expander, render_inline_restart_button
+from components.utils import (
+    cell_label_key,
+    get_pipeline_config_value,
+    load_pipeline_config,
+    pipeline_config_exists,
+    update_pipeline_config,
+)
 # Removed: do not flip pipeline clean state from this page
 
 # Set page config and apply base styles
@@ -23,13 +29,9 @@ st.title("Propagated Errors")
 # ---------------------------------------------------------------------------
 # Attempt to load dataset from pipeline configuration if needed
 if "dataset_select" not in st.session_state and "pipeline_path" in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        with open(cfg_path) as f:
-            cfg = json.load(f)
-        selected = cfg.get("selected_dataset")
-        if selected:
-            st.session_state.dataset_select = selected
+    selected = get_pipeline_config_value(st.session_state.pipeline_path, "selected_dataset")
+    if selected:
+        st.session_state.dataset_select = selected
 
 # If no dataset is available, direct the user back to Configurations
 if "dataset_select" not in st.session_state:
@@ -38,6 +40,13 @@ if "dataset_select" not in st.session_state:
         st.switch_page("pages/Configurations.py")
     st.stop()
 
+# Live propagators: fed swipe by swipe on the Labeling page, and label by
+# label from the sessions DB for a multiplayer host
+LIVE_PROPAGATOR_KEY = "labeling.propagator"
+LIVE_PROPAGATOR_DATASET_KEY = "labeling.propagator.dataset"
+MP_PROPAGATOR_KEY = "mp.propagator"
+MP_PROPAGATOR_DATASET_KEY = "mp.propagator.dataset"
+
 # ---------------------------------------------------------------------------
 # Provide an explicit action to run propagation from current labels
 # ---------------------------------------------------------------------------
@@ -78,8 +87,7 @@ if st.button("🔁 Propagate Errors", key="propagate_errors", use_container_widt
         cards = st.session_state.get("labeling.sampled_cells") or st.session_state.get("sampled_cells", [])
         labeling_results = st.session_state.get("labeling_results", {})
         for cell in cards:
-            cid = cell.get("id") or cell.get("sample_id") or f"{cell.get('table')}|{cell.get('row')}|{cell.get('col')}|{cell.get('val')}"
-            key = str(cid)
+            key = cell_label_key(cell)
             if key not in labeling_results:
                 continue  # skip unlabeled cells
             is_error = not bool(labeling_results.get(key))
@@ -93,7 +101,17 @@ if st.button("🔁 Propagate Errors", key="propagate_errors", use_container_widt
                 "cell_fold": cell.get("cell_fold", ""),
             })
 
-    propagation_results = backend_label_propagation(selected_dataset, labeled_cells)
+    if used_multiplayer:
+        propagator = st.session_state.get(MP_PROPAGATOR_KEY)
+        if propagator is None or st.session_state.get(MP_PROPAGATOR_DATASET_KEY) != selected_dataset:
+            propagator = backend_incremental_propagation(selected_dataset)
+            st.session_state[MP_PROPAGATOR_KEY] = propagator
+            st.session_state[MP_PROPAGATOR_DATASET_KEY] = selected_dataset
+    elif st.session_state.get(LIVE_PROPAGATOR_DATASET_KEY) == selected_dataset:
+        propagator = st.session_state.get(LIVE_PROPAGATOR_KEY)
+    else:
+        propagator = None
+    propagation_results = backend_label_propagation(selected_dataset, labeled_cells, propagator=propagator)
     st.session_state.propagation_results = propagation_results
     # Mark that propagation was executed in this session and needs saving
     st.session_state.propagation_run = True
@@ -104,26 +122,29 @@ if st.button("🔁 Propagate Errors", key="propagate_errors", use_container_widt
 # If dataset is configured but no propagation results exist, try load from
 # pipeline config, otherwise encourage the user to run propagation
 # ---------------------------------------------------------------------------
+live_propagator = st.session_state.get(LIVE_PROPAGATOR_KEY)
+if (
+    live_propagator is not None
+    and live_propagator.n_labels
+    and st.session_state.get(LIVE_PROPAGATOR_DATASET_KEY) == selected_dataset
+    and not st.session_state.get("mp.session_id")
+):
+    # Reflect labels swiped since the last explicit run without recomputing
+    st.session_state.propagation_results = {"labeled_cells": live_propagator.labeled_cells()}
+    st.caption(f"Live results from {live_propagator.n_labels} labels.")
+
 if "propagation_results" not in st.session_state:
     loaded_from_config = False
     if "pipeline_path" in st.session_state:
-        cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-        if os.path.exists(cfg_path):
+        if pipeline_config_exists(st.session_state.pipeline_path):
             try:
-                with open(cfg_path) as f:
-                    cfg = json.load(f)
-                if cfg.get("propagation_results"):
-                    st.session_state.propagation_results = cfg["propagation_results"]
+                cfg = load_pipeline_config(st.session_state.pipeline_path)
+                stored = results_store.propagation_results_from_config(st.session_state.pipeline_path, cfg)
+                if stored:
+                    st.session_state.propagation_results = stored
                     loaded_from_config = True
                     st.session_state.propagation_saved = True
                     st.session_state.propagation_run = False
-                else:
-                    results = cfg.get("results", [])
-                    if results and isinstance(results[-1], dict) and results[-1].get("propagation_results"):
-                        st.session_state.propagation_results = results[-1]["propagation_results"]
-                        loaded_from_config = True
-                        st.session_state.propagation_saved = True
-                        st.session_state.propagation_run = False
             except Exception:
                 pass
     if not loaded_from_config:
@@ -174,52 +195,16 @@ for labeled_cell in propagation_results["labeled_cells"]:
         else:
             st.info("No cells were propagated from this label")
 
-# Save propagated errors to pipeline configuration only once (including full propagation_results)
+# Save the run to the results store and reference it from the pipeline configuration only once
 if (
     "pipeline_path" in st.session_state
     and st.session_state.get("propagation_run")
     and not st.session_state.get("propagation_saved")
 ):
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        with open(cfg_path, "r") as f:
-            cfg = json.load(f)
-
+    if pipeline_config_exists(st.session_state.pipeline_path):
         current_time = time.strftime("%Y-%m-%d %H:%M:%S")
-        propagated_errors = {}
-        for labeled_cell in propagation_results["labeled_cells"]:
-            table = labeled_cell.get("table")
-            if not table:
-                continue
-            if labeled_cell["is_error"]:
-                if table not in propagated_errors:
-                    propagated_errors[table] = []
-                error_info = {"confidence": 1.0, "source": "direct_label"}
-                if labeled_cell.get("row") is not None:
-                    error_info["row"] = labeled_cell["row"]
-                if labeled_cell.get("col"):
-                    error_info["col"] = labeled_cell["col"]
-                if labeled_cell.get("val") is not None:
-                    error_info["val"] = labeled_cell["val"]
-                propagated_errors[table].append(error_info)
-            for prop in labeled_cell.get("propagated_cells", []):
-                if table not in propagated_errors:
-                    propagated_errors[table] = []
-                error_info = {
-                    "confidence": prop.get("confidence", 0.5),
-                    "source": prop.get("reason", "Unknown")
-                }
-                if prop.get("row") is not None:
-                    error_info["row"] = prop["row"]
-                if prop.get("col"):
-                    error_info["col"] = prop["col"]
-                if prop.get("val") is not None:
-                    error_info["val"] = prop["val"]
-                propagated_errors[table].append(error_info)
-
-        # Save both simplified aggregated errors and the full propagation results structure
-        cfg["propagated_errors"] = propagated_errors
-        cfg["propagation_results"] = propagation_results
+        # Errors go to a per-run columnar file; the config keeps a reference and a summary
+        run_id, summary = results_store.save_run(st.session_state.pipeline_path, propagation_results)
         metrics = {
             "Precision": round(random.uniform(0.7, 0.9), 2),
             "Recall": round(random.uniform(0.7, 0.9), 2),
@@ -228,19 +213,25 @@ if (
 
         results_entry = {
             "Time": current_time,
-            "propagated_errors": propagated_errors,
-            "propagation_results": propagation_results,
-            "metrics": metrics
+            "run_id": run_id,
+            "metrics": metrics,
+            "summary": summary,
         }
 
-        if "results" not in cfg:
-            cfg["results"] = []
-        if cfg["results"] and cfg["results"][-1].get("Time", "").split(" ")[0] == current_time.split(" ")[0]:
-            cfg["results"][-1] = results_entry
+        results = list(get_pipeline_config_value(st.session_state.pipeline_path, "results", []))
+        if results and results[-1].get("Time", "").split(" ")[0] == current_time.split(" ")[0]:
+            replaced = results[-1].get("run_id")
+            if replaced:
+                results_store.delete_run(st.session_state.pipeline_path, replaced)
+            results[-1] = results_entry
         else:
-            cfg["results"].append(results_entry)
-        with open(cfg_path, "w") as f:
-            json.dump(cfg, f, indent=2)
+            results.append(results_entry)
+        # Only the results list changes; legacy inline copies are dropped
+        update_pipeline_config(
+            st.session_state.pipeline_path,
+            results=results,
+            remove=("propagated_errors", "propagation_results"),
+        )
     st.session_state.propagation_saved = True
     st.session_state.propagation_run = False
 
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import os
 import json
 import time
 import numpy as np
@@ -15,7 +14,13 @@ from components import (
     render_inline_restart_button,
     get_current_theme,
 )
-from components.utils import mark_pipeline_dirty
+from components.utils import (
+    mark_pipeline_dirty,
+    set_stage_fingerprint,
+    get_pipeline_config_value,
+    pipeline_config_exists,
+    update_pipeline_config,
+)
 
 # Page setup
 st.set_page_config(page_title="Quality Based Folding", layout="wide")
@@ -93,24 +98,16 @@ def _json_default(obj):
 # Load selected dataset
 # Load selected dataset from pipeline configuration if available
 if "dataset_select" not in st.session_state and "pipeline_path" in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        with open(cfg_path) as f:
-            cfg = json.load(f)
-        selected = cfg.get("selected_dataset")
-        if selected:
-            st.session_state.dataset_select = selected
+    selected = get_pipeline_config_value(st.session_state.pipeline_path, "selected_dataset")
+    if selected:
+        st.session_state.dataset_select = selected
 
 # Ensure strategies selection is in session state (load from config if needed)
 if "selected_strategies" not in st.session_state and "pipeline_path" in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        try:
-            with open(cfg_path) as f:
-                cfg = json.load(f)
-            st.session_state.selected_strategies = cfg.get("selected_strategies", [])
-        except Exception:
-            st.session_state.selected_strategies = []
+    if pipeline_config_exists(st.session_state.pipeline_path):
+        st.session_state.selected_strategies = list(
+            get_pipeline_config_value(st.session_state.pipeline_path, "selected_strategies", [])
+        )
 
 # If dataset is still not configured, inform the user and provide navigation
 if "dataset_select" not in st.session_state:
@@ -139,11 +136,9 @@ def highlight_cell(row_idx, col_name):
 # Load domain folds from config
 if "domain_folds" not in st.session_state:
     if "pipeline_path" in st.session_state:
-        cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-        if os.path.exists(cfg_path):
-            with open(cfg_path) as f:
-                cfg = json.load(f)
-            st.session_state.domain_folds = cfg.get("domain_folds", {})
+        if pipeline_config_exists(st.session_state.pipeline_path):
+            st.session_state.domain_folds = get_pipeline_config_value(st.session_state.pipeline_path, "domain_folds", {})
+            set_stage_fingerprint("domain_folds")
         else:
             st.warning("⚠️ No saved domain folds.")
             st.stop()
@@ -153,17 +148,11 @@ if "domain_folds" not in st.session_state:
 
 # If saved cell folds exist in the pipeline config, preload them and mark as already run
 if "pipeline_path" in st.session_state and "cell_folds" not in st.session_state:
-    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-    if os.path.exists(cfg_path):
-        try:
-            with open(cfg_path) as f:
-                cfg = json.load(f)
-            saved_cell_folds = cfg.get("cell_folds")
-            if saved_cell_folds:
-                st.session_state.cell_folds = saved_cell_folds
-                st.session_state.run_quality_folding = True
-        except Exception:
-            pass
+    saved_cell_folds = get_pipeline_config_value(st.session_state.pipeline_path, "cell_folds")
+    if saved_cell_folds:
+        st.session_state.cell_folds = saved_cell_folds
+        set_stage_fingerprint("cell_folds")
+        st.session_state.run_quality_folding = True
 
 # Initialize controls
 defaults = {
@@ -186,14 +175,10 @@ for key, val in defaults.items():
 if ("budget_slider" not in st.session_state) or ("budget_input" not in st.session_state):
     cfg_budget = 10
     if "pipeline_path" in st.session_state:
-        _cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-        if os.path.exists(_cfg_path):
-            try:
-                with open(_cfg_path) as _f:
-                    _cfg_tmp = json.load(_f)
-                cfg_budget = int(_cfg_tmp.get("labeling_budget", 10))
-            except Exception:
-                cfg_budget = 10
+        try:
+            cfg_budget = int(get_pipeline_config_value(st.session_state.pipeline_path, "labeling_budget", 10))
+        except Exception:
+            cfg_budget = 10
     st.session_state.setdefault("budget_slider", min(int(cfg_budget), 100))
     st.session_state.setdefault("budget_input", int(cfg_budget))
 
@@ -247,14 +232,11 @@ st.session_state.selected_strategies = selected
 st.markdown("---")
 if st.button("▶️ Run Quality Based Folding"):
     with st.spinner("🔄 Processing... Please wait..."):
-        # Load current configuration and persist the latest labeling budget from UI
-        cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-        with open(cfg_path) as f:
-            cfg = json.load(f)
-        labeling_budget = int(st.session_state.get("budget_input", st.session_state.get("budget_slider", cfg.get("labeling_budget", 10))))
-        cfg["labeling_budget"] = labeling_budget
-        # Persist current strategies selection
-        cfg["selected_strategies"] = st.session_state.get("selected_strategies", [])
+        # Persist the latest labeling budget from UI
+        labeling_budget = int(st.session_state.get(
+            "budget_input",
+            st.session_state.get("budget_slider", get_pipeline_config_value(st.session_state.pipeline_path, "labeling_budget", 10)),
+        ))
         
         # Call the backend function to get cell folds
         cell_folds = backend_qbf(
@@ -265,11 +247,15 @@ if st.button("▶️ Run Quality Based Folding"):
         
         # Store the cell folds in session state
         st.session_state.cell_folds = cell_folds
+        set_stage_fingerprint("cell_folds")
         
-        # Save to configuration file
-        cfg["cell_folds"] = cell_folds
-        with open(cfg_path, "w") as f:
-            json.dump(cfg, f, indent=2, default=_json_default)
+        # Save to configuration file, along with budget and current strategies selection
+        update_pipeline_config(
+            st.session_state.pipeline_path,
+            labeling_budget=labeling_budget,
+            selected_strategies=st.session_state.get("selected_strategies", []),
+            cell_folds=json.loads(json.dumps(cell_folds, default=_json_default)),
+        )
             
         time.sleep(2)  # Keep a small delay for UX
     # Cell folds changed, downstream results are outdated
@@ -333,14 +319,13 @@ def show_cell_dialog(cell, fold_name):
                     del st.session_state.cell_folds[old_dom]
 
             if "pipeline_path" in st.session_state:
-                cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-                with open(cfg_path, "r") as f:
-                    cfg = json.load(f)
-                cfg["cell_folds"] = st.session_state.cell_folds
-                with open(cfg_path, "w") as f:
-                    json.dump(cfg, f, indent=2, default=_json_default)
+                update_pipeline_config(
+                    st.session_state.pipeline_path,
+                    cell_folds=json.loads(json.dumps(st.session_state.cell_folds, default=_json_default)),
+                )
             # Moving a cell changes folds
             mark_pipeline_dirty()
+            set_stage_fingerprint("cell_folds")
             st.rerun()
         if st.button("Close", key=f"close_{fold_name}_{tbl}_{r}_{c}_{id(cell)}"):
             st.rerun()
@@ -383,6 +368,11 @@ header_cols = st.columns([4, action_col_width])
 header_cols[0].markdown("**Fold / Cell**")
 header_cols[1].markdown("**Select**")
 
+# Fold labels are read once per render from the cached pipeline config
+cell_fold_labels = {}
+if "pipeline_path" in st.session_state:
+    cell_fold_labels = get_pipeline_config_value(st.session_state.pipeline_path, "cell_fold_labels", {}) or {}
+
 for dom, folds in st.session_state.cell_folds.items():
     # Limit initially visible folds per domain to 1, with a 'show more' button
     fold_names = list(folds.keys())
@@ -397,12 +387,8 @@ for dom, folds in st.session_state.cell_folds.items():
     for fname in show_fold_names:
         cell_list = folds[fname]
         fold_label = None
-        if "pipeline_path" in st.session_state:
-            cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-            if os.path.exists(cfg_path):
-                with open(cfg_path) as f:
-                    cfg = json.load(f)
-                fold_label = cfg.get("cell_fold_labels", {}).get(fname, "neutral")
+        if "pipeline_path" in st.session_state and pipeline_config_exists(st.session_state.pipeline_path):
+            fold_label = cell_fold_labels.get(fname, "neutral")
 
         label_color = {
             "correct": "green",
@@ -425,31 +411,19 @@ for dom, folds in st.session_state.cell_folds.items():
         elif st.session_state.bulk_annotate_mode:
             button_cols = fold_cols[1].columns(2)
             if button_cols[0].button("✓", key=f"correct_{fname}", use_container_width=True):
-                if "pipeline_path" in st.session_state:
-                    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-                    if os.path.exists(cfg_path):
-                        with open(cfg_path) as f:
-                            cfg = json.load(f)
-                        if "cell_fold_labels" not in cfg:
-                            cfg["cell_fold_labels"] = {}
-                        cfg["cell_fold_labels"][fname] = "correct"
-                        with open(cfg_path, "w") as f:
-                            json.dump(cfg, f, indent=2, default=_json_default)
-                        mark_pipeline_dirty()
-                        st.rerun()
+                if "pipeline_path" in st.session_state and pipeline_config_exists(st.session_state.pipeline_path):
+                    update_pipeline_config(
+                        st.session_state.pipeline_path, cell_fold_labels={**cell_fold_labels, fname: "correct"}
+                    )
+                    mark_pipeline_dirty()
+                    st.rerun()
             if button_cols[1].button("✗", key=f"false_{fname}", use_container_width=True):
-                if "pipeline_path" in st.session_state:
-                    cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-                    if os.path.exists(cfg_path):
-                        with open(cfg_path) as f:
-                            cfg = json.load(f)
-                        if "cell_fold_labels" not in cfg:
-                            cfg["cell_fold_labels"] = {}
-                        cfg["cell_fold_labels"][fname] = "false"
-                        with open(cfg_path, "w") as f:
-                            json.dump(cfg, f, indent=2, default=_json_default)
-                        mark_pipeline_dirty()
-                        st.rerun()
+                if "pipeline_path" in st.session_state and pipeline_config_exists(st.session_state.pipeline_path):
+                    update_pipeline_config(
+                        st.session_state.pipeline_path, cell_fold_labels={**cell_fold_labels, fname: "false"}
+                    )
+                    mark_pipeline_dirty()
+                    st.rerun()
         else:
             fold_cols[1].empty()
 
@@ -513,11 +487,7 @@ if st.session_state.merge_mode and len(st.session_state.selected_folds_for_merge
         target_domain = fold_to_domain[target_fold]
         
         # Get the labels of all folds being merged
-        cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-        with open(cfg_path, "r") as f:
-            cfg = json.load(f)
-        
-        fold_labels = cfg.get("cell_fold_labels", {})
+        fold_labels = get_pipeline_config_value(st.session_state.pipeline_path, "cell_fold_labels", {})
         labels_to_merge = [fold_labels.get(fold, "neutral") for fold in st.session_state.selected_folds_for_merge]
         
         # Determine the final label based on the rules
@@ -536,14 +506,12 @@ if st.session_state.merge_mode and len(st.session_state.selected_folds_for_merge
             final_label = "neutral"  # Default case
         
         # Update the label for the target fold
-        if "cell_fold_labels" not in cfg:
-            cfg["cell_fold_labels"] = {}
-        cfg["cell_fold_labels"][target_fold] = final_label
+        fold_labels[target_fold] = final_label
         
         # Remove labels for the source folds that will be deleted
         for fold in st.session_state.selected_folds_for_merge[1:]:
-            if fold in cfg["cell_fold_labels"]:
-                del cfg["cell_fold_labels"][fold]
+            if fold in fold_labels:
+                del fold_labels[fold]
         
         # Perform the merge
         for fold in st.session_state.selected_folds_for_merge[1:]:
@@ -555,13 +523,13 @@ if st.session_state.merge_mode and len(st.session_state.selected_folds_for_merge
             # Remove the source fold
             del st.session_state.cell_folds[source_domain][fold]
         
-        # Save the updated configuration
-        with open(cfg_path, "w") as f:
-            json.dump(cfg, f, indent=2, default=_json_default)
+        # Save the updated fold labels
+        update_pipeline_config(st.session_state.pipeline_path, cell_fold_labels=fold_labels)
         
         st.session_state.selected_folds_for_merge = []
         st.session_state.merge_mode = False
         mark_pipeline_dirty()
+        set_stage_fingerprint("cell_folds")
         st.rerun()
 
 # Global Confirm Split: if split mode is active and at least one cell is selected
@@ -598,6 +566,7 @@ if st.session_state.split_mode:
             st.session_state.split_mode = False
             st.session_state.selected_cells_for_split = {}
             mark_pipeline_dirty()
+            set_stage_fingerprint("cell_folds")
             st.rerun()
 
 # Navigation row: Restart | Back | Next
@@ -615,12 +584,10 @@ if nav_cols[1].button("Back", key="qbf_back", use_container_width=True):
 # Next: Save and Continue
 if nav_cols[2].button("Next", key="save_cell_folds", use_container_width=True):
     if "pipeline_path" in st.session_state:
-        cfg_path = os.path.join(st.session_state.pipeline_path, "configurations.json")
-        with open(cfg_path, "r") as f:
-            cfg = json.load(f)
-        cfg["cell_folds"] = st.session_state.cell_folds
-        with open(cfg_path, "w") as f:
-            json.dump(cfg, f, indent=2, default=_json_default)
+        update_pipeline_config(
+            st.session_state.pipeline_path,
+            cell_folds=json.loads(json.dumps(st.session_state.cell_folds, default=_json_default)),
+        )
         st.success("✅ Saved.")
     else:
         st.warning("⚠️ No pipeline path set.")
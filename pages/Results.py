@@ -1,12 +1,12 @@
 import streamlit as st
 import random
 import os
-import json
 import datetime
 import pandas as pd
 import urllib.parse
 from components import render_sidebar, apply_base_styles, render_restart_expander, render_inline_restart_button, get_current_theme
-from components.utils import is_pipeline_dirty
+from components.utils import is_pipeline_dirty, get_pipeline_config_value
+from backend.results_index import summary_rows
 from streamlit_social_share import streamlit_social_share
 
 # Set page config and apply base styles
@@ -18,21 +18,10 @@ render_sidebar()
 
 st.title("Results")
 
-def load_config(path):
-    if os.path.exists(path):
-        try:
-            with open(path, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-    return {}
-
 if "pipeline_path" in st.session_state:
     current_pipeline_path = st.session_state.pipeline_path
-    config_path = os.path.join(current_pipeline_path, "configurations.json")
-    config = load_config(config_path)
-    results = config.get("results", [])
-    current_labeling_budget = config.get("labeling_budget", "N/A")
+    results = get_pipeline_config_value(current_pipeline_path, "results", [])
+    current_labeling_budget = get_pipeline_config_value(current_pipeline_path, "labeling_budget", "N/A")
 
     if results:
         latest_result = results[-1]
@@ -60,8 +49,7 @@ col1, col2, col3, col4 = st.columns(4)
 # -----------------------------------------------------------------------------
 current_dataset = st.session_state.get("dataset_select", None)
 if not current_dataset and "pipeline_path" in st.session_state:
-    cfg = load_config(os.path.join(st.session_state.pipeline_path, "configurations.json"))
-    current_dataset = cfg.get("selected_dataset", None)
+    current_dataset = get_pipeline_config_value(st.session_state.pipeline_path, "selected_dataset")
     if current_dataset:
         st.session_state.dataset_select = current_dataset
 
@@ -103,25 +91,10 @@ def highlight_current(row):
         return [''] * len(row)
 
 if dataset_configured:
-    same_dataset_rows = []
-    for pipeline in os.listdir(pipelines_folder):
-        pipeline_dir = os.path.join(pipelines_folder, pipeline)
-        if os.path.isdir(pipeline_dir):
-            cfg = load_config(os.path.join(pipeline_dir, "configurations.json"))
-            if cfg.get("selected_dataset") == current_dataset:
-                labeling_budget = cfg.get("labeling_budget", "")
-                results_list = cfg.get("results", [])
-                for res in results_list:
-                    metrics = res.get("metrics", {})
-                    row = {
-                        "Time": res.get("Time", ""),
-                        "Pipeline Name": pipeline,
-                        "Labeling Budget": labeling_budget,
-                        "Recall": metrics.get("Recall", ""),
-                        "F1": metrics.get("F1", ""),
-                        "Precision": metrics.get("Precision", "")
-                    }
-                    same_dataset_rows.append(row)
+    # Rows come from the results summary index instead of parsing every pipeline
+    same_dataset_rows = summary_rows(pipelines_folder, dataset=current_dataset)
+    for row in same_dataset_rows:
+        row.pop("Dataset", None)
 
     found_current = any(
         row["Pipeline Name"] == current_pipeline_name and row["Time"] == current_time
@@ -129,8 +102,7 @@ if dataset_configured:
     )
     # Only synthesize a current row when we have no match AND pipeline isn't marked dirty
     if not found_current and results and not dirty:
-        current_cfg = load_config(os.path.join(current_pipeline_path, "configurations.json"))
-        current_labeling_budget = current_cfg.get("labeling_budget", "")
+        current_labeling_budget = get_pipeline_config_value(current_pipeline_path, "labeling_budget", "")
         current_row = {
             "Time": current_time,
             "Pipeline Name": current_pipeline_name,
@@ -164,26 +136,7 @@ if dataset_configured:
     st.dataframe(styled_same_dataset_df)
 
 # ---------------- ALL DATASETS ----------------
-all_rows = []
-for pipeline in os.listdir(pipelines_folder):
-    pipeline_dir = os.path.join(pipelines_folder, pipeline)
-    if os.path.isdir(pipeline_dir):
-        cfg = load_config(os.path.join(pipeline_dir, "configurations.json"))
-        labeling_budget = cfg.get("labeling_budget", "")
-        selected_dataset = cfg.get("selected_dataset", "")
-        results_list = cfg.get("results", [])
-        for res in results_list:
-            metrics = res.get("metrics", {})
-            row = {
-                "Time": res.get("Time", ""),
-                "Pipeline Name": pipeline,
-                "Dataset": selected_dataset,
-                "Labeling Budget": labeling_budget,
-                "Recall": metrics.get("Recall", ""),
-                "F1": metrics.get("F1", ""),
-                "Precision": metrics.get("Precision", "")
-            }
-            all_rows.append(row)
+all_rows = summary_rows(pipelines_folder)
 
 found_current_all = any(
     row["Pipeline Name"] == current_pipeline_name and row["Time"] == current_time
@@ -191,8 +144,7 @@ found_current_all = any(
 )
 # Only synthesize a current row across all datasets when there is no match AND pipeline isn't marked dirty
 if not found_current_all and results and not dirty:
-    current_cfg_all = load_config(os.path.join(current_pipeline_path, "configurations.json"))
-    current_labeling_budget_all = current_cfg_all.get("labeling_budget", "")
+    current_labeling_budget_all = get_pipeline_config_value(current_pipeline_path, "labeling_budget", "")
     current_row_all = {
         "Time": current_time,
         "Pipeline Name": current_pipeline_name,